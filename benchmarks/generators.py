@@ -0,0 +1,208 @@
+import random
+
+FOCUS_ID = 0
+
+def random_share(generator):
+    """
+    Draws a share string in one of the formats found in the registry exports.
+
+    Args:
+        generator (random.Random): Seeded random generator
+
+    Returns:
+        str: Share string like "100%", "10-15%" or "<5%"
+    """
+    kind = generator.random()
+    if kind < 0.3:
+        return generator.choice(['100%', '50%', '33%', '25%'])
+    if kind < 0.5:
+        return f'{generator.randint(1, 99)}%'
+    if kind < 0.85:
+        lower = generator.choice([0, 5, 10, 15, 20, 25, 33, 50, 67, 90])
+        upper = min(100, lower + generator.choice([5, 10, 17]))
+        return f'{lower}-{upper}%'
+    return f'<{generator.choice([5, 10, 20])}%'
+
+def make_edge(source, source_depth, target, target_depth, share, active=True):
+    """
+    Builds an edge in the schema of the data/*.json files.
+
+    Args:
+        source (int): Source entity ID
+        source_depth (int): Depth of the source relative to the focus company
+        target (int): Target entity ID
+        target_depth (int): Depth of the target relative to the focus company
+        share (str): Share string
+        active (bool): Whether the edge is active
+
+    Returns:
+        dict: Edge
+    """
+    return {
+        'id': f'{source}_{target}',
+        'source': source,
+        'source_name': f'Company {source}',
+        'source_depth': source_depth,
+        'target': target,
+        'target_name': f'Company {target}',
+        'target_depth': target_depth,
+        'share': share,
+        'real_lower_share': None,
+        'real_average_share': None,
+        'real_upper_share': None,
+        'active': active
+    }
+
+def deep_chain(edge_count, seed=0):
+    """
+    Two long chains, owners above the focus company and subsidiaries below it.
+
+    Args:
+        edge_count (int): Number of edges
+        seed (int): Random seed
+
+    Returns:
+        list: List of edges
+    """
+    generator = random.Random(seed)
+    edges = []
+    upstream_count = edge_count // 2
+    for depth in range(upstream_count):
+        source = depth + 1
+        target = depth if depth else FOCUS_ID
+        edges.append(make_edge(source, depth + 1, target, depth, random_share(generator)))
+
+    previous = FOCUS_ID
+    for depth in range(1, edge_count - upstream_count + 1):
+        node = upstream_count + depth
+        edges.append(make_edge(previous, 1 - depth, node, -depth, random_share(generator)))
+        previous = node
+    return edges
+
+def wide_fan_in(edge_count, seed=0):
+    """
+    Many direct owners of the focus company, each held by a few owners of its own.
+
+    Args:
+        edge_count (int): Number of edges
+        seed (int): Random seed
+
+    Returns:
+        list: List of edges
+    """
+    generator = random.Random(seed)
+    direct_count = max(1, edge_count // 4)
+    edges = [make_edge(node, 1, FOCUS_ID, 0, random_share(generator)) for node in range(1, direct_count + 1)]
+
+    next_node = direct_count + 1
+    while len(edges) < edge_count:
+        target = generator.randint(1, direct_count)
+        edges.append(make_edge(next_node, 2, target, 1, random_share(generator)))
+        next_node += 1
+    return edges
+
+def cross_holdings(edge_count, seed=0, depth=6, cycle_ratio=0.1):
+    """
+    Layered owners of the focus company with random cross-holdings that form cycles.
+
+    Args:
+        edge_count (int): Number of edges
+        seed (int): Random seed
+        depth (int): Number of owner layers
+        cycle_ratio (float): Fraction of edges pointing back up a layer
+
+    Returns:
+        list: List of edges
+    """
+    generator = random.Random(seed)
+    layer_size = max(1, edge_count // (2 * depth))
+    layers = [[FOCUS_ID]]
+    next_node = 1
+    for _ in range(depth):
+        layers.append(list(range(next_node, next_node + layer_size)))
+        next_node += layer_size
+
+    edges = []
+    seen = set()
+    attempts = 0
+    while len(edges) < edge_count and attempts < edge_count * 10:
+        attempts += 1
+        layer = generator.randint(1, depth)
+        if generator.random() < cycle_ratio and layer < depth:
+            # A company holding shares in one of its own owners
+            source = generator.choice(layers[layer])
+            target = generator.choice(layers[layer + 1])
+            source_depth, target_depth = layer + 2, layer + 1
+        else:
+            source = generator.choice(layers[layer])
+            target = generator.choice(layers[layer - 1])
+            source_depth, target_depth = layer, layer - 1
+
+        if source == target or (source, target) in seen:
+            continue
+        seen.add((source, target))
+        edges.append(make_edge(source, source_depth, target, target_depth, random_share(generator)))
+    return edges
+
+def dense_clique(edge_count, seed=0):
+    """
+    Groups of companies that all hold small shares in each other, one owning the focus company.
+
+    Args:
+        edge_count (int): Number of edges
+        seed (int): Random seed
+
+    Returns:
+        list: List of edges
+    """
+    generator = random.Random(seed)
+    clique_size = max(2, min(32, int(edge_count ** 0.5)))
+    edges = []
+    next_node = 1
+    while len(edges) < edge_count:
+        members = list(range(next_node, next_node + clique_size))
+        next_node += clique_size
+        edges.append(make_edge(members[0], 1, FOCUS_ID, 0, random_share(generator)))
+        for source in members:
+            for target in members:
+                if source == target or len(edges) >= edge_count:
+                    continue
+                share = f'{generator.choice([1, 2, 3])}%'
+                edges.append(make_edge(source, 2 if target == members[0] else 3, target,
+                                       1 if target == members[0] else 2, share))
+    return edges
+
+def mixed(edge_count, seed=0):
+    """
+    Owners and subsidiaries with mixed share ranges, cross-holdings and inactive edges.
+
+    Args:
+        edge_count (int): Number of edges
+        seed (int): Random seed
+
+    Returns:
+        list: List of edges
+    """
+    generator = random.Random(seed)
+    edges = cross_holdings(edge_count // 2, seed)
+    # Half of a deep chain lies below the focus company
+    subsidiaries = deep_chain(2 * (edge_count - len(edges)), seed)
+    offset = max(max(edge['source'], edge['target']) for edge in edges) + 1 if edges else 1
+    for edge in subsidiaries:
+        if edge['target_depth'] >= 0:
+            continue
+        source = edge['source'] + offset if edge['source'] != FOCUS_ID else FOCUS_ID
+        target = edge['target'] + offset
+        edges.append(make_edge(source, edge['source_depth'], target, edge['target_depth'], edge['share']))
+
+    for edge in edges:
+        edge['active'] = generator.random() > 0.05
+    return edges
+
+GENERATORS = {
+    'deep_chain': deep_chain,
+    'wide_fan_in': wide_fan_in,
+    'cross_holdings': cross_holdings,
+    'dense_clique': dense_clique,
+    'mixed': mixed,
+}
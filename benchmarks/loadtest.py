@@ -0,0 +1,142 @@
+import asyncio
+import json
+import math
+import sys
+import time
+from calculator.service import CalculationService, post
+from .generators import GENERATORS
+
+def percentile(values, fraction):
+    """
+    Args:
+        values (list): Measurements
+        fraction (float): Percentile as a fraction, e.g. 0.99
+
+    Returns:
+        float: Nearest-rank percentile of the values, None if there are none
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+async def run_load_test(host, port, payloads, requests=200, concurrency=16, engine=None):
+    """
+    Sends requests to a calculation service from concurrent clients and measures latency.
+
+    Every client keeps one connection open and sends the payloads in turn, so requests
+    for the same payload from different clients overlap.
+
+    Args:
+        host (str): Address of the service
+        port (int): Port of the service
+        payloads (list): Request bodies as bytes
+        requests (int): Total number of requests
+        concurrency (int): Number of concurrent clients
+        engine (str): Engine parameter of the requests, the service's default if None
+
+    Returns:
+        dict: Throughput, latency percentiles in seconds and the number of responses per status
+    """
+    target = '/calculate' + (f'?engine={engine}' if engine else '')
+    latencies = []
+    statuses = {}
+    next_request = 0
+
+    async def client():
+        nonlocal next_request
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while next_request < requests:
+                body = payloads[next_request % len(payloads)]
+                next_request += 1
+                start = time.perf_counter()
+                status, _ = await post(reader, writer, target, body, host)
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    seconds = time.perf_counter() - start
+
+    return {
+        'requests': len(latencies),
+        'concurrency': concurrency,
+        'payloads': len(payloads),
+        'seconds': round(seconds, 6),
+        'requests_per_second': round(len(latencies) / seconds, 2),
+        'p50_seconds': round(percentile(latencies, 0.5), 6),
+        'p90_seconds': round(percentile(latencies, 0.9), 6),
+        'p99_seconds': round(percentile(latencies, 0.99), 6),
+        'max_seconds': round(max(latencies), 6),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())}
+    }
+
+async def run_local(payloads, requests, concurrency, engine, **settings):
+    """
+    Runs the load test against a service started in this process on a free port.
+
+    Args:
+        payloads (list): Request bodies as bytes
+        requests (int): Total number of requests
+        concurrency (int): Number of concurrent clients
+        engine (str): Engine parameter of the requests
+        settings: Arguments of CalculationService
+
+    Returns:
+        dict: Load test report with the counters of the service
+    """
+    service = CalculationService(**settings)
+    host, port = await service.start('127.0.0.1', 0)
+    try:
+        report = await run_load_test(host, port, payloads, requests, concurrency, engine)
+    finally:
+        await service.close()
+    report['service'] = service.stats()
+    return report
+
+# For direct script execution
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Measure latency of the calculation service under load.')
+    parser.add_argument('--host', default='127.0.0.1', help='Address of a running service')
+    parser.add_argument('--port', type=int,
+                        help='Port of a running service, a service is started in this process if not given')
+    parser.add_argument('--input', help='Network file sent in every request instead of generated networks')
+    parser.add_argument('--generator', choices=list(GENERATORS), default='mixed', help='Generator of the networks')
+    parser.add_argument('--size', type=int, default=1000, help='Number of edges of generated networks')
+    parser.add_argument('--distinct', type=int, default=4,
+                        help='Number of distinct generated networks, identical ones are coalesced by the service')
+    parser.add_argument('--requests', type=int, default=200, help='Total number of requests')
+    parser.add_argument('--concurrency', type=int, default=16, help='Number of concurrent clients')
+    parser.add_argument('--engine', help='Engine parameter of the requests')
+    parser.add_argument('--workers', type=int, help='Worker processes of a local service')
+    parser.add_argument('--max-pending', type=int, default=64, help='Pending calculations of a local service')
+    parser.add_argument('--output', help='Path to write the report as JSON')
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, 'rb') as f:
+            payloads = [f.read()]
+    else:
+        payloads = [
+            json.dumps(GENERATORS[args.generator](args.size, seed)).encode('utf-8')
+            for seed in range(args.distinct)
+        ]
+
+    if args.port is None:
+        report = asyncio.run(run_local(payloads, args.requests, args.concurrency, args.engine,
+                                       workers=args.workers, max_pending=args.max_pending))
+    else:
+        report = asyncio.run(run_load_test(args.host, args.port, payloads, args.requests, args.concurrency,
+                                           args.engine))
+
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
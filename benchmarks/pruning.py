@@ -0,0 +1,168 @@
+import copy
+import json
+import random
+import sys
+import time
+from calculator.calculator import PRUNED_ENGINES, calculate_real_shares
+from calculator.registry import RegistryGraph
+from .generators import GENERATORS
+
+DEFAULT_THRESHOLDS = (0.0001, 0.01, 0.1, 1.0)
+
+def largest_error(exact, pruned):
+    """
+    Args:
+        exact (dict): Result of RegistryGraph.real_ownership without pruning
+        pruned (dict): Result for the same focus companies with pruning
+
+    Returns:
+        float: Largest difference in percentage points of any bound of any value
+    """
+    error = 0.0
+    for focus_id, result in exact.items():
+        for direction in ('owners', 'holdings'):
+            values = pruned[focus_id][direction]
+            for entity_id, expected in result[direction].items():
+                value = values.get(entity_id, (0.0, 0.0, 0.0))
+                error = max(error, *(abs(first - second) for first, second in zip(value, expected)))
+    return round(error, 6)
+
+def run_pruning_benchmark(generators, size=20000, focus_count=200, thresholds=DEFAULT_THRESHOLDS, seed=0, log=None):
+    """
+    Times registry-wide ownership of random focus companies for every min_contribution threshold.
+
+    Args:
+        generators (list): Names of generators from GENERATORS, depth fields are ignored
+        size (int): Number of edges
+        focus_count (int): Number of focus companies solved together
+        thresholds (list): min_contribution values in percentage points
+        seed (int): Seed of the generators and of the choice of focus companies
+        log (file): If given, a line is written per measurement
+
+    Returns:
+        list: Per generator and threshold, None for no pruning, the seconds, the number of
+              values in the result, the guaranteed error bound and the largest actual error
+    """
+    results = []
+    for name in generators:
+        network = GENERATORS[name](size, seed)
+        focus_ids = random.Random(seed).sample(RegistryGraph(network).node_ids, focus_count)
+        exact = None
+        for threshold in (None, *thresholds):
+            # A new graph per run, results are cached per focus
+            registry = RegistryGraph(network)
+            start = time.perf_counter()
+            result = registry.real_ownership(focus_ids, min_contribution=threshold)
+            seconds = time.perf_counter() - start
+            if exact is None:
+                exact = result
+
+            bounds = [bound for focus_result in result.values()
+                      for bound in focus_result.get('error_bound', {}).values()]
+            row = {
+                'generator': name,
+                'size': size,
+                'focus_companies': focus_count,
+                'min_contribution': threshold,
+                'seconds': round(seconds, 6),
+                'values': sum(len(focus_result['owners']) + len(focus_result['holdings'])
+                              for focus_result in result.values()),
+                'error_bound': max(bounds, default=0.0),
+                'largest_error': largest_error(exact, result)
+            }
+            results.append(row)
+            if log is not None:
+                log.write(json.dumps(row) + '\n')
+                log.flush()
+    return results
+
+def largest_edge_error(exact, pruned):
+    """
+    Args:
+        exact (list): Network solved without pruning
+        pruned (list): The same network solved with pruning
+
+    Returns:
+        float: Largest difference in percentage points of any real share of any edge
+    """
+    error = 0.0
+    for expected, edge in zip(exact, pruned):
+        for field in ('real_lower_share', 'real_average_share', 'real_upper_share'):
+            if expected[field] is not None:
+                error = max(error, abs(expected[field] - edge[field]))
+    return round(error, 6)
+
+def run_engine_pruning_benchmark(generators, size=200000, thresholds=DEFAULT_THRESHOLDS, engines=PRUNED_ENGINES,
+                                 seed=0, log=None):
+    """
+    Times calculate_real_shares of a single focus company for every min_contribution threshold.
+
+    Args:
+        generators (list): Names of generators from GENERATORS
+        size (int): Number of edges
+        thresholds (list): min_contribution values in percentage points
+        engines (list): Engines from PRUNED_ENGINES
+        seed (int): Seed of the generators
+        log (file): If given, a line is written per measurement
+
+    Returns:
+        list: Per generator, engine and threshold, None for no pruning, the seconds, the number
+              of iterations, the guaranteed error bound and the largest actual error
+    """
+    results = []
+    for name in generators:
+        network = GENERATORS[name](size, seed)
+        for engine in engines:
+            exact = None
+            for threshold in (None, *thresholds):
+                edges = copy.deepcopy(network)
+                stats = {}
+                start = time.perf_counter()
+                result = calculate_real_shares(edges, engine, stats, min_contribution=threshold)
+                seconds = time.perf_counter() - start
+                if exact is None:
+                    exact = result
+
+                row = {
+                    'generator': name,
+                    'size': size,
+                    'engine': engine,
+                    'min_contribution': threshold,
+                    'seconds': round(seconds, 6),
+                    'iterations': stats['iterations'],
+                    'error_bound': stats.get('error_bound', 0.0),
+                    'largest_error': largest_edge_error(exact, result)
+                }
+                results.append(row)
+                if log is not None:
+                    log.write(json.dumps(row) + '\n')
+                    log.flush()
+    return results
+
+# For direct script execution
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Measure speed and error of pruning small contributions in '
+                                                 'registry-wide ownership, or of a single focus company with --engines.')
+    parser.add_argument('--generators', nargs='+', choices=list(GENERATORS), default=list(GENERATORS),
+                        help='Generators of the networks')
+    parser.add_argument('--engines', nargs='+', choices=PRUNED_ENGINES,
+                        help='Measure these engines on the depth fields instead of the registry')
+    parser.add_argument('--size', type=int, default=20000, help='Number of edges')
+    parser.add_argument('--focus-companies', type=int, default=200, help='Number of focus companies solved together')
+    parser.add_argument('--thresholds', nargs='+', type=float, default=list(DEFAULT_THRESHOLDS),
+                        help='min_contribution values in percentage points')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the generators')
+    parser.add_argument('--output', help='Path to write the results as JSON')
+    args = parser.parse_args()
+
+    if args.engines:
+        results = run_engine_pruning_benchmark(args.generators, args.size, args.thresholds, args.engines, args.seed,
+                                               sys.stderr)
+    else:
+        results = run_pruning_benchmark(args.generators, args.size, args.focus_companies, args.thresholds,
+                                        args.seed, sys.stderr)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
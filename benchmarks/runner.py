@@ -0,0 +1,106 @@
+import copy
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from calculator.calculator import calculate_real_shares, ENGINES
+from .generators import GENERATORS
+
+DEFAULT_SIZES = (100, 1000, 10000)
+
+def measure(network, engine, repeat=3):
+    """
+    Times calculate_real_shares on a network and measures its peak memory.
+
+    Timing runs are done without tracemalloc, which slows Python down. Peak memory is
+    measured in one extra run.
+
+    Args:
+        network (list): List of edges, left unchanged
+        engine (str): Name of the engine
+        repeat (int): Number of timing runs, the fastest one is reported
+
+    Returns:
+        dict: Seconds, peak memory in bytes, iterations and convergence of the run
+    """
+    timings = []
+    stats = {}
+    for _ in range(repeat):
+        edges = copy.deepcopy(network)
+        stats = {}
+        start = time.perf_counter()
+        calculate_real_shares(edges, engine, stats)
+        timings.append(time.perf_counter() - start)
+
+    edges = copy.deepcopy(network)
+    tracemalloc.start()
+    try:
+        calculate_real_shares(edges, engine)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'seconds': round(min(timings), 6),
+        'peak_memory_bytes': peak,
+        'iterations': stats.get('iterations'),
+        'converged': stats.get('converged')
+    }
+
+def run_benchmarks(generators, sizes, engines, repeat=3, seed=0, log=None):
+    """
+    Runs every engine on every generated network.
+
+    Args:
+        generators (list): Names of generators from GENERATORS
+        sizes (list): Numbers of edges
+        engines (list): Names of engines from ENGINES
+        repeat (int): Number of timing runs per measurement
+        seed (int): Seed of the generators
+        log (file): If given, progress is written to it
+
+    Returns:
+        dict: Environment and one result per generator, size and engine
+    """
+    results = []
+    for generator_name in generators:
+        for size in sizes:
+            network = GENERATORS[generator_name](size, seed)
+            for engine in engines:
+                result = {'generator': generator_name, 'edges': len(network), 'engine': engine, 'seed': seed}
+                result.update(measure(network, engine, repeat))
+                results.append(result)
+                if log is not None:
+                    log.write(f"{generator_name:>15} {len(network):>8} {engine:>10} "
+                              f"{result['seconds']:>10.4f}s {result['peak_memory_bytes'] / 1e6:>9.2f}MB "
+                              f"{result['iterations']!s:>5} iterations\n")
+                    log.flush()
+
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results
+    }
+
+# For direct script execution
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the calculator on synthetic ownership graphs.')
+    parser.add_argument('--generators', nargs='+', choices=list(GENERATORS), default=list(GENERATORS),
+                        help='Graph generators to run')
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES),
+                        help='Numbers of edges, e.g. 100 1000 10000 100000 1000000')
+    parser.add_argument('--engines', nargs='+', choices=list(ENGINES), default=list(ENGINES),
+                        help='Engines to benchmark')
+    parser.add_argument('--repeat', type=int, default=3, help='Timing runs per measurement')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the generators')
+    parser.add_argument('--output', default='benchmark_results.json', help='Path to the JSON results')
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.generators, args.sizes, args.engines, args.repeat, args.seed, log=sys.stderr)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
@@ -0,0 +1,100 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from calculator.client import DaemonUnavailable, daemon_stats, run
+from .loadtest import percentile
+
+def time_runs(call, runs):
+    """
+    Args:
+        call (callable): Runs one invocation
+        runs (int): Number of invocations
+
+    Returns:
+        dict: Median, p90 and fastest latency in milliseconds
+    """
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+    return {
+        'runs': runs,
+        'p50_ms': round(percentile(latencies, 0.5) * 1000.0, 2),
+        'p90_ms': round(percentile(latencies, 0.9) * 1000.0, 2),
+        'min_ms': round(min(latencies) * 1000.0, 2)
+    }
+
+def wait_for_daemon(socket_path, process, timeout=30.0):
+    """
+    Waits until a daemon started in the background answers on its socket.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return daemon_stats(socket_path)
+        except DaemonUnavailable:
+            if process.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError(f'The daemon did not start on {socket_path}')
+            time.sleep(0.05)
+
+def run_startup_benchmark(input_file, engine='scc', runs=20):
+    """
+    Compares the latency of calculating a network file with a new process per call
+    against calls to a warm daemon.
+
+    Three ways of calling are timed: python -m calculator.calculator (cold), python -m
+    calculator.client, which still starts Python but leaves the calculation to the
+    daemon, and client.run from a running Python process, which is the round trip to
+    the daemon alone.
+
+    Args:
+        input_file (str): Network file calculated in every call
+        engine (str): Engine to use
+        runs (int): Number of calls of every kind
+
+    Returns:
+        dict: Latencies of every kind of call
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = os.path.join(directory, 'daemon.sock')
+        output_file = os.path.join(directory, 'output.json')
+        daemon = subprocess.Popen([sys.executable, '-m', 'calculator.daemon', '--socket', socket_path, '--workers', '1',
+                                   '--log-level', 'WARNING'])
+        try:
+            wait_for_daemon(socket_path, daemon)
+            cold = [sys.executable, '-m', 'calculator.calculator', input_file, output_file, '--engine', engine]
+            client = [sys.executable, '-m', 'calculator.client', input_file, output_file, '--engine', engine,
+                      '--socket', socket_path]
+            return {
+                'input_file': input_file,
+                'engine': engine,
+                'cold_process': time_runs(lambda: subprocess.run(cold, check=True, capture_output=True), runs),
+                'client_process': time_runs(lambda: subprocess.run(client, check=True, capture_output=True), runs),
+                'client_call': time_runs(lambda: run(input_file, output_file, engine, socket_path=socket_path), runs),
+                'python_startup': time_runs(lambda: subprocess.run([sys.executable, '-c', 'pass'], check=True), runs)
+            }
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+# For direct script execution
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compare cold command line runs with calls to a warm daemon.')
+    parser.add_argument('--input', default='data/ResightsApS.json', help='Network file calculated in every call')
+    parser.add_argument('--engine', default='scc', help='Engine to use')
+    parser.add_argument('--runs', type=int, default=20, help='Number of calls of every kind')
+    parser.add_argument('--output', help='Path to write the report as JSON')
+    args = parser.parse_args()
+
+    report = run_startup_benchmark(args.input, args.engine, args.runs)
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,92 @@
+import copy
+import json
+import os
+import sys
+import tempfile
+import time
+from calculator.calculator import calculate_real_shares
+from calculator.streaming import COMPRESSIONS, OUTPUT_FORMATS, open_output, write_records
+from .generators import GENERATORS
+
+def measure_writer(records, output_file, output_format, results_only=False, compression=None, repeat=3):
+    """
+    Times writing a solved network in one output format.
+
+    Args:
+        records (list): Solved edges
+        output_file (str): Path of the file to write
+        output_format (str): One of OUTPUT_FORMATS
+        results_only (bool): Only write the id and real shares
+        compression (str): One of COMPRESSIONS, uncompressed if None
+        repeat (int): Number of runs, the fastest one is reported
+
+    Returns:
+        dict: Seconds, size of the file and throughput in edges and megabytes per second
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with open_output(output_file, compression) as f:
+            write_records(f, records, output_format, results_only)
+        timings.append(time.perf_counter() - start)
+
+    seconds = min(timings)
+    size = os.path.getsize(output_file)
+    return {
+        'format': output_format,
+        'results_only': results_only,
+        'compression': compression,
+        'seconds': round(seconds, 6),
+        'bytes': size,
+        'edges_per_second': round(len(records) / seconds),
+        'megabytes_per_second': round(size / seconds / 1e6, 2)
+    }
+
+def run_writer_benchmark(generator='mixed', size=100000, compressions=(None, 'gzip'), repeat=3, seed=0, log=None):
+    """
+    Measures every output format, with all fields and results only, for every compression.
+
+    Args:
+        generator (str): Name of the generator of the network
+        size (int): Number of edges
+        compressions (list): Compressions to measure, None for uncompressed output
+        repeat (int): Number of runs per measurement
+        seed (int): Seed of the generator
+        log (file): If given, a line is written per measurement
+
+    Returns:
+        list: Measurements, see measure_writer
+    """
+    network = GENERATORS[generator](size, seed)
+    records = calculate_real_shares(copy.deepcopy(network), engine='scc')
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, 'output')
+        for compression in compressions:
+            for output_format in OUTPUT_FORMATS:
+                for results_only in (False, True):
+                    row = measure_writer(records, output_file, output_format, results_only, compression, repeat)
+                    results.append(row)
+                    if log is not None:
+                        log.write(json.dumps(row) + '\n')
+                        log.flush()
+    return results
+
+# For direct script execution
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Measure write throughput of the output formats.')
+    parser.add_argument('--generator', choices=list(GENERATORS), default='mixed', help='Generator of the network')
+    parser.add_argument('--size', type=int, default=100000, help='Number of edges')
+    parser.add_argument('--compressions', nargs='+', choices=['none', *COMPRESSIONS], default=['none', 'gzip'],
+                        help='Compressions to measure')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement, the fastest is reported')
+    parser.add_argument('--output', help='Path to write the results as JSON')
+    args = parser.parse_args()
+
+    compressions = [None if compression == 'none' else compression for compression in args.compressions]
+    results = run_writer_benchmark(args.generator, args.size, compressions, args.repeat, log=sys.stderr)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,82 @@
+from array import array
+
+class AdjacencyIndex:
+    """
+    Compressed sparse row index of the active edges of a network, by entity and direction.
+
+    Every entity has an upstream row with its active edges towards the focus company
+    (target_depth >= 0), grouped by source, and a downstream row with its active edges
+    away from it (target_depth < 0), grouped by target. All edges of a row carry the
+    same aggregated ownership of the entity, so one of them, the carrier, is read when
+    other edges need that ownership. The carrier is the edge of the row with the smallest
+    id, compared as strings, so it doesn't depend on the order of the input. Rows and edge
+    lookups are resolved once, so passes only walk flat arrays.
+    """
+
+    def __init__(self, edges, graph=None):
+        """
+        Args:
+            edges (list): List of edges
+            graph (OwnershipGraph): Graph of the edges whose node indices are reused, e.g.
+                                    the graph of a validation.NormalizedNetwork
+        """
+        size = len(edges)
+        if graph is not None:
+            sources, targets, node_count = graph.sources, graph.targets, len(graph)
+        else:
+            node_index = {}
+            sources = array('l', [node_index.setdefault(edge['source'], len(node_index)) for edge in edges])
+            targets = array('l', [node_index.setdefault(edge['target'], len(node_index)) for edge in edges])
+            node_count = len(node_index)
+
+        # Row of the entity whose ownership an edge carries, and of the entity it is derived from
+        self.rows = array('l', [-1]) * size
+        parent_rows = array('l', [-1]) * size
+        # Edges whose far end is the focus company contribute their share as it is
+        self.pinned = bytearray(size)
+        counts = array('l', [0]) * (2 * node_count + 1)
+
+        for index, edge in enumerate(edges):
+            if not edge['active']:
+                continue
+            if edge['target_depth'] >= 0:
+                row = 2 * sources[index]
+                parent_rows[index] = 2 * targets[index]
+                self.pinned[index] = edge['target_depth'] == 0
+            else:
+                row = 2 * targets[index] + 1
+                parent_rows[index] = 2 * sources[index] + 1
+                self.pinned[index] = edge['source_depth'] == 0
+            self.rows[index] = row
+            counts[row + 1] += 1
+
+        # Prefix sums give the start of every row, edges are placed in network order
+        for row in range(2 * node_count):
+            counts[row + 1] += counts[row]
+        self.offsets = counts
+        self.adjacency = array('l', [0]) * counts[-1]
+        positions = array('l', counts)
+        for index, row in enumerate(self.rows):
+            if row >= 0:
+                self.adjacency[positions[row]] = index
+                positions[row] += 1
+
+        # Edges without an id, outside of validated networks, fall back to network order
+        carrier_key = lambda index: (str(edges[index].get('id')), index)
+        self.carriers = array('l', [
+            min(self.adjacency[start:end], key=carrier_key) if start < end else -1
+            for start, end in zip(self.offsets, self.offsets[1:])
+        ])
+        # Carrier of the ownership every edge is derived from, -1 if the entity has no such edges
+        self.parents = array('l', [self.carriers[row] if row >= 0 else -1 for row in parent_rows])
+
+    def row_edges(self, index):
+        """
+        Args:
+            index (int): Edge index
+
+        Returns:
+            array: Indices of the edges carrying the same ownership as the edge, itself included
+        """
+        row = self.rows[index]
+        return self.adjacency[self.offsets[row]:self.offsets[row + 1]]
@@ -0,0 +1,272 @@
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from .calculator import calculate_real_shares
+from .cache import ResultCache
+from .paths import PathIndex
+from .streaming import open_output, write_records
+from .validation import ValidationReport
+
+logger = logging.getLogger(__name__)
+
+# Extensions of the results of a batch per output format and compression
+OUTPUT_EXTENSIONS = {'pretty': '.json', 'json': '.json', 'ndjson': '.ndjson', 'csv': '.csv'}
+COMPRESSION_EXTENSIONS = {'gzip': '.gz', 'bz2': '.bz2', 'xz': '.xz', 'zstd': '.zst'}
+
+def collect_inputs(source):
+    """
+    Lists the network files of a batch.
+
+    Args:
+        source (str): Directory of .json network files, or a manifest file with one network
+                      file path per line. Relative manifest paths are relative to the manifest,
+                      empty lines and lines starting with # are skipped.
+
+    Returns:
+        list: Paths of the network files
+    """
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(source, name) for name in os.listdir(source)
+            if name.endswith('.json')
+        )
+
+    base_directory = os.path.dirname(source)
+    with open(source, 'r') as f:
+        lines = [line.strip() for line in f]
+    return [
+        os.path.join(base_directory, line) for line in lines
+        if line and not line.startswith('#')
+    ]
+
+def output_names(inputs):
+    """
+    Names the results of a batch by the paths of the network files relative to their
+    common directory, so files of the same name in different directories of a manifest
+    don't overwrite each other's results.
+
+    Args:
+        inputs (list): Paths of the network files
+
+    Returns:
+        list: Path of every result relative to the output directory
+
+    Raises:
+        ValueError: If a network file is listed more than once
+    """
+    paths = [os.path.abspath(input_file) for input_file in inputs]
+    seen = set()
+    for input_file, path in zip(inputs, paths):
+        if path in seen:
+            raise ValueError(f"Network file '{input_file}' is listed more than once")
+        seen.add(path)
+
+    if not paths:
+        return []
+    base_directory = os.path.commonpath([os.path.dirname(path) for path in paths])
+    return [os.path.relpath(path, base_directory) for path in paths]
+
+def output_path(name, output_directory, output_format='pretty', compression=None):
+    """
+    Returns the path the result of a network file is written to.
+
+    Args:
+        name (str): Name of the result, see output_names
+        output_directory (str): Directory for the results
+        output_format (str): One of streaming.OUTPUT_FORMATS
+        compression (str): One of streaming.COMPRESSIONS, uncompressed if None
+
+    Returns:
+        str: Path with the extension of the format and compression
+    """
+    extension = OUTPUT_EXTENSIONS[output_format] + COMPRESSION_EXTENSIONS.get(compression, '')
+    return os.path.join(output_directory, os.path.splitext(name)[0] + extension)
+
+def paths_path(output_file):
+    """
+    Returns the path the top contributing paths of a result are written to.
+
+    Args:
+        output_file (str): Path to output file
+
+    Returns:
+        str: Path to paths JSON file next to the output file
+    """
+    for extension in COMPRESSION_EXTENSIONS.values():
+        if output_file.endswith(extension):
+            output_file = output_file[:-len(extension)]
+    return os.path.splitext(output_file)[0] + '.paths.json'
+
+def process_file(input_file, output_file, engine='iterative', cache_directory=None, top_k=None,
+                 output_format='pretty', results_only=False, compression=None):
+    """
+    Calculates the real shares of one network file. Errors are reported, not raised.
+
+    Args:
+        input_file (str): Path to input JSON file
+        output_file (str): Path to output file
+        engine (str): Name of the engine to use
+        cache_directory (str): Directory of the result cache, no cache is used if None
+        top_k (int): If given, the top contributing paths of every edge are written next to the output
+        output_format (str): One of streaming.OUTPUT_FORMATS
+        results_only (bool): Only write the id and real shares of every edge
+        compression (str): Compress the output with one of streaming.COMPRESSIONS
+
+    Returns:
+        dict: Summary of the file with status, timing, number of edges and iterations
+    """
+    start = time.perf_counter()
+    summary = {'input': input_file, 'output': output_file}
+
+    try:
+        with open(input_file, 'r') as f:
+            network = json.load(f)
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
+        stats = {}
+        cache = ResultCache(cache_directory) if cache_directory else None
+        explain = PathIndex(top_k) if top_k else None
+        report = ValidationReport()
+        result = calculate_real_shares(network, engine, stats, cache, explain=explain, report=report)
+
+        with open_output(output_file, compression) as f:
+            write_records(f, result, output_format, results_only)
+        if explain is not None:
+            with open(paths_path(output_file), 'w') as f:
+                explain.write(f)
+
+        summary.update(status='ok', edges=len(network), invalid_edges=len(report.errors),
+                       duplicate_edges=report.duplicates, **stats)
+        if report.issues:
+            summary['issues'] = report.to_dict()['counts']
+    except Exception as e:
+        summary.update(status='error', error=f'{type(e).__name__}: {e}')
+
+    summary['seconds'] = round(time.perf_counter() - start, 6)
+    return summary
+
+def run_batch(inputs, output_directory, engine='iterative', workers=None, cache_directory=None, top_k=None,
+              output_format='pretty', results_only=False, compression=None):
+    """
+    Calculates the real shares of many network files in a process pool.
+
+    Every network file is written to the output directory under its path relative to the
+    directory all network files are in, see output_names, with the extension of the output
+    format. A file that fails, or whose worker process dies, is recorded in the summary and
+    does not stop the rest of the batch.
+
+    Args:
+        inputs (list): Paths of the network files
+        output_directory (str): Directory for the results and summary.json
+        engine (str): Name of the engine to use
+        workers (int): Number of worker processes, defaults to the number of CPUs
+        cache_directory (str): Directory of a result cache shared by the workers, no cache is used if None
+        top_k (int): If given, the top contributing paths of every edge are written next to every result
+        output_format (str): One of streaming.OUTPUT_FORMATS
+        results_only (bool): Only write the id and real shares of every edge
+        compression (str): Compress the results with one of streaming.COMPRESSIONS
+
+    Returns:
+        dict: Summary of the batch with one entry per file in input order
+
+    Raises:
+        ValueError: If a network file is listed more than once, or two results get the same path
+    """
+    output_files = [output_path(name, output_directory, output_format, compression) for name in output_names(inputs)]
+    if len(set(output_files)) < len(output_files):
+        raise ValueError('Network files with the same name and different extensions would overwrite their results')
+    os.makedirs(output_directory, exist_ok=True)
+    start = time.perf_counter()
+
+    results = {}
+    pending = list(range(len(inputs)))
+    isolate = workers == 1
+    while pending:
+        # A worker that dies, e.g. because it ran out of memory, breaks the whole pool and
+        # every unfinished file fails with it. Those files are run again one at a time in a
+        # new pool until the file that killed its worker is found, which is the first one
+        # failing, and the rest goes back to a pool of all workers.
+        with ProcessPoolExecutor(max_workers=1 if isolate else workers) as executor:
+            futures = [
+                executor.submit(process_file, inputs[index], output_files[index], engine, cache_directory, top_k,
+                                output_format, results_only, compression)
+                for index in pending
+            ]
+
+            unfinished = []
+            for index, future in zip(pending, futures):
+                try:
+                    results[index] = future.result()
+                except BrokenProcessPool as e:
+                    unfinished.append((index, e))
+
+        if unfinished and isolate:
+            index, error = unfinished.pop(0)
+            results[index] = {
+                'input': inputs[index],
+                'output': output_files[index],
+                'status': 'error',
+                'error': f'{type(error).__name__}: {error}'
+            }
+            logger.warning("Worker died calculating %s", inputs[index])
+        isolate = workers == 1 or (bool(unfinished) and not isolate)
+        pending = [index for index, _ in unfinished]
+
+    files = [results[index] for index in range(len(inputs))]
+
+    summary = {
+        'engine': engine,
+        'files': files,
+        'succeeded': sum(1 for entry in files if entry['status'] == 'ok'),
+        'failed': sum(1 for entry in files if entry['status'] != 'ok'),
+        'cache_hits': sum(1 for entry in files if entry.get('cache') == 'hit'),
+        'cache_misses': sum(1 for entry in files if entry.get('cache') == 'miss'),
+        'invalid_edges': sum(entry.get('invalid_edges', 0) for entry in files),
+        'seconds': round(time.perf_counter() - start, 6)
+    }
+
+    with open(os.path.join(output_directory, 'summary.json'), 'w') as f:
+        json.dump(summary, f, indent=2)
+
+    return summary
+
+# For direct script execution
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from .calculator import ENGINES
+    from .cache import DEFAULT_CACHE_DIR
+    from .streaming import OUTPUT_FORMATS, COMPRESSIONS
+
+    parser = argparse.ArgumentParser(description='Calculate real ownership shares of many network files.')
+    parser.add_argument('source', help='Directory of JSON network files or manifest file with one path per line')
+    parser.add_argument('output_directory', help='Directory for the results and summary.json')
+    parser.add_argument('--engine', choices=list(ENGINES), default='iterative', help='Engine used to solve the networks')
+    parser.add_argument('--workers', type=int, help='Number of worker processes, defaults to the number of CPUs')
+    parser.add_argument('--cache', action='store_true', help='Reuse results of unchanged networks from the cache')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='Directory of the result cache')
+    parser.add_argument('--explain', action='store_true',
+                        help='Write the top contributing paths of every edge next to every result')
+    parser.add_argument('--top-k', type=int, default=5, help='Number of paths per edge with --explain')
+    parser.add_argument('--format', dest='output_format', choices=OUTPUT_FORMATS, default='pretty',
+                        help='Output format of the results')
+    parser.add_argument('--results-only', action='store_true',
+                        help='Only write the id and real shares of every edge')
+    parser.add_argument('--compress', dest='compression', choices=list(COMPRESSIONS),
+                        help='Compress the results')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    try:
+        summary = run_batch(collect_inputs(args.source), args.output_directory, args.engine, args.workers,
+                            args.cache_dir if args.cache else None, args.top_k if args.explain else None,
+                            args.output_format, args.results_only, args.compression)
+    except ValueError as e:
+        parser.error(str(e))
+    logger.info("Processed %d files: %d succeeded, %d failed in %.2fs, cache: %d hits, %d misses.",
+                len(summary['files']), summary['succeeded'], summary['failed'], summary['seconds'],
+                summary['cache_hits'], summary['cache_misses'])
+    sys.exit(1 if summary['failed'] else 0)
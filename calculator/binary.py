@@ -0,0 +1,401 @@
+import json
+import math
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Sequence
+from .graph import OwnershipGraph
+from .helpers import parse_share_string_cached
+
+MAGIC = b'OWNB'
+FORMAT_VERSION = 1
+EXTENSION = '.ownb'
+
+# Header: magic, version, number of edges, number of strings
+HEADER = struct.Struct('<4sIQQ')
+# Offset and length in bytes of every section, in COLUMNS order
+SECTION = struct.Struct('<QQ')
+
+# Column name and array typecode. String columns hold indices into the string table,
+# -1 for None. Real shares hold NaN for None.
+COLUMNS = (
+    ('id', 'i'),
+    ('source', 'q'),
+    ('source_name', 'i'),
+    ('source_depth', 'i'),
+    ('target', 'q'),
+    ('target_name', 'i'),
+    ('target_depth', 'i'),
+    ('share', 'i'),
+    ('share_lower', 'd'),
+    ('share_average', 'd'),
+    ('share_upper', 'd'),
+    ('real_lower_share', 'd'),
+    ('real_average_share', 'd'),
+    ('real_upper_share', 'd'),
+    ('active', 'B'),
+    ('string_offsets', 'q'),
+    ('strings', 'B'),
+)
+
+EDGE_FIELDS = ('id', 'source', 'source_name', 'source_depth', 'target', 'target_name', 'target_depth', 'share',
+               'real_lower_share', 'real_average_share', 'real_upper_share', 'active')
+
+ALIGNMENT = 8
+
+def is_binary_file(path):
+    """
+    Args:
+        path (str): Path to a network file
+
+    Returns:
+        bool: Whether the file is in the binary network format
+    """
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+def write_binary(network, output_file):
+    """
+    Writes a network in the columnar binary format.
+
+    Entity ids and depths go to integer columns, parsed share bounds and real shares to
+    float columns, edge ids, names and share strings to an interned string table and
+    active flags to a bitmap.
+
+    Args:
+        network (iterable): Edges with the fields of the JSON schema. Missing names and
+                            real shares are stored as None.
+        output_file (str): Path to output binary file
+    """
+    strings = []
+    string_index = {}
+
+    def intern(value, field):
+        if value is None:
+            return -1
+        if not isinstance(value, str):
+            raise ValueError(f"Field '{field}' must be a string or null to be stored in the binary format")
+        index = string_index.get(value)
+        if index is None:
+            index = len(strings)
+            string_index[value] = index
+            strings.append(value)
+        return index
+
+    def real_share(value):
+        return math.nan if value is None else float(value)
+
+    columns = {name: array(typecode) for name, typecode in COLUMNS}
+    bitmap = bytearray()
+    count = 0
+    for edge in network:
+        unknown = set(edge) - set(EDGE_FIELDS)
+        if unknown:
+            raise ValueError(f"Fields {sorted(unknown)} are not supported by the binary format")
+        for field in ('source', 'target'):
+            if not isinstance(edge[field], int) or isinstance(edge[field], bool):
+                raise ValueError(f"Field '{field}' must be an integer entity id to be stored in the binary format")
+
+        lower, average, upper = parse_share_string_cached(edge['share'])
+        columns['id'].append(intern(edge['id'], 'id'))
+        columns['source'].append(edge['source'])
+        columns['source_name'].append(intern(edge.get('source_name'), 'source_name'))
+        columns['source_depth'].append(edge['source_depth'])
+        columns['target'].append(edge['target'])
+        columns['target_name'].append(intern(edge.get('target_name'), 'target_name'))
+        columns['target_depth'].append(edge['target_depth'])
+        columns['share'].append(intern(edge['share'], 'share'))
+        columns['share_lower'].append(lower)
+        columns['share_average'].append(average)
+        columns['share_upper'].append(upper)
+        columns['real_lower_share'].append(real_share(edge.get('real_lower_share')))
+        columns['real_average_share'].append(real_share(edge.get('real_average_share')))
+        columns['real_upper_share'].append(real_share(edge.get('real_upper_share')))
+        if count & 7 == 0:
+            bitmap.append(0)
+        if edge['active']:
+            bitmap[count >> 3] |= 1 << (count & 7)
+        count += 1
+
+    columns['active'] = array('B', bitmap)
+
+    blob = bytearray()
+    for value in strings:
+        columns['string_offsets'].append(len(blob))
+        blob += value.encode('utf-8')
+    columns['string_offsets'].append(len(blob))
+    columns['strings'] = array('B', blob)
+
+    sections = []
+    position = HEADER.size + SECTION.size * len(COLUMNS)
+    for name, _ in COLUMNS:
+        position += -position % ALIGNMENT
+        column = columns[name]
+        if sys.byteorder != 'little':
+            column = array(column.typecode, column)
+            column.byteswap()
+        data = column.tobytes()
+        sections.append((position, data))
+        position += len(data)
+
+    with open(output_file, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, count, len(strings)))
+        for offset, data in sections:
+            f.write(SECTION.pack(offset, len(data)))
+        for offset, data in sections:
+            f.write(b'\0' * (offset - f.tell()))
+            f.write(data)
+
+class BinaryNetwork(Sequence):
+    """
+    Network in the columnar binary format, memory-mapped from its file.
+
+    Columns are read straight from the mapped file without parsing. The network is a
+    sequence of edge dicts, so calculate_real_shares runs on it directly: edge dicts are
+    only built when an edge is first accessed and are kept, so results written to them
+    stay. The graph engines build their OwnershipGraph from the columns without touching
+    the edge dicts, see ownership_graph().
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Path to a binary network file
+        """
+        self.path = path
+        self.columns = {}
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can't be mapped
+            self._file.close()
+            raise ValueError(f"'{path}' is not a binary network file")
+
+        if len(self._map) < HEADER.size or self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"'{path}' is not a binary network file")
+        _, version, self.edge_count, self.string_count = HEADER.unpack_from(self._map, 0)
+        if version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported binary network format version {version}")
+
+        view = memoryview(self._map)
+        for position, (name, typecode) in enumerate(COLUMNS):
+            offset, length = SECTION.unpack_from(self._map, HEADER.size + SECTION.size * position)
+            section = view[offset:offset + length]
+            if sys.byteorder != 'little' and typecode != 'B':
+                column = array(typecode, section.tobytes())
+                column.byteswap()
+                self.columns[name] = memoryview(column)
+            else:
+                self.columns[name] = section.cast(typecode)
+        self._edges = [None] * self.edge_count
+        self._strings = {}
+
+    def __len__(self):
+        return self.edge_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(self.edge_count))]
+        if index < 0:
+            index += self.edge_count
+        if not 0 <= index < self.edge_count:
+            raise IndexError('edge index out of range')
+
+        edge = self._edges[index]
+        if edge is None:
+            edge = self._edges[index] = self.record(index)
+        return edge
+
+    def __iter__(self):
+        self._build_edges()
+        return iter(self._edges)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Releases the columns and unmaps the file. Edge dicts already built stay usable.
+        """
+        for column in self.columns.values():
+            column.release()
+        self.columns = {}
+        self._map.close()
+        self._file.close()
+
+    def string(self, index):
+        """
+        Args:
+            index (int): Index into the string table, -1 for None
+
+        Returns:
+            str: The string, decoded once and then shared
+        """
+        if index < 0:
+            return None
+        value = self._strings.get(index)
+        if value is None:
+            offsets = self.columns['string_offsets']
+            value = bytes(self.columns['strings'][offsets[index]:offsets[index + 1]]).decode('utf-8')
+            self._strings[index] = value
+        return value
+
+    def is_active(self, index):
+        """
+        Args:
+            index (int): Edge index
+
+        Returns:
+            bool: Whether the edge is active
+        """
+        return bool(self.columns['active'][index >> 3] & (1 << (index & 7)))
+
+    def record(self, index):
+        """
+        Builds a new edge dict in the JSON schema.
+
+        Args:
+            index (int): Edge index
+
+        Returns:
+            dict: Edge
+        """
+        columns = self.columns
+
+        def real_share(name):
+            value = columns[name][index]
+            return None if math.isnan(value) else value
+
+        return {
+            'id': self.string(columns['id'][index]),
+            'source': columns['source'][index],
+            'source_name': self.string(columns['source_name'][index]),
+            'source_depth': columns['source_depth'][index],
+            'target': columns['target'][index],
+            'target_name': self.string(columns['target_name'][index]),
+            'target_depth': columns['target_depth'][index],
+            'share': self.string(columns['share'][index]),
+            'real_lower_share': real_share('real_lower_share'),
+            'real_average_share': real_share('real_average_share'),
+            'real_upper_share': real_share('real_upper_share'),
+            'active': self.is_active(index)
+        }
+
+    def _build_edges(self):
+        """
+        Builds all edge dicts not built yet, reading every column once.
+        """
+        if None not in self._edges:
+            return
+        columns = {name: self.columns[name].tolist() for name in EDGE_FIELDS if name != 'active'}
+        # String index -1 picks the None at the end
+        strings = [self.string(index) for index in range(self.string_count)] + [None]
+        active = self.active_flags()
+
+        def real_share(name, index):
+            value = columns[name][index]
+            return None if math.isnan(value) else value
+
+        for index, edge in enumerate(self._edges):
+            if edge is not None:
+                continue
+            self._edges[index] = {
+                'id': strings[columns['id'][index]],
+                'source': columns['source'][index],
+                'source_name': strings[columns['source_name'][index]],
+                'source_depth': columns['source_depth'][index],
+                'target': columns['target'][index],
+                'target_name': strings[columns['target_name'][index]],
+                'target_depth': columns['target_depth'][index],
+                'share': strings[columns['share'][index]],
+                'real_lower_share': real_share('real_lower_share', index),
+                'real_average_share': real_share('real_average_share', index),
+                'real_upper_share': real_share('real_upper_share', index),
+                'active': active[index]
+            }
+
+    def active_flags(self):
+        """
+        Returns:
+            list: Whether each edge is active, unpacked from the bitmap
+        """
+        bitmap = self.columns['active']
+        return [bool(bitmap[index >> 3] & (1 << (index & 7))) for index in range(self.edge_count)]
+
+    def ownership_graph(self):
+        """
+        Builds an ownership graph from the columns, using the stored share bounds.
+
+        Returns:
+            OwnershipGraph: Graph whose edges are this network
+        """
+        columns = self.columns
+        graph = OwnershipGraph()
+        edges = zip(columns['source'].tolist(), columns['target'].tolist(), columns['source_depth'].tolist(),
+                    columns['target_depth'].tolist(),
+                    zip(columns['share_lower'].tolist(), columns['share_average'].tolist(),
+                        columns['share_upper'].tolist()),
+                    self.active_flags())
+        for source, target, source_depth, target_depth, share, active in edges:
+            graph.add_edge(source, target, source_depth, target_depth, share, active)
+        graph.edges = self
+        return graph
+
+    def to_network(self):
+        """
+        Returns:
+            list: Edge dicts in the JSON schema
+        """
+        self._build_edges()
+        return list(self._edges)
+
+def load_binary(path):
+    """
+    Memory-maps a network in the binary format.
+
+    Args:
+        path (str): Path to a binary network file
+
+    Returns:
+        BinaryNetwork: The network
+    """
+    return BinaryNetwork(path)
+
+def convert(input_file, output_file):
+    """
+    Converts a network between JSON and the binary format, depending on the input.
+
+    JSON and NDJSON input is written as binary, binary input as pretty-printed JSON in
+    the schema of the input files.
+
+    Args:
+        input_file (str): Path to input file
+        output_file (str): Path to output file
+    """
+    if is_binary_file(input_file):
+        with load_binary(input_file) as network, open(output_file, 'w') as f:
+            json.dump(network.to_network(), f, indent=2)
+        return
+
+    # Imported here, streaming itself reads binary files through this module
+    from .streaming import iter_records
+    with open(input_file, 'r') as f:
+        write_binary(list(iter_records(f)), output_file)
+
+# For direct script execution
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Convert a network between JSON and the binary format.')
+    parser.add_argument('input_file', help='Path to JSON, NDJSON or binary network file')
+    parser.add_argument('output_file', help=f'Path to output file, binary ({EXTENSION}) for JSON input and JSON for binary input')
+    args = parser.parse_args()
+
+    convert(args.input_file, args.output_file)
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import tempfile
+
+# Bump when engines change their results, so old entries are not reused
+CACHE_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'ownership-calculator')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+CACHE_FIELDS = ('id', 'source', 'target', 'share', 'source_depth', 'target_depth', 'active')
+
+def network_key(network, engine, options=None):
+    """
+    Hashes the canonicalized active edges of a network together with the engine.
+
+    Inactive edges and fields like names don't change any result, so they are left out.
+
+    Args:
+        network (list): List of edges
+        engine (str): Name of the engine
+        options (dict): Further settings that change the result
+
+    Returns:
+        str: Hex digest identifying the result
+    """
+    digest = hashlib.sha256()
+    header = {'version': CACHE_VERSION, 'engine': engine, 'options': options or {}}
+    digest.update(json.dumps(header, sort_keys=True).encode('utf-8'))
+    for edge in network:
+        if not edge['active']:
+            continue
+        digest.update(b'\n')
+        digest.update(json.dumps([edge[field] for field in CACHE_FIELDS], separators=(',', ':')).encode('utf-8'))
+    return digest.hexdigest()
+
+def extract_results(network):
+    """
+    Args:
+        network (list): Solved list of edges
+
+    Returns:
+        list: (lower, average, upper) real shares of every active edge, in edge order
+    """
+    return [
+        [edge['real_lower_share'], edge['real_average_share'], edge['real_upper_share']]
+        for edge in network if edge['active']
+    ]
+
+def apply_results(network, results):
+    """
+    Writes cached real shares back to the active edges of a network.
+
+    Args:
+        network (list): List of edges with the same active edges the results were taken from
+        results (list): Results from extract_results
+
+    Returns:
+        list: The network with real_lower_share, real_average_share, and real_upper_share values
+    """
+    active_edges = (edge for edge in network if edge['active'])
+    for edge, (lower, average, upper) in zip(active_edges, results):
+        edge['real_lower_share'] = lower
+        edge['real_average_share'] = average
+        edge['real_upper_share'] = upper
+    return network
+
+class ResultCache:
+    """
+    Content-addressed cache of solved networks in a local directory.
+
+    Every entry is one file named after its network_key. Reading an entry marks it as
+    recently used, and the least recently used entries are evicted once the directory
+    grows past max_bytes. Entries are written atomically, so several processes can share
+    one cache directory.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, bypass=False):
+        """
+        Args:
+            directory (str): Cache directory, created if missing
+            max_bytes (int): Maximum total size of the entries
+            bypass (bool): Never read entries, but still store fresh results
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        """
+        Args:
+            key (str): Key from network_key
+
+        Returns:
+            str: Path of the entry file
+        """
+        return os.path.join(self.directory, key + '.json')
+
+    def get(self, key):
+        """
+        Args:
+            key (str): Key from network_key
+
+        Returns:
+            dict: Stored entry, or None on a miss
+        """
+        if self.bypass:
+            self.misses += 1
+            return None
+
+        try:
+            with open(self.path(key), 'r') as f:
+                entry = json.load(f)
+            os.utime(self.path(key))
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        """
+        Stores an entry and evicts old entries if the cache is too large.
+
+        Args:
+            key (str): Key from network_key
+            entry (dict): JSON serializable entry
+        """
+        descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(descriptor, 'w') as f:
+            json.dump(entry, f, separators=(',', ':'))
+        os.replace(temporary_path, self.path(key))
+        self.evict()
+
+    def entries(self):
+        """
+        Returns:
+            list: (modification time, size, path) of every entry
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue
+            entries.append((status.st_mtime, status.st_size, path))
+        return entries
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache fits in max_bytes.
+        """
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        """
+        Removes every entry.
+        """
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self):
+        """
+        Returns:
+            dict: Number of cache hits and misses
+        """
+        return {'hits': self.hits, 'misses': self.misses}
@@ -1,67 +1,184 @@
 import json
-import copy
-from .helpers import parse_share_string, multiply_shares, add_shares, get_share_tuple_from_edge, update_edge_shares
+import logging
+import time
+from .helpers import parse_edge_shares, multiply_shares, add_shares, record_run_stats
+from .state import EdgeState
+from .adjacency import AdjacencyIndex
+from .sparse import solve_sparse
+from .scc import solve_scc
+from .streaming import stream_network, open_output, write_records, GRAPH_SOLVERS, OUTPUT_FORMATS, COMPRESSIONS
+from .cache import ResultCache, network_key, extract_results, apply_results, DEFAULT_CACHE_DIR
+from .graph import ACCELERATIONS
+from .paths import PathIndex
+from .binary import is_binary_file, load_binary
+from .profiling import RunProfile, log_convergence
+from .validation import ValidationReport, WorkingSet, normalize_network
 
-def calculate_real_shares(network):
+logger = logging.getLogger(__name__)
+
+def calculate_real_shares(network, engine='iterative', stats=None, cache=None, observer=None,
+                          max_iterations=None, tolerance=None, acceleration=None, explain=None, report=None,
+                          workers=None, min_contribution=None):
     """
     Calculates the real ownership shares for entities in the network.
+
+    The network is validated and normalized first, see validation.normalize_network, so
+    the engines only see valid, active, unique edges.
     
     Args:
         network (list): List of edges representing ownership relationships
+        engine (str): Name of the engine to use, one of ENGINES
+        stats (dict): If given, filled with the number of iterations and whether the run converged
+        cache (ResultCache): If given, results are looked up in and stored to this cache
+        observer (RunObserver): If given, notified of every iteration and of the end of the run
+        max_iterations (int): Maximum number of passes, the engine's default if None
+        tolerance (float): Largest change of any bound in percentage points at convergence,
+                           the engine's default if None
+        acceleration (str): Acceleration of cyclic parts, one of ACCELERATIONS, for engines in
+                            ACCELERATED_ENGINES
+        explain (PathIndex): If given, filled with the top contributing paths of every edge
+        report (ValidationReport): If given, filled with the invalid and repeated edges
+        workers (int): Solve cyclic parts with Jacobi updates, large ones split across this many
+                       worker processes, for engines in PARALLEL_ENGINES. Results don't depend
+                       on the number of workers.
+        min_contribution (float): Stop passing on values whose upper bound is below this many
+                                  percentage points, for engines in PRUNED_ENGINES. stats then get
+                                  'error_bound': no real share is more than that many percentage
+                                  points below its value without pruning.
         
     Returns:
         list: Updated network with real_lower_share, real_average_share, and real_upper_share values
     """
-    # Create edge maps and sort edges
-    outgoing_edges, incoming_edges = create_edge_maps(network)
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of: {', '.join(ENGINES)}")
+    if acceleration is not None and engine not in ACCELERATED_ENGINES:
+        raise ValueError(f"Engine '{engine}' has no acceleration, expected one of: {', '.join(ACCELERATED_ENGINES)}")
+    if workers is not None and engine not in PARALLEL_ENGINES:
+        raise ValueError(f"Engine '{engine}' has no parallel mode, expected one of: {', '.join(PARALLEL_ENGINES)}")
+    if min_contribution is not None and engine not in PRUNED_ENGINES:
+        raise ValueError(f"Engine '{engine}' has no pruning, expected one of: {', '.join(PRUNED_ENGINES)}")
+    if max_iterations is not None and max_iterations < 1:
+        raise ValueError('max_iterations must be at least 1')
+
+    options = {'max_iterations': max_iterations, 'tolerance': tolerance}
+    if acceleration is not None:
+        options['acceleration'] = acceleration
+    if workers is not None:
+        options['workers'] = workers
+    if min_contribution is not None:
+        options['min_contribution'] = min_contribution
+    options = {name: value for name, value in options.items() if value is not None}
+
+    start = time.perf_counter()
+    edges = normalize_network(network, report)
+    run_stats = {}
+    entry = None
+    if cache is not None:
+        # Keyed by the working set, so invalid or repeated edges don't cause recomputation
+        key = network_key(edges, engine, dict(options, workers='any') if workers is not None else options)
+        entry = cache.get(key)
+
+    if entry is not None:
+        run_stats.update(entry['stats'], cache='hit')
+        apply_results(edges, entry['results'])
+    else:
+        if engine == 'iterative':
+            # Only the iterative engine reports single iterations
+            iterate_real_shares(edges, run_stats, observer, **options)
+        else:
+            ENGINES[engine](edges, run_stats, **options)
+        if cache is not None:
+            cache.put(key, {'stats': dict(run_stats), 'results': extract_results(edges)})
+            run_stats['cache'] = 'miss'
+
+    edges.copy_duplicate_results()
+    if explain is not None:
+        explain.build(edges)
+
+    log_convergence(engine, run_stats)
+    if observer is not None:
+        observer.on_finish(engine, run_stats, time.perf_counter() - start)
+    if stats is not None:
+        stats.update(run_stats)
+    return network
+
+def iterate_real_shares(network, stats=None, observer=None, max_iterations=None, tolerance=None):
+    """
+    Calculates the real ownership shares by iterative relaxation over the edges.
+    
+    Args:
+        network (list): List of edges representing ownership relationships
+        stats (dict): If given, filled with the number of iterations and whether the run converged
+        observer (RunObserver): If given, notified of the changes and timings of every iteration
+        max_iterations (int): Maximum number of passes over the edges, 10 if None
+        tolerance (float): Largest change of any bound in percentage points at convergence, 0.001 if None
+        
+    Returns:
+        list: Updated network with real_lower_share, real_average_share, and real_upper_share values
+    """
+    # Index the edges, sort them and parse every share string once
+    adjacency = AdjacencyIndex(network, network.graph if isinstance(network, WorkingSet) else None)
     sorted_edges = sort_edges_by_depth(network)
+    edge_shares = network.shares if isinstance(network, WorkingSet) else parse_edge_shares(network)
+
+    # Upstream edges come first in the sorted order
+    upstream_count = sum(1 for index in sorted_edges if network[index]['target_depth'] >= 0)
+    upstream_edges = [index for index in sorted_edges[:upstream_count] if network[index]['active']]
+    downstream_edges = [index for index in sorted_edges[upstream_count:] if network[index]['active']]
     
-    # Initialize shares
-    initialize_shares(network)
+    # Initialize shares and move them into the compact state store
+    initialize_shares(network, edge_shares)
+    state = EdgeState(network)
 
     # Iteratively calculate real shares until convergence
-    max_iterations = 10
-    epsilon = 0.001
+    max_iterations = 10 if max_iterations is None else max_iterations
+    epsilon = 0.001 if tolerance is None else tolerance
+    iterations = 0
+    converged = False
 
     for iteration in range(max_iterations):
         max_change = 0.0
-        previous_values_dict = {item['id']: item for item in copy.deepcopy(network)}
+        state.begin_pass()
 
-        for edge in sorted_edges:
-            if not edge['active']:
-                continue
-            
-            source_id = edge['source']
-            target_id = edge['target']
-            target_depth = edge['target_depth']
-            edge_share = parse_share_string(edge['share'])
-
-            if target_depth >= 0:
-                max_change = process_upstream_edge(edge, source_id, target_id, edge_share, 
-                                                outgoing_edges, previous_values_dict, max_change)
-            else:
-                max_change = process_downstream_edge(edge, source_id, target_id, edge_share, 
-                                                  incoming_edges, previous_values_dict, max_change)
+        start = time.perf_counter()
+        max_change = process_edges(upstream_edges, edge_shares, adjacency, state, max_change)
+        upstream_end = time.perf_counter()
+        max_change = process_edges(downstream_edges, edge_shares, adjacency, state, max_change)
+        downstream_end = time.perf_counter()
+
+        iterations = iteration + 1
+        if observer is not None:
+            observer.on_iteration(iterations, max_change, state.updated_count(),
+                                  upstream_end - start, downstream_end - upstream_end)
+        logger.debug("Iteration %d: max change %.6f", iterations, max_change)
 
         if max_change < epsilon:
-            print(f"Converged after {iteration + 1} iterations.")
+            converged = True
             break
 
+    record_run_stats(stats, iterations, converged)
+
+    # Edge dicts are only written once, after convergence
+    state.write_back(network)
+
     return network
 
-def initialize_shares(edges):
+def initialize_shares(edges, edge_shares=None):
     """
     Initialize real shares for all edges.
     
     Args:
         edges (list): List of edges
+        edge_shares (list): Parsed share tuple for every edge, parsed from the edges if not given
     """
-    for edge in edges:
+    if edge_shares is None:
+        edge_shares = parse_edge_shares(edges)
+
+    for edge, edge_share in zip(edges, edge_shares):
         if not edge['active']:
                 continue
         if edge['source_depth'] == 0 or edge['target_depth'] == 0:
             # Focus company edges get their direct share values
-            edge_share = parse_share_string(edge['share'])
             lower, avg, upper = edge_share
             edge['real_lower_share'] = round(lower * 100.0, 2)
             edge['real_average_share'] = round(avg * 100.0, 2)
@@ -72,37 +189,6 @@ def initialize_shares(edges):
             edge['real_average_share'] = 0.0
             edge['real_upper_share'] = 0.0
 
-def create_edge_maps(edges):
-    """
-    Creates maps of entity ID to outgoing and incoming edges for faster lookup.
-    
-    Args:
-        edges (list): List of edges
-        
-    Returns:
-        tuple: (outgoing_edges, incoming_edges) dictionaries
-    """
-    outgoing_edges = {}
-    incoming_edges = {}
-    
-    for edge in edges:
-        source_id = edge['source']
-        target_id = edge['target']
-        
-        # For owners (target_depth >= 0)
-        if edge['target_depth'] >= 0:
-            if source_id not in outgoing_edges:
-                outgoing_edges[source_id] = []
-            outgoing_edges[source_id].append(edge)
-            
-        # For owned entities (target_depth < 0)
-        if edge['target_depth'] < 0:
-            if target_id not in incoming_edges:
-                incoming_edges[target_id] = []
-            incoming_edges[target_id].append(edge)
-    
-    return outgoing_edges, incoming_edges
-
 def sort_edges_by_depth(edges):
     """
     Sorts edges by depth to process them in the correct order.
@@ -111,172 +197,283 @@ def sort_edges_by_depth(edges):
         edges (list): List of edges
         
     Returns:
-        list: Sorted edges
+        list: Sorted edge indices
     """
     # Split into two groups for different sorting strategies
-    upstream_edges = [e for e in edges if e['source_depth'] > 0 and e['target_depth'] >= 0]
-    downstream_edges = [e for e in edges if e['target_depth'] < 0]
+    upstream_edges = [i for i, e in enumerate(edges) if e['source_depth'] > 0 and e['target_depth'] >= 0]
+    downstream_edges = [i for i, e in enumerate(edges) if e['target_depth'] < 0]
 
     # Sort upstream edges by ascending target_depth
-    sorted_upstream = sorted(upstream_edges, key=lambda e: e['target_depth'])
+    sorted_upstream = sorted(upstream_edges, key=lambda i: edges[i]['target_depth'])
     
     # Sort downstream edges by descending target_depth
-    sorted_downstream = sorted(downstream_edges, key=lambda e: -e['target_depth'])
+    sorted_downstream = sorted(downstream_edges, key=lambda i: -edges[i]['target_depth'])
     
     # Combine while maintaining order
     return sorted_upstream + sorted_downstream
 
-def calculate_change(edge, previous_values_dict):
+def calculate_change(index, state):
     """
     Calculates the change in share value from previous iteration.
     
     Args:
-        edge (dict): Current edge
-        previous_values_dict (dict): Dictionary of previous edge values
+        index (int): Index of the current edge
+        state (EdgeState): Edge state store
         
     Returns:
-        float: Absolute change in lower share value
+        float: Largest absolute change of the lower, average and upper share values
     """
-    previous_edge_data = previous_values_dict.get(edge['id'], {})
-    previous_share = float(previous_edge_data.get('real_lower_share', 0.0) or 0.0)
-    current_share = edge['real_lower_share']
-    return abs(current_share - previous_share)
+    previous_values = state.previous(index)
+    if previous_values is None:
+        previous_values = (0.0, 0.0, 0.0)
+    return max(
+        abs(state.lower[index] - previous_values[0]),
+        abs(state.average[index] - previous_values[1]),
+        abs(state.upper[index] - previous_values[2])
+    )
 
-def process_upstream_edge(edge, source_id, target_id, edge_share, outgoing_edges, previous_values_dict, max_change):
+def process_edges(edge_order, edge_shares, adjacency, state, max_change):
     """
-    Process an upstream edge (target_depth >= 0).
+    Process upstream and downstream edges in one pass over the adjacency index.
+
+    An edge gets its share times the ownership of the entity it is derived from, the
+    target upstream or the source downstream, read from the carrier of that entity.
+    It is then combined with the indirect ownership through the other edges of its row,
+    the edges carrying the same aggregated ownership.
     
     Args:
-        edge (dict): Edge to process
-        source_id: Source entity ID
-        target_id: Target entity ID
-        edge_share: Parsed share tuple
-        outgoing_edges (dict): Map of outgoing edges
-        previous_values_dict (dict): Dictionary of previous edge values
+        edge_order (list): Indices of the edges to process, in order
+        edge_shares (list): Parsed share tuple for every edge
+        adjacency (AdjacencyIndex): Adjacency index of the edges
+        state (EdgeState): Edge state store
         max_change (float): Current maximum change
         
     Returns:
         float: Updated maximum change
     """
-    # Calculate direct ownership
-    if target_id in outgoing_edges:
-        target_edge = outgoing_edges[target_id][0]
-        target_share = get_share_tuple_from_edge(target_edge)
-        real_share = multiply_shares(edge_share, target_share)
-    else:
-        real_share = edge_share
+    offsets = adjacency.offsets
+    neighbours = adjacency.adjacency
+    rows = adjacency.rows
+    parents = adjacency.parents
+    pinned = adjacency.pinned
+    has_value = state.has_value
 
-    # Update edge with direct ownership
-    update_edge_shares(edge, real_share)
-    
-    # Calculate indirect ownership through other paths
-    if source_id in outgoing_edges:
-        for indirect_source_edge in outgoing_edges[source_id]:
-            if indirect_source_edge.get('id') != edge['id']:
-                # Calculate indirect ownership
-                indirect_share = parse_share_string(indirect_source_edge.get('share'))
-                
-                indirect_target_edge = next((e for e in outgoing_edges.get(indirect_source_edge['target'], [])), None)
-                if indirect_target_edge and indirect_target_edge.get('real_lower_share') is not None:
-                    indirect_target_share = get_share_tuple_from_edge(indirect_target_edge)
-                else:
-                    indirect_target_share = (0.0, 0.0, 0.0)
-                
-                # Calculate real indirect share
-                if indirect_source_edge['target_depth'] != 0:
-                    indirect_real_share = multiply_shares(indirect_share, indirect_target_share)
-                else:
-                    indirect_real_share = indirect_share
-                
-                # Combine direct and indirect shares
-                new_real_share = add_shares(indirect_real_share, real_share)
-                update_edge_shares(edge, new_real_share)
-                
-                # Calculate change for convergence check
-                previous_share = float(previous_values_dict.get(edge['id'], {}).get('real_lower_share', 0.0) or 0.0)
-                change = abs(edge['real_lower_share'] - previous_share)
-                max_change = max(max_change, change)
-    
-    return max_change
+    # The arithmetic stays scalar instead of going through calculator.intervals: rows hold
+    # about one edge, a kernel call costs more than a whole row here, and the rounding after
+    # every update defines this engine's results
+    for index in edge_order:
+        edge_share = edge_shares[index]
 
-def process_downstream_edge(edge, source_id, target_id, edge_share, incoming_edges, previous_values_dict, max_change):
-    """
-    Process a downstream edge (target_depth < 0).
-    
-    Args:
-        edge (dict): Edge to process
-        source_id: Source entity ID
-        target_id: Target entity ID
-        edge_share: Parsed share tuple
-        incoming_edges (dict): Map of incoming edges
-        previous_values_dict (dict): Dictionary of previous edge values
-        max_change (float): Current maximum change
-        
-    Returns:
-        float: Updated maximum change
-    """
-    # Calculate direct ownership
-    if source_id in incoming_edges:
-        source_edge = incoming_edges[source_id][0]
-        source_share = get_share_tuple_from_edge(source_edge)
-        real_share = multiply_shares(edge_share, source_share)
-    else:
-        real_share = edge_share
+        # Calculate direct ownership
+        parent = parents[index]
+        if parent >= 0:
+            real_share = multiply_shares(edge_share, state.get(parent))
+        else:
+            real_share = edge_share
 
-    # Update edge with direct ownership
-    update_edge_shares(edge, real_share)
-    
-    # Calculate indirect ownership through other paths
-    if target_id in incoming_edges:
-        for indirect_target_edge in incoming_edges[target_id]:
-            if indirect_target_edge.get('id') != edge['id']:
-                # Calculate indirect ownership
-                indirect_share = parse_share_string(indirect_target_edge.get('share'))
-                
-                indirect_source_edge = next((e for e in incoming_edges.get(indirect_target_edge['source'], [])), None)
-                if indirect_source_edge and indirect_source_edge.get('real_lower_share') is not None:
-                    indirect_source_share = get_share_tuple_from_edge(indirect_source_edge)
-                else:
-                    indirect_source_share = (0.0, 0.0, 0.0)
-                
-                # Calculate real indirect share
-                if indirect_target_edge['source_depth'] != 0:
-                    indirect_real_share = multiply_shares(indirect_share, indirect_source_share)
+        # Update edge with direct ownership
+        state.set(index, real_share)
+
+        # Calculate indirect ownership through the other edges of the row
+        row = rows[index]
+        for position in range(offsets[row], offsets[row + 1]):
+            indirect_index = neighbours[position]
+            if indirect_index == index:
+                continue
+
+            indirect_share = edge_shares[indirect_index]
+            if pinned[indirect_index]:
+                indirect_real_share = indirect_share
+            else:
+                indirect_parent = parents[indirect_index]
+                if indirect_parent >= 0 and has_value[indirect_parent]:
+                    indirect_parent_share = state.get(indirect_parent)
                 else:
-                    indirect_real_share = indirect_share
-                
-                # Combine direct and indirect shares
-                new_real_share = add_shares(indirect_real_share, real_share)
-                update_edge_shares(edge, new_real_share)
-                
-                # Calculate change for convergence check
-                change = calculate_change(edge, previous_values_dict)
-                max_change = max(max_change, change)
-    
+                    indirect_parent_share = (0.0, 0.0, 0.0)
+                indirect_real_share = multiply_shares(indirect_share, indirect_parent_share)
+
+            # Combine direct and indirect shares
+            state.set(index, add_shares(indirect_real_share, real_share))
+
+            # Calculate change for convergence check
+            change = calculate_change(index, state)
+            if change > max_change:
+                max_change = change
+
     return max_change
 
-def main(input_file, output_file):
+ENGINES = {
+    'iterative': iterate_real_shares,
+    'sparse': solve_sparse,
+    'scc': solve_scc,
+}
+
+ACCELERATED_ENGINES = ('scc',)
+
+PARALLEL_ENGINES = ('scc',)
+
+# The iterative engine derives every edge from a single carrier edge, which gives no bound on what pruning drops
+PRUNED_ENGINES = ('sparse', 'scc')
+
+def main(input_file, output_file, engine=None, stream=False, output_format=None, cache=None, observer=None,
+         options=None, explain=None, report=None, results_only=False, compression=None):
     """
     Process network data from input file and write results to output file.
     
     Args:
-        input_file (str): Path to input JSON file
-        output_file (str): Path to output JSON file
+        input_file (str): Path to input JSON file, or binary network file
+        output_file (str): Path to output file
+        engine (str): Name of the engine to use, defaults to 'iterative' or 'scc' when streaming
+        stream (bool): Stream edges from and to the files instead of loading the whole network
+        output_format (str): One of OUTPUT_FORMATS, defaults to 'pretty' or 'json' when streaming
+        cache (ResultCache): If given, results are looked up in and stored to this cache, not when streaming
+        observer (RunObserver): If given, notified of every iteration and of the end of the run
+        options (dict): Convergence settings max_iterations, tolerance and acceleration, workers and min_contribution
+        explain (PathIndex): If given, filled with the top contributing paths of every edge, not when streaming
+        report (ValidationReport): If given, filled with the invalid and repeated edges, not when streaming
+        results_only (bool): Only write the id and real shares of every edge
+        compression (str): Compress the output with one of COMPRESSIONS
+
+    Returns:
+        dict: Run statistics
     """
+    stats = {}
+    options = options or {}
+    if stream:
+        if cache is not None:
+            raise ValueError('The cache needs the whole network and can not be used when streaming')
+        engine = engine or 'scc'
+        start = time.perf_counter()
+        stream_network(input_file, output_file, engine, output_format or 'json', results_only=results_only,
+                       compression=compression, stats=stats, **options)
+        log_convergence(engine, stats)
+        if observer is not None:
+            observer.on_finish(engine, stats, time.perf_counter() - start)
+        return stats
+
+    output_format = output_format or 'pretty'
+    if is_binary_file(input_file):
+        with load_binary(input_file) as network:
+            result = calculate_real_shares(network, engine or 'iterative', stats, cache, observer, explain=explain,
+                                           report=report, **options)
+            with open_output(output_file, compression) as f:
+                write_records(f, result, output_format, results_only)
+        return stats
+
     with open(input_file, 'r') as f:
         network = json.load(f)
 
-    result = calculate_real_shares(network)
+    result = calculate_real_shares(network, engine or 'iterative', stats, cache, observer, explain=explain,
+                                   report=report, **options)
 
-    with open(output_file, 'w') as f:
-        json.dump(result, f, indent=2)
+    with open_output(output_file, compression) as f:
+        write_records(f, result, output_format, results_only)
+
+    return stats
 
 # For direct script execution
 if __name__ == "__main__":
+    import argparse
     import sys
-    
-    # Use command line arguments if provided, otherwise use default paths
-    input_path = sys.argv[1] if len(sys.argv) > 1 else 'data/ResightsApS.json'
-    output_path = sys.argv[2] if len(sys.argv) > 2 else 'data/output.json'
-    
-    main(input_path, output_path)
+
+    parser = argparse.ArgumentParser(description='Calculate real ownership shares of a network.')
+    parser.add_argument('input_file', nargs='?', default='data/ResightsApS.json', help='Path to input JSON or binary network file')
+    parser.add_argument('output_file', nargs='?', default='data/output.json', help='Path to output JSON file')
+    parser.add_argument('--engine', choices=list(ENGINES), help='Engine used to solve the network')
+    parser.add_argument('--stream', action='store_true',
+                        help='Stream edges instead of loading the whole network, input can be JSON or NDJSON')
+    parser.add_argument('--format', dest='output_format', choices=OUTPUT_FORMATS,
+                        help='Output format, defaults to pretty printed JSON, or compact JSON when streaming')
+    parser.add_argument('--results-only', action='store_true',
+                        help='Only write the id and real shares of every edge')
+    parser.add_argument('--compress', dest='compression', choices=list(COMPRESSIONS),
+                        help='Compress the output file')
+    parser.add_argument('--cache', action='store_true', help='Reuse results of unchanged networks from the cache')
+    parser.add_argument('--bypass-cache', action='store_true',
+                        help='Recompute even if the network is cached and store the fresh result')
+    parser.add_argument('--clear-cache', action='store_true', help='Remove all cached results before running')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='Directory of the result cache')
+    parser.add_argument('--max-iterations', type=int,
+                        help='Maximum number of passes, defaults to 10 for iterative and 1000 for the other engines')
+    parser.add_argument('--tolerance', type=float,
+                        help='Largest change of any bound in percentage points at convergence, '
+                             'defaults to 0.001 for iterative and 1e-10 for the other engines')
+    parser.add_argument('--acceleration', choices=ACCELERATIONS,
+                        help='Extrapolate the values of cyclic components, scc engine only')
+    parser.add_argument('--workers', type=int,
+                        help='Solve cross-holdings with Jacobi updates, splitting large ones across this many '
+                             'processes, scc engine only. Results are the same for any number of workers')
+    parser.add_argument('--prune-below', type=float, metavar='PP',
+                        help='Stop passing on ownership values whose upper bound is below PP percentage points, '
+                             'sparse and scc engines only. The error bound of the results is logged')
+    parser.add_argument('--profile', nargs='?', const='-', metavar='FILE',
+                        help='Write convergence and timing of every iteration as JSON to FILE, or stdout if no FILE is given')
+    parser.add_argument('--explain', metavar='FILE',
+                        help='Write the top contributing ownership paths of every edge as JSON to FILE')
+    parser.add_argument('--top-k', type=int, default=5, help='Number of paths per edge with --explain')
+    parser.add_argument('--min-contribution', type=float, default=0.01,
+                        help='Smallest contribution of a path in percentage points with --explain')
+    parser.add_argument('--report', metavar='FILE',
+                        help='Write the invalid and repeated edges left out of the calculation as JSON to FILE')
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help='Logging level')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level, format='%(message)s')
+    if args.acceleration and (args.engine or ('scc' if args.stream else 'iterative')) not in ACCELERATED_ENGINES:
+        parser.error(f"--acceleration needs --engine {' or '.join(ACCELERATED_ENGINES)}")
+    if args.max_iterations is not None and args.max_iterations < 1:
+        parser.error('--max-iterations must be at least 1')
+    if args.workers and (args.engine or ('scc' if args.stream else 'iterative')) not in PARALLEL_ENGINES:
+        parser.error(f"--workers needs --engine {' or '.join(PARALLEL_ENGINES)}")
+    if args.workers and args.acceleration:
+        parser.error('--acceleration can not be used with --workers')
+    if args.prune_below is not None:
+        if (args.engine or ('scc' if args.stream else 'iterative')) not in PRUNED_ENGINES:
+            parser.error(f"--prune-below needs --engine {' or '.join(PRUNED_ENGINES)}")
+        if args.workers or args.acceleration:
+            parser.error('--prune-below can not be used with --acceleration or --workers')
+        if not 0.0 <= args.prune_below <= 100.0:
+            parser.error('--prune-below must be between 0 and 100')
+    if args.stream and args.engine and args.engine not in GRAPH_SOLVERS:
+        parser.error(f"--stream needs --engine {' or '.join(GRAPH_SOLVERS)}")
+    if args.explain and args.stream:
+        parser.error('--explain needs the whole network and can not be used with --stream')
+    if args.report and args.stream:
+        parser.error('--report needs the whole network and can not be used with --stream')
+    if args.output_format == 'pretty' and args.stream:
+        parser.error('--format pretty needs the whole network and can not be used with --stream')
+    if (args.cache or args.bypass_cache or args.clear_cache) and args.stream:
+        parser.error('--cache, --bypass-cache and --clear-cache need the whole network and can not be used with --stream')
+
+    cache = None
+    if args.cache or args.bypass_cache or args.clear_cache:
+        cache = ResultCache(args.cache_dir, bypass=args.bypass_cache)
+        if args.clear_cache:
+            cache.clear()
+
+    profile = RunProfile() if args.profile else None
+    options = {'max_iterations': args.max_iterations, 'tolerance': args.tolerance, 'acceleration': args.acceleration,
+               'workers': args.workers, 'min_contribution': args.prune_below}
+    explain = PathIndex(args.top_k, args.min_contribution) if args.explain else None
+    report = ValidationReport() if args.report else None
+    main(args.input_file, args.output_file, args.engine, args.stream, args.output_format, cache, profile, options,
+         explain, report, args.results_only, args.compression)
+
+    if report is not None:
+        with open(args.report, 'w') as f:
+            report.write(f)
+
+    if explain is not None:
+        with open(args.explain, 'w') as f:
+            explain.write(f)
+
+    if cache is not None:
+        logger.info("Cache: %d hits, %d misses.", cache.hits, cache.misses)
+
+    if profile is not None:
+        if args.profile == '-':
+            profile.write(sys.stdout)
+        else:
+            with open(args.profile, 'w') as f:
+                profile.write(f)
@@ -0,0 +1,233 @@
+import os
+import sys
+
+def default_socket():
+    """
+    Returns:
+        str: Path of the daemon's socket in $XDG_RUNTIME_DIR, or else in a directory of
+             the user's own in the temporary directory, see daemon.prepare_socket_directory
+    """
+    runtime_directory = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_directory:
+        return os.path.join(runtime_directory, 'ownership-calculator.sock')
+    # Not tempfile.gettempdir(), importing tempfile takes longer than a request
+    temporary_directory = os.environ.get('TMPDIR') or '/tmp'
+    return os.path.join(temporary_directory, f'ownership-calculator-{os.getuid()}', 'daemon.sock')
+
+DEFAULT_SOCKET = os.environ.get('CALCULATOR_SOCKET') or default_socket()
+
+USAGE = """usage: python -m calculator.client [input_file] [output_file] [--engine ENGINE] [--stream] [--format FORMAT]
+                                  [--results-only] [--compress COMPRESSION] [--max-iterations N] [--tolerance T]
+                                  [--acceleration ACCELERATION] [--workers N] [--prune-below PP] [--socket PATH]
+                                  [--fallback]
+
+Calculate real ownership shares of a network in a running daemon, see python -m calculator.daemon.
+The options above are those of python -m calculator.calculator. Its cache, --profile, --explain, --report
+and --log-level are not supported. Further options:
+  --socket PATH  Path of the daemon's Unix socket
+  --fallback     Calculate in this process if no daemon is running, instead of failing"""
+
+# Command line options with a value: option -> (name, type)
+OPTIONS = {
+    '--engine': ('engine', str),
+    '--format': ('output_format', str),
+    '--compress': ('compression', str),
+    '--max-iterations': ('max_iterations', int),
+    '--tolerance': ('tolerance', float),
+    '--acceleration': ('acceleration', str),
+    '--workers': ('workers', int),
+    '--prune-below': ('min_contribution', float),
+    '--socket': ('socket', str)
+}
+
+FLAGS = {'--stream': 'stream', '--results-only': 'results_only', '--fallback': 'fallback'}
+
+class DaemonError(Exception):
+    """
+    Raised when the daemon fails to calculate a network.
+    """
+
+class DaemonUnavailable(DaemonError):
+    """
+    Raised when no daemon listens on the socket.
+    """
+
+# json and socket are imported where they are used. With the enum and re modules they
+# import, they take longer to import than a request to a warm daemon takes, and usage
+# errors don't need them. The calculator itself is only imported by the daemon.
+
+def encode(value):
+    """
+    Args:
+        value: Request content of dicts, lists, strings, numbers, booleans and None
+
+    Returns:
+        str: Value as JSON
+
+    Raises:
+        ValueError: If the value contains NaN or infinity, which JSON can't represent
+    """
+    import json
+    return json.dumps(value, allow_nan=False)
+
+def decode(line):
+    """
+    Args:
+        line (bytes): Response as a line of JSON
+
+    Returns:
+        dict: Response
+    """
+    import json
+    return json.loads(line)
+
+def request(message, socket_path=DEFAULT_SOCKET, timeout=None):
+    """
+    Sends one request to the daemon and waits for its response.
+
+    Args:
+        message (dict): Request with a command, see daemon.CalculationDaemon
+        socket_path (str): Path of the daemon's Unix socket
+        timeout (float): Seconds to wait for the response, no limit if None
+
+    Returns:
+        dict: Response of the daemon
+
+    Raises:
+        DaemonUnavailable: If no daemon listens on the socket
+        DaemonError: If the daemon reports an error
+    """
+    import socket
+
+    data = encode(message).encode('utf-8') + b'\n'
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.settimeout(timeout)
+        try:
+            connection.connect(socket_path)
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            raise DaemonUnavailable(f'No daemon listens on {socket_path}: {e.strerror}') from None
+        connection.sendall(data)
+        chunks = []
+        while not chunks or not chunks[-1].endswith(b'\n'):
+            chunk = connection.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        connection.close()
+
+    if not chunks:
+        raise DaemonError('Connection closed by the daemon')
+    response = decode(b''.join(chunks))
+    if 'error' in response:
+        raise DaemonError(response['error'])
+    return response
+
+def run(input_file, output_file, engine=None, stream=False, output_format=None, options=None,
+        socket_path=DEFAULT_SOCKET, results_only=False, compression=None):
+    """
+    Calculates a network file in the daemon, like calculator.main does in this process.
+
+    Args:
+        input_file (str): Path to input JSON file, or binary network file
+        output_file (str): Path to output JSON file
+        engine (str): Name of the engine to use, the default of calculator.main if None
+        stream (bool): Stream edges from and to the files instead of loading the whole network
+        output_format (str): One of streaming.OUTPUT_FORMATS, the default of calculator.main if None
+        options (dict): Convergence settings max_iterations, tolerance and acceleration, workers and
+                        min_contribution
+        socket_path (str): Path of the daemon's Unix socket
+        results_only (bool): Only write the id and real shares of every edge
+        compression (str): Compress the output with one of streaming.COMPRESSIONS
+
+    Returns:
+        dict: Run statistics
+    """
+    # The daemon runs in its own working directory
+    response = request({
+        'command': 'calculate',
+        'input_file': os.path.abspath(input_file),
+        'output_file': os.path.abspath(output_file),
+        'engine': engine,
+        'stream': stream,
+        'output_format': output_format,
+        'results_only': results_only,
+        'compression': compression,
+        'options': {name: value for name, value in (options or {}).items() if value is not None}
+    }, socket_path)
+    return response['stats']
+
+def daemon_stats(socket_path=DEFAULT_SOCKET):
+    """
+    Args:
+        socket_path (str): Path of the daemon's Unix socket
+
+    Returns:
+        dict: Counters of the daemon
+    """
+    return request({'command': 'stats'}, socket_path)['stats']
+
+def parse_arguments(argv):
+    """
+    Reads the command line of the client without argparse, which is slow to import.
+
+    Args:
+        argv (list): Command line arguments
+
+    Returns:
+        dict: Values of the arguments, None or False for missing ones
+
+    Raises:
+        ValueError: If an argument is unknown or has an invalid value
+    """
+    values = dict.fromkeys(name for name, _ in OPTIONS.values())
+    values.update(dict.fromkeys(FLAGS.values(), False))
+    paths = []
+    arguments = iter(argv)
+    for argument in arguments:
+        option, has_value, value = argument.partition('=')
+        if option in OPTIONS:
+            name, convert = OPTIONS[option]
+            if not has_value:
+                value = next(arguments, None)
+                if value is None:
+                    raise ValueError(f'{option} needs a value')
+            try:
+                values[name] = convert(value)
+            except ValueError:
+                raise ValueError(f'Invalid value {value!r} for {option}') from None
+        elif argument in FLAGS:
+            values[FLAGS[argument]] = True
+        elif argument.startswith('-') or len(paths) == 2:
+            raise ValueError(f'Unrecognized argument {argument!r}')
+        else:
+            paths.append(argument)
+    values['input_file'] = paths[0] if paths else 'data/ResightsApS.json'
+    values['output_file'] = paths[1] if len(paths) > 1 else 'data/output.json'
+    values['socket'] = values['socket'] or DEFAULT_SOCKET
+    return values
+
+# For direct script execution
+if __name__ == "__main__":
+    if '-h' in sys.argv[1:] or '--help' in sys.argv[1:]:
+        print(USAGE)
+        sys.exit(0)
+    try:
+        args = parse_arguments(sys.argv[1:])
+    except ValueError as e:
+        sys.exit(f'{USAGE.splitlines()[0]}\nerror: {e}')
+
+    options = {name: args[name] for name in ('max_iterations', 'tolerance', 'acceleration', 'workers',
+                                             'min_contribution')}
+    try:
+        run(args['input_file'], args['output_file'], args['engine'], args['stream'], args['output_format'], options,
+            args['socket'], args['results_only'], args['compression'])
+    except DaemonUnavailable as e:
+        if not args['fallback']:
+            sys.exit(f'{e}, start one with python -m calculator.daemon or use --fallback')
+        from .calculator import main
+        main(args['input_file'], args['output_file'], args['engine'], args['stream'], args['output_format'],
+             options=options, results_only=args['results_only'], compression=args['compression'])
+    except DaemonError as e:
+        sys.exit(str(e))
@@ -0,0 +1,229 @@
+import asyncio
+import json
+import logging
+import os
+import signal
+import stat
+import time
+from .calculator import calculate_real_shares, main, ENGINES
+from .client import DEFAULT_SOCKET, DaemonUnavailable, request
+from .pool import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+# Small cyclic network solved by every engine when a worker starts, so the first real
+# request doesn't pay for lazy imports and first-call setup
+WARM_UP_NETWORK = [
+    {"id": "A_FC", "source": "A", "source_depth": 1, "target": "FC", "target_depth": 0, "share": "50%"},
+    {"id": "B_A", "source": "B", "source_depth": 2, "target": "A", "target_depth": 1, "share": "20-30%"},
+    {"id": "A_B", "source": "A", "source_depth": 1, "target": "B", "target_depth": 2, "share": "<5%"},
+    {"id": "FC_S", "source": "FC", "source_depth": 0, "target": "S", "target_depth": -1, "share": "100%"}
+]
+
+def warm_up():
+    """
+    Solves WARM_UP_NETWORK with every engine, run once in every worker process.
+    """
+    # Convergence of the warm-up runs isn't worth logging
+    logging.disable(logging.INFO)
+    try:
+        for engine in ENGINES:
+            calculate_real_shares([dict(edge, active=True) for edge in WARM_UP_NETWORK], engine)
+    finally:
+        logging.disable(logging.NOTSET)
+
+def calculate(input_file, output_file, engine, stream, output_format, options, results_only=False, compression=None):
+    """
+    Calculates a network file in a worker process.
+
+    Returns:
+        dict: Run statistics
+    """
+    return main(input_file, output_file, engine, stream, output_format, options=options, results_only=results_only,
+                compression=compression)
+
+def prepare_socket_directory(socket_path):
+    """
+    Creates the directory of a socket, accessible to the user only, and makes sure other
+    users can't put a socket of their own in its place in an existing one.
+
+    Args:
+        socket_path (str): Path of the Unix socket
+
+    Raises:
+        RuntimeError: If the directory belongs to another user, or other users can write
+                      to it and it doesn't have the sticky bit, like /tmp has
+    """
+    directory = os.path.dirname(os.path.abspath(socket_path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    status = os.stat(directory)
+    if status.st_uid not in (os.getuid(), 0):
+        raise RuntimeError(f'The socket directory {directory} belongs to another user')
+    if status.st_mode & (stat.S_IWGRP | stat.S_IWOTH) and not status.st_mode & stat.S_ISVTX:
+        raise RuntimeError(f'Other users can write to the socket directory {directory}')
+
+class CalculationDaemon:
+    """
+    Asyncio server on a Unix socket calculating network files for local clients.
+
+    The daemon imports the calculator once and keeps a pool of warmed worker processes,
+    so a request only costs the calculation, not starting Python and importing the
+    calculator. Every connection carries one request and one response, each a line of
+    JSON. A request {"command": "calculate", "input_file": ..., "output_file": ...} with
+    optional engine, stream, output_format, results_only, compression and options, the
+    arguments of calculator.main, is answered with {"stats": ...} once the output file is
+    written, {"command": "stats"} with the daemon's counters.
+    Errors are answered with {"error": message}. See client.py for the client side.
+    A worker process that dies fails only the request it was calculating, see
+    pool.WorkerPool.
+    """
+
+    def __init__(self, socket_path=DEFAULT_SOCKET, workers=None, executor=None):
+        """
+        Args:
+            socket_path (str): Path of the Unix socket to listen on
+            workers (int): Number of worker processes, defaults to the number of CPUs
+            executor (Executor): Pool to run calculations in instead of a new process pool
+        """
+        self.socket_path = socket_path
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = WorkerPool(self.workers, warm_up, executor)
+        self.server = None
+        self.connections = {}
+        self.counters = {'requests': 0, 'calculations': 0, 'errors': 0}
+        self.started = time.time()
+
+    async def start(self):
+        """
+        Starts the worker processes and listens on the socket.
+
+        A socket file left behind by a daemon that is no longer running is replaced. The
+        socket is only accessible to the user, see prepare_socket_directory.
+
+        Raises:
+            RuntimeError: If another daemon listens on the socket, or the socket's directory
+                          isn't safe
+        """
+        prepare_socket_directory(self.socket_path)
+        if os.path.exists(self.socket_path):
+            try:
+                await asyncio.to_thread(request, {'command': 'stats'}, self.socket_path, 5.0)
+            except (DaemonUnavailable, TimeoutError):
+                os.unlink(self.socket_path)
+            else:
+                raise RuntimeError(f'A daemon is already listening on {self.socket_path}')
+
+        # Workers start on the first submitted task, so they are warm before the first request
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool.executor, os.getpid) for _ in range(self.workers)))
+        self.server = await asyncio.start_unix_server(self.handle_connection, self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+
+    async def close(self):
+        """
+        Stops listening, removes the socket, closes open connections and shuts the worker
+        pool down.
+        """
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+        for writer in self.connections.values():
+            writer.close()
+        await asyncio.gather(*self.connections, return_exceptions=True)
+        self.pool.shutdown()
+
+    def stats(self):
+        """
+        Returns:
+            dict: Request counters, the number of workers, of worker pools replaced after a
+                  worker died and the uptime in seconds
+        """
+        return dict(self.counters, workers=self.workers, pool_replacements=self.pool.replacements,
+                    uptime=round(time.time() - self.started, 3))
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serves the request of one connection.
+        """
+        task = asyncio.current_task()
+        self.connections[task] = writer
+        try:
+            line = await reader.readline()
+            if line:
+                writer.write(json.dumps(await self.respond(line)).encode('utf-8') + b'\n')
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            del self.connections[task]
+            writer.close()
+
+    async def respond(self, line):
+        """
+        Args:
+            line (bytes): Request as a line of JSON
+
+        Returns:
+            dict: Response
+        """
+        self.counters['requests'] += 1
+        try:
+            message = json.loads(line)
+            command = message.get('command')
+            if command == 'stats':
+                return {'stats': self.stats()}
+            if command != 'calculate':
+                raise ValueError(f"Unknown command {command!r}, expected 'calculate' or 'stats'")
+
+            self.counters['calculations'] += 1
+            start = time.perf_counter()
+            stats = await self.pool.run(calculate, message['input_file'], message['output_file'],
+                                        message.get('engine'), message.get('stream', False),
+                                        message.get('output_format'), message.get('options') or {},
+                                        message.get('results_only', False), message.get('compression'))
+        except Exception as e:
+            self.counters['errors'] += 1
+            logger.debug("Request failed.", exc_info=True)
+            return {'error': f'{type(e).__name__}: {e}'}
+
+        logger.debug("Calculated %s in %.4fs.", message['input_file'], time.perf_counter() - start)
+        return {'stats': stats}
+
+async def serve(socket_path=DEFAULT_SOCKET, **settings):
+    """
+    Runs the daemon until it is interrupted or terminated.
+
+    Args:
+        socket_path (str): Path of the Unix socket to listen on
+        settings: Arguments of CalculationDaemon
+    """
+    daemon = CalculationDaemon(socket_path, **settings)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    try:
+        await daemon.start()
+        logger.info("Listening on %s with %d warm workers.", socket_path, daemon.workers)
+        await stop.wait()
+    finally:
+        await daemon.close()
+
+# For direct script execution
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Keep warm calculator workers running for python -m calculator.client.')
+    parser.add_argument('--socket', default=DEFAULT_SOCKET, help='Path of the Unix socket to listen on')
+    parser.add_argument('--workers', type=int, help='Number of worker processes, defaults to the number of CPUs')
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help='Logging level')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level, format='%(message)s')
+    try:
+        asyncio.run(serve(args.socket, workers=args.workers))
+    except RuntimeError as e:
+        parser.error(str(e))
@@ -0,0 +1,278 @@
+from array import array
+from .helpers import parse_share_string_cached
+
+ACCELERATIONS = ('aitken',)
+
+class OwnershipGraph:
+    """
+    Node-indexed view of the active edges of a network.
+
+    Every entity gets an integer index and every share string is parsed once. Active
+    edges are split into upstream edges (target_depth >= 0), along which owners hold
+    the focus company, and downstream edges (target_depth < 0), along which the focus
+    company holds its subsidiaries. Entities seen at depth 0 are focus nodes.
+    """
+
+    def __init__(self, edges=None):
+        """
+        Args:
+            edges (list): List of edges representing ownership relationships. Edges can
+                          also be added one at a time with add_edge.
+        """
+        self.edges = edges
+        self.node_ids = []
+        self.node_index = {}
+        self.focus = set()
+        self.sources = array('l')
+        self.targets = array('l')
+        self.source_depths = array('l')
+        self.target_depths = array('l')
+        self.active = bytearray()
+        self.shares = []
+        self.upstream = array('l')
+        self.downstream = array('l')
+
+        for edge in edges or ():
+            self.add_edge(edge['source'], edge['target'], edge['source_depth'], edge['target_depth'],
+                          edge['share'], edge['active'])
+
+    def add_edge(self, source_id, target_id, source_depth, target_depth, share, active):
+        """
+        Adds an edge to the graph.
+
+        Args:
+            source_id: Source entity ID
+            target_id: Target entity ID
+            source_depth (int): Depth of the source relative to the focus company
+            target_depth (int): Depth of the target relative to the focus company
+            share (str): Share string of the edge, or its parsed (lower, average, upper) tuple
+            active (bool): Whether the edge is active
+
+        Returns:
+            int: Edge index
+        """
+        index = len(self.sources)
+        source = self.add_node(source_id)
+        target = self.add_node(target_id)
+        self.sources.append(source)
+        self.targets.append(target)
+        self.source_depths.append(source_depth)
+        self.target_depths.append(target_depth)
+        self.active.append(1 if active else 0)
+
+        if source_depth == 0:
+            self.focus.add(source)
+        if target_depth == 0:
+            self.focus.add(target)
+
+        if not active:
+            self.shares.append(None)
+            return index
+
+        self.shares.append(parse_share_string_cached(share) if isinstance(share, str) else tuple(share))
+        if target_depth >= 0:
+            self.upstream.append(index)
+        else:
+            self.downstream.append(index)
+        return index
+
+    def add_skipped_edge(self):
+        """
+        Adds a placeholder for an edge left out of the calculation, e.g. an invalid one,
+        so edge indices keep matching the positions of the edges in the network.
+
+        Returns:
+            int: Edge index
+        """
+        index = len(self.sources)
+        self.sources.append(-1)
+        self.targets.append(-1)
+        self.source_depths.append(0)
+        self.target_depths.append(0)
+        self.active.append(0)
+        self.shares.append(None)
+        return index
+
+    @property
+    def edge_count(self):
+        """
+        Returns:
+            int: Number of edges, including inactive ones
+        """
+        return len(self.sources)
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    def add_node(self, node_id):
+        """
+        Returns the index of an entity, adding it if it is not known yet.
+
+        Args:
+            node_id: Entity ID
+
+        Returns:
+            int: Node index
+        """
+        index = self.node_index.get(node_id)
+        if index is None:
+            index = len(self.node_ids)
+            self.node_index[node_id] = index
+            self.node_ids.append(node_id)
+        return index
+
+def ownership_graph(network):
+    """
+    Builds the ownership graph of a network.
+
+    Args:
+        network (list): List of edges, or a network that builds its own graph like
+                        binary.BinaryNetwork
+
+    Returns:
+        OwnershipGraph: Graph whose edges are the network
+    """
+    build = getattr(network, 'ownership_graph', None)
+    if build is not None:
+        return build()
+    return OwnershipGraph(network)
+
+def to_percentages(lower, upper):
+    """
+    Converts solved lower and upper fractions to output percentages.
+
+    Args:
+        lower (float): Lower bound as a fraction
+        upper (float): Upper bound as a fraction
+
+    Returns:
+        tuple: (lower, average, upper) percentages rounded to two decimals
+    """
+    return (
+        round(lower * 100.0, 2),
+        round((lower + upper) * 50.0, 2),
+        round(upper * 100.0, 2)
+    )
+
+def edge_real_shares(graph, index, upstream_values, downstream_values):
+    """
+    Returns the real shares of an edge from solved node values.
+
+    Upstream edges carry the ownership of their source in the focus company, downstream
+    edges the ownership the focus company has of their target. Active edges outside both
+    directions keep the values initialize_shares would give them.
+
+    Args:
+        graph (OwnershipGraph): Graph the values were solved on
+        index (int): Edge index
+        upstream_values (tuple): (lower, upper) sequences of upstream node values as fractions
+        downstream_values (tuple): (lower, upper) sequences of downstream node values as fractions
+
+    Returns:
+        tuple: (lower, average, upper) percentages rounded to two decimals, or None for inactive edges
+    """
+    if not graph.active[index]:
+        return None
+
+    source_depth = graph.source_depths[index]
+    target_depth = graph.target_depths[index]
+    if source_depth > 0 and target_depth >= 0:
+        node = graph.sources[index]
+        lower, upper = upstream_values[0][node], upstream_values[1][node]
+    elif target_depth < 0:
+        node = graph.targets[index]
+        lower, upper = downstream_values[0][node], downstream_values[1][node]
+    elif source_depth == 0 or target_depth == 0:
+        lower, _, upper = graph.shares[index]
+    else:
+        lower, upper = 0.0, 0.0
+
+    return to_percentages(lower, upper)
+
+def assign_real_shares(graph, upstream_values, downstream_values):
+    """
+    Writes solved node values to the real share fields of the active edges.
+
+    Args:
+        graph (OwnershipGraph): Graph the values were solved on, built from a list of edges
+        upstream_values (tuple): (lower, upper) sequences of upstream node values as fractions
+        downstream_values (tuple): (lower, upper) sequences of downstream node values as fractions
+
+    Returns:
+        list: The network with real_lower_share, real_average_share, and real_upper_share values
+    """
+    for index, edge in enumerate(graph.edges):
+        real_shares = edge_real_shares(graph, index, upstream_values, downstream_values)
+        if real_shares is None:
+            continue
+
+        edge['real_lower_share'], edge['real_average_share'], edge['real_upper_share'] = real_shares
+
+    return graph.edges
+
+def dependency_lists(graph, upstream):
+    """
+    Lists for every node the nodes its ownership value is derived from.
+
+    Upstream, a node depends on the owners of the focus company it holds shares in.
+    Downstream, a node depends on the companies holding shares in it. Focus nodes are
+    pinned to 1 and have no dependencies.
+
+    Args:
+        graph (OwnershipGraph): Ownership graph
+        upstream (bool): Whether to list upstream or downstream dependencies
+
+    Returns:
+        list: For every node a list of (node, lower_share, upper_share) tuples
+    """
+    dependencies = [[] for _ in range(len(graph))]
+    edge_indices = graph.upstream if upstream else graph.downstream
+
+    for index in edge_indices:
+        if upstream:
+            node, neighbour = graph.sources[index], graph.targets[index]
+        else:
+            node, neighbour = graph.targets[index], graph.sources[index]
+        if node in graph.focus:
+            continue
+
+        lower, _, upper = graph.shares[index]
+        dependencies[node].append((neighbour, lower, upper))
+
+    return dependencies
+
+def aitken_extrapolate(nodes, history, values, max_ratio=0.95):
+    """
+    Extrapolates node values towards the fixed point with Aitken's delta-squared method.
+
+    The fixed-point iteration converges linearly, so the changes between successive
+    passes shrink by a roughly constant ratio and their limit can be estimated directly.
+    The ratio is estimated from the largest changes over all nodes, which is more robust
+    than a ratio per node when the nodes are coupled by cycles. Nothing is extrapolated
+    while the changes don't shrink, and results are kept within [0, 1], so iterating
+    afterwards still converges to the same fixed point, only in fewer passes.
+
+    Args:
+        nodes (iterable): Node indices to extrapolate
+        history (list): Three successive snapshots of the values, each indexable by node
+        values (array): Current values, equal to the last snapshot, updated in place
+        max_ratio (float): Largest estimated ratio that is extrapolated
+
+    Returns:
+        bool: Whether the values were extrapolated
+    """
+    first, second, third = history
+    first_change = max((abs(second[node] - first[node]) for node in nodes), default=0.0)
+    second_change = max((abs(third[node] - second[node]) for node in nodes), default=0.0)
+    if first_change == 0.0 or second_change == 0.0:
+        return False
+
+    ratio = second_change / first_change
+    if ratio >= max_ratio:
+        return False
+
+    factor = ratio / (1.0 - ratio)
+    for node in nodes:
+        value = third[node] + (third[node] - second[node]) * factor
+        values[node] = min(1.0, max(0.0, value))
+    return True
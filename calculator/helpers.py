@@ -1,3 +1,9 @@
+import math
+from functools import lru_cache
+
+# Share strings repeat a lot ("100%", "10-15%", "<5%"), so a small cache covers them
+SHARE_CACHE_SIZE = 4096
+
 def parse_share_string(share_string):
     """
     Parse a share string into numerical values.
@@ -38,6 +44,28 @@ def parse_share_string(share_string):
         except ValueError:
             return 0.0, 0.0, 0.0
 
+@lru_cache(maxsize=SHARE_CACHE_SIZE)
+def parse_share_string_cached(share_string):
+    """
+    Memoized parse_share_string. Equal share strings share one parsed tuple.
+    Hit and miss counts are available from parse_share_string_cached.cache_info().
+    Args:
+        share_string (str): Share string in format like "50%", "10-15%", or "<10%".
+    Returns:
+        tuple: (lower_percentage, avg_percentage, upper_percentage) as fractions.
+    """
+    return parse_share_string(share_string)
+
+def parse_edge_shares(edges):
+    """
+    Parses the share string of every edge once.
+    Args:
+        edges (list): List of edges
+    Returns:
+        list: Parsed share tuple for every edge, in edge order.
+    """
+    return [parse_share_string_cached(edge['share']) for edge in edges]
+
 def multiply_shares(share_tuple1, share_tuple2):
     """
     Multiplies two share tuples (lower, avg, upper).
@@ -95,4 +123,63 @@ def get_share_tuple_from_edge(edge):
         edge['real_lower_share'] / 100.0,
         edge['real_average_share'] / 100.0,
         edge['real_upper_share'] / 100.0
-    )
\ No newline at end of file
+    )
+
+def record_run_stats(stats, iterations, converged):
+    """
+    Records the iterations and convergence of one solved system in a run statistics dict.
+    A run with several systems reports the largest number of iterations and only counts
+    as converged if every system converged.
+    
+    Args:
+        stats (dict): Run statistics to update, ignored if None
+        iterations (int): Number of iterations of the system
+        converged (bool): Whether the system converged
+    """
+    if stats is None:
+        return
+    stats['iterations'] = max(stats.get('iterations', 0), iterations)
+    stats['converged'] = stats.get('converged', True) and converged
+
+def pruning_threshold(min_contribution):
+    """
+    Converts a minimum contribution to the fraction values are compared with.
+
+    Args:
+        min_contribution (float): Smallest upper bound in percentage points a value needs
+                                  to be passed on, or None
+
+    Returns:
+        float: Threshold as a fraction, None if min_contribution is None
+
+    Raises:
+        ValueError: If min_contribution is not between 0 and 100
+    """
+    if min_contribution is None:
+        return None
+    if not 0.0 <= min_contribution <= 100.0:
+        raise ValueError('min_contribution must be between 0 and 100 percentage points')
+    return min_contribution / 100.0
+
+def error_bound(error):
+    """
+    Args:
+        error (float): Largest error of any value as a fraction
+
+    Returns:
+        float: The error in percentage points, rounded up to six decimals so it stays a bound
+    """
+    return math.ceil(error * 1e8) / 1e6
+
+def record_error_bound(stats, error):
+    """
+    Records the error bound of one system solved with pruning in a run statistics dict.
+    A run with several systems reports the largest bound.
+
+    Args:
+        stats (dict): Run statistics to update, ignored if None
+        error (float): Largest error of any value of the system as a fraction
+    """
+    if stats is None:
+        return
+    stats['error_bound'] = max(stats.get('error_bound', 0.0), error_bound(error))
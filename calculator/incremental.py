@@ -0,0 +1,326 @@
+from array import array
+from .graph import to_percentages
+from .helpers import parse_share_string_cached
+from .scc import strongly_connected_components, solve_in_order
+from .validation import IDENTITY_FIELDS, edge_error
+
+class IncrementalNetwork:
+    """
+    Solved network that can be updated with edge deltas without a full recompute.
+
+    The ownership values of every node are kept after solving. When edges are added,
+    removed or modified, only the nodes whose values depend on a changed edge, directly
+    or through other nodes, are reset and solved again. Results are the same as solving
+    the updated network with the scc engine. Invalid edges, see validation.edge_error,
+    are kept but left out of the calculation like inactive edges. An edge repeated with
+    the same id and content is calculated once and every copy gets its result, like in
+    validation.normalize_network.
+    """
+
+    def __init__(self, network, tolerance=1e-12, max_iterations=1000):
+        """
+        Args:
+            network (list): List of edges representing ownership relationships
+            tolerance (float): Maximum absolute change within a component at convergence
+            max_iterations (int): Maximum number of passes over a single component
+
+        Raises:
+            ValueError: If an edge has no id, or two different edges have the same id
+        """
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.edges = {}
+        # Edge id -> later copies of the edge, which get the results of the first one
+        self.repeats = {}
+        self.node_ids = []
+        self.node_index = {}
+        self.focus_counts = {}
+        # Per direction (True for upstream) and node: edge id -> (neighbour, lower, upper)
+        self.dependencies = {True: [], False: []}
+        # Per direction and node: edge id -> node depending on it through that edge
+        self.dependents = {True: [], False: []}
+        # Per direction and node: ids of the edges showing the node's value
+        self.value_edges = {True: [], False: []}
+        self.values = {True: (array('d'), array('d')), False: (array('d'), array('d'))}
+
+        for edge in network:
+            first = self.edges.get(self._edge_id(edge))
+            if first is None:
+                self._attach(edge)
+            elif all(edge.get(field) == first.get(field) for field in IDENTITY_FIELDS):
+                self.repeats.setdefault(edge['id'], []).append(edge)
+            else:
+                raise ValueError(f"Edge id {edge['id']!r} is used by two different edges")
+        self._solve_all()
+
+    @property
+    def focus(self):
+        """
+        Returns:
+            set: Nodes seen at depth 0 on at least one edge
+        """
+        return {node for node, count in self.focus_counts.items() if count}
+
+    def apply(self, added=(), removed=(), modified=()):
+        """
+        Applies a delta of edges and recomputes the affected nodes.
+
+        The whole delta is checked before anything changes, so a delta that raises
+        leaves the network as it was. Removed and modified edges drop their repeats.
+
+        Args:
+            added (list): New edges
+            removed (list): IDs of edges to remove
+            modified (list): Edges replacing the edges with the same ID, e.g. with another
+                             share or active flag
+
+        Returns:
+            set: IDs of the edges whose real shares were recomputed
+
+        Raises:
+            KeyError: If a removed or modified edge is unknown
+            ValueError: If an added edge reuses an ID, an edge has no ID or an edge is
+                        changed more than once
+        """
+        added, removed, modified = list(added), list(removed), list(modified)
+        self._check_delta(added, removed, modified)
+        focus = self.focus
+        dirty = {True: set(), False: set()}
+
+        for edge_id in removed:
+            self._detach(self.edges.pop(edge_id), dirty)
+            self.repeats.pop(edge_id, None)
+        for edge in modified:
+            self._detach(self.edges[edge['id']], dirty)
+            self.repeats.pop(edge['id'], None)
+            self._attach(edge, dirty)
+        for edge in added:
+            self._attach(edge, dirty)
+
+        if self.focus != focus:
+            # Focus nodes are pinned and have no dependencies, so every node may change
+            self._rebuild()
+            return set(self.edges)
+
+        updated = set(edge['id'] for edge in added) | set(edge['id'] for edge in modified)
+        for upstream in (True, False):
+            region = self._affected(dirty[upstream], upstream)
+            self._solve_region(region, upstream)
+            for node in region:
+                updated.update(self.value_edges[upstream][node])
+
+        for edge_id in updated:
+            self._write(self.edges[edge_id])
+        return updated
+
+    def network(self):
+        """
+        Returns:
+            list: The current edges with real_lower_share, real_average_share, and real_upper_share values
+        """
+        return list(self.edges.values())
+
+    def real_shares(self, edge_id):
+        """
+        Args:
+            edge_id: Edge ID
+
+        Returns:
+            tuple: (lower, average, upper) percentages of the edge, or None if it is inactive
+        """
+        edge = self._get(edge_id)
+        return self._real_shares(edge)
+
+    def _check_delta(self, added, removed, modified):
+        removed_ids = set()
+        for edge_id in removed:
+            self._get(edge_id)
+            if edge_id in removed_ids:
+                raise ValueError(f"Edge id {edge_id!r} is removed twice")
+            removed_ids.add(edge_id)
+
+        changed_ids = set(removed_ids)
+        for edge in modified:
+            edge_id = self._edge_id(edge)
+            self._get(edge_id)
+            if edge_id in changed_ids:
+                raise ValueError(f"Edge id {edge_id!r} is changed more than once")
+            changed_ids.add(edge_id)
+
+        added_ids = set()
+        for edge in added:
+            edge_id = self._edge_id(edge)
+            if (edge_id in self.edges and edge_id not in removed_ids) or edge_id in added_ids:
+                raise ValueError(f"Duplicate edge id {edge_id!r}")
+            added_ids.add(edge_id)
+
+        # Entities become dict keys, so unhashable ones have to fail before anything changes
+        for edge in modified + added:
+            for entity_id in self._focus_ids(edge):
+                hash(entity_id)
+
+    @staticmethod
+    def _edge_id(edge):
+        if edge.get('id') is None:
+            raise ValueError('Edge without id')
+        return edge['id']
+
+    def _get(self, edge_id):
+        if edge_id not in self.edges:
+            raise KeyError(f"Unknown edge id {edge_id!r}")
+        return self.edges[edge_id]
+
+    def _add_node(self, node_id):
+        index = self.node_index.get(node_id)
+        if index is None:
+            index = len(self.node_ids)
+            self.node_index[node_id] = index
+            self.node_ids.append(node_id)
+            for upstream in (True, False):
+                self.dependencies[upstream].append({})
+                self.dependents[upstream].append({})
+                self.value_edges[upstream].append(set())
+                self.values[upstream][0].append(0.0)
+                self.values[upstream][1].append(0.0)
+        return index
+
+    @staticmethod
+    def _usable(edge):
+        return edge_error(edge) is None and edge['active']
+
+    @staticmethod
+    def _focus_ids(edge):
+        """
+        Returns the entities the edge makes focus nodes, like normalize_network: inactive
+        edges count, invalid active ones don't.
+        """
+        inactive = edge.get('active') is not None and not edge['active']
+        if not inactive and edge_error(edge) is not None:
+            return []
+        return [
+            edge[field] for field in ('source', 'target')
+            if edge.get(f'{field}_depth') == 0 and edge.get(field) is not None
+        ]
+
+    @staticmethod
+    def _direction(edge):
+        """
+        Returns:
+            tuple: (upstream, node, neighbour key) where node's value depends on the edge
+        """
+        if edge['target_depth'] >= 0:
+            return True, edge['source'], edge['target']
+        return False, edge['target'], edge['source']
+
+    def _attach(self, edge, dirty=None):
+        self.edges[edge['id']] = edge
+        for entity_id in self._focus_ids(edge):
+            node = self._add_node(entity_id)
+            self.focus_counts[node] = self.focus_counts.get(node, 0) + 1
+
+        if not self._usable(edge):
+            return
+
+        upstream, node_id, neighbour_id = self._direction(edge)
+        node, neighbour = self._add_node(node_id), self._add_node(neighbour_id)
+        if edge['target_depth'] < 0 or edge['source_depth'] > 0:
+            self.value_edges[upstream][node].add(edge['id'])
+
+        lower, _, upper = parse_share_string_cached(edge['share'])
+        self.dependencies[upstream][node][edge['id']] = (neighbour, lower, upper)
+        self.dependents[upstream][neighbour][edge['id']] = node
+        if dirty is not None:
+            dirty[upstream].add(node)
+
+    def _detach(self, edge, dirty):
+        for entity_id in self._focus_ids(edge):
+            self.focus_counts[self.node_index[entity_id]] -= 1
+
+        if not self._usable(edge):
+            return
+
+        upstream, node_id, neighbour_id = self._direction(edge)
+        node, neighbour = self.node_index[node_id], self.node_index[neighbour_id]
+        self.value_edges[upstream][node].discard(edge['id'])
+        del self.dependencies[upstream][node][edge['id']]
+        del self.dependents[upstream][neighbour][edge['id']]
+        dirty[upstream].add(node)
+
+    def _affected(self, dirty, upstream):
+        """
+        Returns the dirty nodes and every node depending on them, directly or indirectly.
+        """
+        dependents = self.dependents[upstream]
+        region = set(dirty)
+        stack = list(dirty)
+        while stack:
+            node = stack.pop()
+            for dependent in dependents[node].values():
+                if dependent not in region:
+                    region.add(dependent)
+                    stack.append(dependent)
+        return region
+
+    def _solve_region(self, region, upstream):
+        """
+        Solves a region that is closed under dependents, using the values outside it as they are.
+        """
+        if not region:
+            return
+
+        focus = self.focus
+        lower, upper = self.values[upstream]
+        nodes = sorted(region)
+        local_index = {node: position for position, node in enumerate(nodes)}
+        dependencies = {}
+        local_dependencies = []
+        for node in nodes:
+            dependencies[node] = [] if node in focus else list(self.dependencies[upstream][node].values())
+            local_dependencies.append([
+                (local_index[neighbour],) for neighbour, _, _ in dependencies[node]
+                if neighbour in local_index
+            ])
+            lower[node] = upper[node] = 1.0 if node in focus else 0.0
+
+        components = [
+            [nodes[position] for position in component]
+            for component in strongly_connected_components(local_dependencies)
+        ]
+        solve_in_order(components, dependencies, focus, lower, upper, self.tolerance, self.max_iterations)
+
+    def _solve_all(self):
+        for upstream in (True, False):
+            self._solve_region(set(range(len(self.node_ids))), upstream)
+        for edge in self.edges.values():
+            self._write(edge)
+
+    def _rebuild(self):
+        edges = list(self.edges.values())
+        edges.extend(edge for repeats in self.repeats.values() for edge in repeats)
+        self.__init__(edges, self.tolerance, self.max_iterations)
+
+    def _real_shares(self, edge):
+        """
+        Returns the real shares of an edge like graph.edge_real_shares.
+        """
+        if not self._usable(edge):
+            return None
+
+        if edge['source_depth'] > 0 and edge['target_depth'] >= 0:
+            node, upstream = self.node_index[edge['source']], True
+        elif edge['target_depth'] < 0:
+            node, upstream = self.node_index[edge['target']], False
+        elif edge['source_depth'] == 0 or edge['target_depth'] == 0:
+            lower, _, upper = parse_share_string_cached(edge['share'])
+            return to_percentages(lower, upper)
+        else:
+            return to_percentages(0.0, 0.0)
+
+        lower, upper = self.values[upstream]
+        return to_percentages(lower[node], upper[node])
+
+    def _write(self, edge):
+        real_shares = self._real_shares(edge)
+        if real_shares is not None:
+            for record in (edge, *self.repeats.get(edge['id'], ())):
+                record['real_lower_share'], record['real_average_share'], record['real_upper_share'] = real_shares
@@ -0,0 +1,247 @@
+from array import array
+from importlib.util import find_spec
+
+# NumPy is optional, the pure Python kernel gives the same results. It is only imported
+# once a NumPy kernel is created, importing it takes longer than solving a small network.
+numpy = None
+
+class PythonKernel:
+    """
+    Batched interval arithmetic over flat array('d') buffers.
+
+    An interval vector is a (lower, upper) pair of equally long vectors of fractions.
+    Shares are never negative, so multiplying two intervals multiplies their bounds.
+    Values are kept unrounded and only rounded to percentages for output.
+    """
+
+    name = 'python'
+
+    def vector(self, values):
+        """
+        Args:
+            values (iterable): Floats
+
+        Returns:
+            array: Vector of the values
+        """
+        return array('d', values)
+
+    def zeros(self, size):
+        """
+        Args:
+            size (int): Length of the vector
+
+        Returns:
+            array: Vector of zeros
+        """
+        return array('d', [0.0]) * size
+
+    def index_vector(self, values):
+        """
+        Args:
+            values (iterable): Integers
+
+        Returns:
+            array: Vector of the indices
+        """
+        return array('l', values)
+
+    def to_list(self, values):
+        """
+        Args:
+            values (array): Vector
+
+        Returns:
+            list: Values as Python floats
+        """
+        return values.tolist()
+
+    def add(self, first, second):
+        """
+        Returns:
+            array: Element-wise sum of two vectors
+        """
+        return array('d', map(float.__add__, first, second))
+
+    def subtract(self, first, second):
+        """
+        Returns:
+            array: Element-wise difference of two vectors
+        """
+        return array('d', map(float.__sub__, first, second))
+
+    def multiply(self, first, second):
+        """
+        Returns:
+            array: Element-wise product of two vectors
+        """
+        return array('d', map(float.__mul__, first, second))
+
+    def clamp(self, values, limit=1.0):
+        """
+        Returns:
+            array: Values capped at limit
+        """
+        return array('d', [value if value < limit else limit for value in values])
+
+    def prune(self, values, reference, threshold):
+        """
+        Returns:
+            array: Values whose reference value is at least threshold, zero in place of the others
+        """
+        return array('d', [value if bound >= threshold else 0.0 for value, bound in zip(values, reference)])
+
+    def max_difference(self, first, second):
+        """
+        Returns:
+            float: Largest absolute element-wise difference of two vectors, 0.0 if they are empty
+        """
+        return max(map(abs, map(float.__sub__, first, second)), default=0.0)
+
+    def propagate(self, weights, values, columns, rows, size, base=None):
+        """
+        Sums weighted values along sparse entries, the product of a sparse matrix in
+        coordinate format with a vector.
+
+        Args:
+            weights (array): Value of every entry
+            values (array): Vector the entries point to
+            columns (array): Index into values of every entry
+            rows (array): Index into the result of every entry
+            size (int): Length of the result
+            base (array): Values the entries of every row are added to, zeros if None
+
+        Returns:
+            array: For every row the sum of weights[e] * values[columns[e]] over its entries
+        """
+        result = array('d', base) if base is not None else array('d', [0.0]) * size
+        for weight, column, row in zip(weights, columns, rows):
+            result[row] += weight * values[column]
+        return result
+
+    def interval_add(self, first, second):
+        """
+        Args:
+            first (tuple): (lower, upper) vectors
+            second (tuple): (lower, upper) vectors
+
+        Returns:
+            tuple: (lower, upper) vectors of the sums
+        """
+        return self.add(first[0], second[0]), self.add(first[1], second[1])
+
+    def interval_multiply(self, first, second):
+        """
+        Args:
+            first (tuple): (lower, upper) vectors of non-negative values
+            second (tuple): (lower, upper) vectors of non-negative values
+
+        Returns:
+            tuple: (lower, upper) vectors of the products
+        """
+        return self.multiply(first[0], second[0]), self.multiply(first[1], second[1])
+
+    def interval_clamp(self, interval, limit=1.0):
+        """
+        Args:
+            interval (tuple): (lower, upper) vectors
+
+        Returns:
+            tuple: (lower, upper) vectors capped at limit
+        """
+        return self.clamp(interval[0], limit), self.clamp(interval[1], limit)
+
+    def percentages(self, lower, upper):
+        """
+        Converts an interval vector to output percentages, like graph.to_percentages.
+
+        Args:
+            lower (array): Lower bounds as fractions
+            upper (array): Upper bounds as fractions
+
+        Returns:
+            list: (lower, average, upper) percentages rounded to two decimals for every element
+        """
+        return [
+            (round(low * 100.0, 2), round((low + high) * 50.0, 2), round(high * 100.0, 2))
+            for low, high in zip(self.to_list(lower), self.to_list(upper))
+        ]
+
+class NumpyKernel(PythonKernel):
+    """
+    PythonKernel on NumPy arrays. Every operation runs over the whole vector at once.
+
+    Sums are accumulated in the same order as in PythonKernel, and rounding goes through
+    Python's round, so both kernels give identical results.
+    """
+
+    name = 'numpy'
+
+    def __init__(self):
+        global numpy
+        if numpy is None:
+            import numpy
+
+    def vector(self, values):
+        return numpy.array(values if hasattr(values, '__len__') else list(values), dtype=numpy.float64)
+
+    def zeros(self, size):
+        return numpy.zeros(size, dtype=numpy.float64)
+
+    def index_vector(self, values):
+        return numpy.array(values if hasattr(values, '__len__') else list(values), dtype=numpy.intp)
+
+    def to_list(self, values):
+        return numpy.asarray(values, dtype=numpy.float64).tolist()
+
+    def add(self, first, second):
+        return numpy.add(first, second)
+
+    def subtract(self, first, second):
+        return numpy.subtract(first, second)
+
+    def multiply(self, first, second):
+        return numpy.multiply(first, second)
+
+    def clamp(self, values, limit=1.0):
+        return numpy.minimum(values, limit)
+
+    def prune(self, values, reference, threshold):
+        return numpy.where(numpy.asarray(reference) >= threshold, values, 0.0)
+
+    def max_difference(self, first, second):
+        if len(first) == 0:
+            return 0.0
+        return float(numpy.max(numpy.abs(numpy.subtract(first, second))))
+
+    def propagate(self, weights, values, columns, rows, size, base=None):
+        if base is not None:
+            result = numpy.array(base, dtype=numpy.float64)
+        elif len(weights) == 0:
+            return self.zeros(size)
+        # bincount and add.at add the entries one by one in order, like the loop in PythonKernel
+        products = numpy.multiply(weights, numpy.asarray(values)[columns])
+        if base is None:
+            return numpy.bincount(rows, weights=products, minlength=size)
+        numpy.add.at(result, rows, products)
+        return result
+
+KERNELS = {'python': PythonKernel}
+if find_spec('numpy') is not None:
+    KERNELS['numpy'] = NumpyKernel
+
+def get_kernel(name=None):
+    """
+    Returns an interval arithmetic kernel.
+
+    Args:
+        name (str): 'numpy' or 'python', the fastest available kernel if None
+
+    Returns:
+        PythonKernel: The kernel
+    """
+    if name is None:
+        name = 'numpy' if 'numpy' in KERNELS else 'python'
+    if name not in KERNELS:
+        raise ValueError(f"Kernel '{name}' is not available, expected one of: {', '.join(KERNELS)}")
+    return KERNELS[name]()
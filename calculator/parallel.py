@@ -0,0 +1,283 @@
+from array import array
+from .intervals import get_kernel
+
+# Components with fewer nodes are solved in the calling process, where starting worker
+# processes would cost more than it saves
+PARALLEL_MIN_NODES = 1000
+
+# Seconds a worker waits for the others at the end of a pass. The ranges take about the
+# same time, so this only runs out if a worker is stuck.
+BARRIER_TIMEOUT = 300.0
+
+# Arrays of the shared memory block, every item is 8 bytes wide
+SECTIONS = (
+    ('indptr', 'q'),
+    ('indices', 'q'),
+    ('lower_weights', 'd'),
+    ('upper_weights', 'd'),
+    ('base_lower', 'd'),
+    ('base_upper', 'd'),
+    ('lower_0', 'd'),
+    ('upper_0', 'd'),
+    ('lower_1', 'd'),
+    ('upper_1', 'd'),
+    ('changes', 'd'),
+    ('result', 'q'),
+)
+
+class ComponentSystem:
+    """
+    Fixed-point system of one strongly connected component in compressed sparse rows.
+
+    Nodes are numbered by their position in the component. The values of nodes outside
+    the component are already solved, so their contributions are summed once into a
+    base value per node.
+    """
+
+    def __init__(self, component, dependencies, lower, upper):
+        """
+        Args:
+            component (list): Node indices of the component
+            dependencies (list): Dependency lists indexable by node
+            lower (array): Lower bound values of all nodes
+            upper (array): Upper bound values of all nodes
+        """
+        local_index = {node: position for position, node in enumerate(component)}
+        self.size = len(component)
+        self.indptr = array('q', [0])
+        self.indices = array('q')
+        self.lower_weights = array('d')
+        self.upper_weights = array('d')
+        self.base_lower = array('d')
+        self.base_upper = array('d')
+        self.lower = array('d', (lower[node] for node in component))
+        self.upper = array('d', (upper[node] for node in component))
+
+        for node in component:
+            base_lower = 0.0
+            base_upper = 0.0
+            for neighbour, lower_share, upper_share in dependencies[node]:
+                position = local_index.get(neighbour)
+                if position is None:
+                    base_lower += lower_share * lower[neighbour]
+                    base_upper += upper_share * upper[neighbour]
+                else:
+                    self.indices.append(position)
+                    self.lower_weights.append(lower_share)
+                    self.upper_weights.append(upper_share)
+            self.base_lower.append(base_lower)
+            self.base_upper.append(base_upper)
+            self.indptr.append(len(self.indices))
+
+    @property
+    def edge_count(self):
+        return len(self.indices)
+
+    def partitions(self, workers):
+        """
+        Splits the nodes into contiguous ranges with about the same number of entries.
+
+        Args:
+            workers (int): Number of ranges
+
+        Returns:
+            list: (start, end) node ranges, one per worker
+        """
+        total = self.size + self.edge_count
+        bounds = [0]
+        node = 0
+        for worker in range(1, workers):
+            target = total * worker // workers
+            while node < self.size and node + self.indptr[node] < target:
+                node += 1
+            bounds.append(node)
+        bounds.append(self.size)
+        return list(zip(bounds, bounds[1:]))
+
+def jacobi_sweep(start, end, indptr, indices, lower_weights, upper_weights, base_lower, base_upper,
+                 lower, upper, new_lower, new_upper):
+    """
+    Computes new values of a range of nodes from the values of the previous pass only.
+
+    Every node sums its base value and its entries in a fixed order, so the result of a
+    node doesn't depend on how the nodes are split between workers.
+
+    Returns:
+        float: Largest absolute change of the lower and upper bound in the range
+    """
+    max_change = 0.0
+    for node in range(start, end):
+        lower_total = base_lower[node]
+        upper_total = base_upper[node]
+        for position in range(indptr[node], indptr[node + 1]):
+            neighbour = indices[position]
+            lower_total += lower_weights[position] * lower[neighbour]
+            upper_total += upper_weights[position] * upper[neighbour]
+
+        lower_total = min(1.0, lower_total)
+        upper_total = min(1.0, upper_total)
+        change = max(abs(lower_total - lower[node]), abs(upper_total - upper[node]))
+        if change > max_change:
+            max_change = change
+        new_lower[node] = lower_total
+        new_upper[node] = upper_total
+    return max_change
+
+def solve_jacobi(system, tolerance=1e-12, max_iterations=1000, workers=1, kernel=None):
+    """
+    Iterates a component system with Jacobi updates until its values stop changing.
+
+    Every pass computes all new values from the previous pass, so the passes, and the
+    result, are the same for any number of workers. With more than one worker the nodes
+    are split across worker processes sharing the values in shared memory, with a
+    barrier after every pass. The calling process solves it alone with the interval
+    arithmetic kernel, which sums the entries of every node in the same order as
+    jacobi_sweep.
+
+    Args:
+        system (ComponentSystem): System of the component
+        tolerance (float): Maximum absolute change at convergence
+        max_iterations (int): Maximum number of passes
+        workers (int): Number of worker processes, the calling process solves it alone if 1
+        kernel (PythonKernel): Kernel for a single process, the fastest available if None
+
+    Returns:
+        tuple: (lower, upper, iterations, converged) with the values in component order
+    """
+    workers = max(1, min(workers, system.size))
+    if workers > 1:
+        return _solve_shared(system, tolerance, max_iterations, workers)
+
+    kernel = kernel or get_kernel()
+    rows = array('l')
+    for node in range(system.size):
+        rows.extend([node] * (system.indptr[node + 1] - system.indptr[node]))
+    rows = kernel.index_vector(rows)
+    columns = kernel.index_vector(system.indices)
+    lower_weights, upper_weights = kernel.vector(system.lower_weights), kernel.vector(system.upper_weights)
+    base_lower, base_upper = kernel.vector(system.base_lower), kernel.vector(system.base_upper)
+
+    lower, upper = kernel.vector(system.lower), kernel.vector(system.upper)
+    iterations = 0
+    converged = False
+    for iterations in range(1, max_iterations + 1):
+        new_lower = kernel.clamp(kernel.propagate(lower_weights, lower, columns, rows, system.size, base_lower))
+        new_upper = kernel.clamp(kernel.propagate(upper_weights, upper, columns, rows, system.size, base_upper))
+        max_change = max(kernel.max_difference(new_lower, lower), kernel.max_difference(new_upper, upper))
+        lower, upper = new_lower, new_upper
+        if max_change <= tolerance:
+            converged = True
+            break
+    return array('d', kernel.to_list(lower)), array('d', kernel.to_list(upper)), iterations, converged
+
+def _layout(size, edge_count, workers):
+    """
+    Returns:
+        dict: Section name -> (typecode, offset, length) in the shared memory block
+    """
+    lengths = {'indptr': size + 1, 'indices': edge_count, 'lower_weights': edge_count,
+               'upper_weights': edge_count, 'changes': workers, 'result': 2}
+    layout = {}
+    offset = 0
+    for name, typecode in SECTIONS:
+        length = lengths.get(name, size)
+        layout[name] = (typecode, offset, length)
+        offset += 8 * length
+    return layout
+
+def _views(buffer, layout):
+    return {
+        name: buffer[offset:offset + 8 * length].cast(typecode)
+        for name, (typecode, offset, length) in layout.items()
+    }
+
+def _release(views):
+    for view in views.values():
+        view.release()
+
+def _jacobi_worker(name, layout, worker, start, end, barrier, tolerance, max_iterations):
+    """
+    Runs the passes of one node range in a worker process.
+    """
+    import sys
+    from multiprocessing.shared_memory import SharedMemory
+    from threading import BrokenBarrierError
+
+    memory = SharedMemory(name=name)
+    views = _views(memory.buf, layout)
+    try:
+        buffers = ((views['lower_0'], views['upper_0']), (views['lower_1'], views['upper_1']))
+        changes = views['changes']
+        for iteration in range(max_iterations):
+            lower, upper = buffers[iteration % 2]
+            new_lower, new_upper = buffers[(iteration + 1) % 2]
+            changes[worker] = jacobi_sweep(start, end, views['indptr'], views['indices'], views['lower_weights'],
+                                           views['upper_weights'], views['base_lower'], views['base_upper'],
+                                           lower, upper, new_lower, new_upper)
+            barrier.wait()
+            # Every worker reads the same changes, so all of them stop after the same pass
+            converged = max(changes) <= tolerance
+            barrier.wait()
+            if converged or iteration + 1 == max_iterations:
+                if worker == 0:
+                    views['result'][0] = iteration + 1
+                    views['result'][1] = 1 if converged else 0
+                break
+    except BrokenBarrierError:
+        # Another worker failed, timed out or was killed, the parent reports it
+        sys.exit(1)
+    except BaseException:
+        barrier.abort()
+        raise
+    finally:
+        _release(views)
+        memory.close()
+
+def _solve_shared(system, tolerance, max_iterations, workers):
+    # Imported here, multiprocessing takes longer to import than most networks take to solve
+    import multiprocessing
+    from multiprocessing.connection import wait
+    from multiprocessing.shared_memory import SharedMemory
+
+    layout = _layout(system.size, system.edge_count, workers)
+    size = sum(8 * length for _, _, length in layout.values())
+    memory = SharedMemory(create=True, size=max(size, 8))
+    views = _views(memory.buf, layout)
+    try:
+        for name in ('indptr', 'indices', 'lower_weights', 'upper_weights', 'base_lower', 'base_upper'):
+            views[name][:] = getattr(system, name)
+        views['lower_0'][:] = system.lower
+        views['upper_0'][:] = system.upper
+
+        barrier = multiprocessing.Barrier(workers, timeout=BARRIER_TIMEOUT)
+        processes = [
+            multiprocessing.Process(target=_jacobi_worker,
+                                    args=(memory.name, layout, worker, start, end, barrier, tolerance,
+                                          max_iterations))
+            for worker, (start, end) in enumerate(system.partitions(workers))
+        ]
+        for process in processes:
+            process.start()
+
+        # A worker killed by a signal can't abort the barrier itself, so the others
+        # would wait for it until the timeout
+        running = {process.sentinel: process for process in processes}
+        while running:
+            for sentinel in wait(list(running)):
+                process = running.pop(sentinel)
+                process.join()
+                if process.exitcode != 0:
+                    barrier.abort()
+        exit_codes = [process.exitcode for process in processes]
+        if any(exit_codes):
+            raise RuntimeError(f'A worker process of the parallel solver failed, exit codes: {exit_codes}')
+
+        iterations, converged = views['result']
+        latest = iterations % 2
+        lower = array('d', views[f'lower_{latest}'])
+        upper = array('d', views[f'upper_{latest}'])
+        return lower, upper, iterations, bool(converged)
+    finally:
+        _release(views)
+        memory.close()
+        memory.unlink()
@@ -0,0 +1,167 @@
+import heapq
+import json
+from .graph import ownership_graph, dependency_lists, to_percentages
+from .scc import strongly_connected_components
+
+class PathIndex:
+    """
+    Top contributing ownership paths of every edge, explaining its real shares.
+
+    The paths of an edge are the paths its real share is summed from: for an upstream
+    edge the paths from its source up to the focus company, for a downstream edge the
+    paths from the focus company down to its target. The contribution of a path is the
+    product of its shares, an interval of lower and upper bound.
+
+    Paths are built node by node in dependency order, each node keeping only its top_k
+    paths in a bounded heap, ranked by the average of their bounds. Extending a path can
+    only lower its contribution, so paths whose upper bound drops below min_contribution
+    are cut off right away. Memory is bounded by top_k paths per node.
+
+    Within cross-holdings only paths visiting every company once are kept, and the paths
+    of a node are extended from the top paths of its neighbours, so they are the best
+    paths found rather than guaranteed to be the best possible.
+    """
+
+    def __init__(self, top_k=5, min_contribution=0.01):
+        """
+        Args:
+            top_k (int): Number of paths kept per edge
+            min_contribution (float): Smallest upper bound of a path in percentage points
+        """
+        if top_k < 1:
+            raise ValueError('top_k must be at least 1')
+        self.top_k = top_k
+        self.min_contribution = min_contribution
+        self.edge_paths = {}
+
+    def build(self, network):
+        """
+        Computes the top paths of every active edge of a network.
+
+        Args:
+            network (list): List of edges representing ownership relationships
+
+        Returns:
+            PathIndex: The index itself
+        """
+        graph = ownership_graph(network)
+        upstream_paths = self._node_paths(graph, upstream=True)
+        downstream_paths = self._node_paths(graph, upstream=False)
+
+        self.edge_paths = {}
+        for index, edge in enumerate(network):
+            if not graph.active[index]:
+                continue
+
+            source_depth = graph.source_depths[index]
+            target_depth = graph.target_depths[index]
+            if source_depth > 0 and target_depth >= 0:
+                node_paths = upstream_paths[graph.sources[index]]
+            elif target_depth < 0:
+                # Downstream paths are found from the target back to the focus company
+                node_paths = [
+                    (key, lower, upper, path[::-1])
+                    for key, lower, upper, path in downstream_paths[graph.targets[index]]
+                ]
+            elif source_depth == 0 or target_depth == 0:
+                lower, _, upper = graph.shares[index]
+                node_paths = [((lower + upper) / 2.0, lower, upper, (graph.sources[index], graph.targets[index]))]
+            else:
+                node_paths = []
+
+            self.edge_paths[edge['id']] = [
+                self._record(graph, lower, upper, path) for _, lower, upper, path in node_paths
+            ]
+        return self
+
+    def paths(self, edge_id):
+        """
+        Args:
+            edge_id: Edge ID
+
+        Returns:
+            list: Top paths of the edge as dicts with the entity IDs of the path from owner
+                  to owned and its lower, average and upper contribution in percent, best first
+        """
+        if edge_id not in self.edge_paths:
+            raise KeyError(f"No paths for edge id {edge_id!r}")
+        return self.edge_paths[edge_id]
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: JSON serializable index with one entry per active edge, in edge order
+        """
+        return {
+            'top_k': self.top_k,
+            'min_contribution': self.min_contribution,
+            'edges': [{'id': edge_id, 'paths': paths} for edge_id, paths in self.edge_paths.items()]
+        }
+
+    def write(self, f):
+        """
+        Writes the index as JSON.
+
+        Args:
+            f (file): Writable text file
+        """
+        json.dump(self.to_dict(), f, indent=2)
+        f.write('\n')
+
+    @staticmethod
+    def _record(graph, lower, upper, path):
+        lower, average, upper = to_percentages(lower, upper)
+        return {
+            'path': [graph.node_ids[node] for node in path],
+            'lower': lower,
+            'average': average,
+            'upper': upper
+        }
+
+    def _node_paths(self, graph, upstream):
+        """
+        Returns for every node its top (key, lower, upper, path) tuples, best first. Paths
+        run from the node to a focus node along its dependencies.
+        """
+        dependencies = dependency_lists(graph, upstream)
+        paths = [[] for _ in range(len(graph))]
+        for node in graph.focus:
+            paths[node] = [(1.0, 1.0, 1.0, (node,))]
+
+        for component in strongly_connected_components(dependencies):
+            if len(component) == 1 and all(neighbour != component[0] for neighbour, _, _ in dependencies[component[0]]):
+                if component[0] not in graph.focus:
+                    paths[component[0]] = self._extend(component[0], dependencies, paths)
+                continue
+
+            # Every pass can add one more company of the cycle to the paths
+            for _ in range(len(component) + 1):
+                changed = False
+                for node in component:
+                    node_paths = self._extend(node, dependencies, paths)
+                    if node_paths != paths[node]:
+                        paths[node] = node_paths
+                        changed = True
+                if not changed:
+                    break
+
+        return paths
+
+    def _extend(self, node, dependencies, paths):
+        """
+        Returns the top paths of a node from the top paths of the nodes it depends on.
+        """
+        min_contribution = self.min_contribution / 100.0
+        heap = []
+        for neighbour, share_lower, share_upper in dependencies[node]:
+            for _, lower, upper, path in paths[neighbour]:
+                upper *= share_upper
+                if upper < min_contribution or node in path:
+                    continue
+                lower *= share_lower
+                item = ((lower + upper) / 2.0, lower, upper, (node,) + path)
+                if len(heap) < self.top_k:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+        return sorted(heap, reverse=True)
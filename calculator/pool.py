@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+class WorkerPool:
+    """
+    Pool of worker processes for long running servers, which survives a worker that dies.
+
+    A worker killed in the middle of a calculation, e.g. because it ran out of memory,
+    breaks its ProcessPoolExecutor for good: the calculations running in it fail and so
+    does everything submitted later. The pool replaces a broken executor with a new one,
+    and runs the calculations that failed with it again one at a time in a process of
+    their own, so only the calculation that kills its worker fails.
+    """
+
+    def __init__(self, workers=None, initializer=None, executor=None):
+        """
+        Args:
+            workers (int): Number of worker processes, defaults to the number of CPUs
+            initializer (callable): Called in every worker process when it starts
+            executor (Executor): Pool to run calculations in instead of a new process pool
+        """
+        self.workers = workers
+        self.initializer = initializer
+        self.executor = executor or ProcessPoolExecutor(max_workers=workers, initializer=initializer)
+        self.owns_executor = executor is None
+        self.replacements = 0
+        self._isolated = None
+
+    async def run(self, function, *args):
+        """
+        Runs a function in a worker process.
+
+        Args:
+            function (callable): Function to run, has to be picklable
+            args: Arguments of the function
+
+        Returns:
+            Result of the function
+
+        Raises:
+            BrokenProcessPool: If the worker running the function dies
+        """
+        loop = asyncio.get_running_loop()
+        executor = self.executor
+        try:
+            return await loop.run_in_executor(executor, function, *args)
+        except BrokenProcessPool:
+            self._replace(executor)
+
+        # Every calculation in the broken executor failed, not only the one that killed it
+        if self._isolated is None:
+            self._isolated = asyncio.Lock()
+        async with self._isolated:
+            isolated = ProcessPoolExecutor(max_workers=1)
+            try:
+                return await loop.run_in_executor(isolated, function, *args)
+            finally:
+                isolated.shutdown(wait=False)
+
+    def _replace(self, executor):
+        # Only the first calculation failing with a broken executor replaces it
+        if executor is not self.executor:
+            return
+        logger.warning("A worker process died, starting a new pool.")
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=self.initializer)
+        self.replacements += 1
+        if self.owns_executor:
+            executor.shutdown(wait=False)
+        self.owns_executor = True
+
+    def shutdown(self):
+        """
+        Shuts the worker processes down, unless the executor was passed in.
+        """
+        if self.owns_executor:
+            self.executor.shutdown()
@@ -0,0 +1,104 @@
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RunObserver:
+    """
+    Receives progress of a calculation. Subclasses override the hooks they need.
+
+    Only the iterative engine reports single iterations, every engine reports the end
+    of the run, including runs served from the cache.
+    """
+
+    def on_iteration(self, iteration, max_change, edges_updated, upstream_seconds, downstream_seconds):
+        """
+        Called after every pass over the edges.
+
+        Args:
+            iteration (int): Number of the pass, starting at 1
+            max_change (float): Largest change of any bound in the pass, in percentage points
+            edges_updated (int): Number of edges whose real shares changed in the pass
+            upstream_seconds (float): Time spent processing upstream edges
+            downstream_seconds (float): Time spent processing downstream edges
+        """
+
+    def on_finish(self, engine, stats, seconds):
+        """
+        Called once the network is solved.
+
+        Args:
+            engine (str): Name of the engine
+            stats (dict): Run statistics with iterations and convergence
+            seconds (float): Total time of the calculation
+        """
+
+class RunProfile(RunObserver):
+    """
+    Observer that records every iteration and the result of the run for a JSON report.
+    """
+
+    def __init__(self):
+        self.engine = None
+        self.iterations = []
+        self.stats = {}
+        self.seconds = None
+
+    def on_iteration(self, iteration, max_change, edges_updated, upstream_seconds, downstream_seconds):
+        self.iterations.append({
+            'iteration': iteration,
+            'max_change': max_change,
+            'edges_updated': edges_updated,
+            'upstream_seconds': round(upstream_seconds, 6),
+            'downstream_seconds': round(downstream_seconds, 6)
+        })
+
+    def on_finish(self, engine, stats, seconds):
+        self.engine = engine
+        self.stats = dict(stats)
+        self.seconds = round(seconds, 6)
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: Engine, convergence, error bound of pruned runs, total and per-phase timings and the iterations
+        """
+        return {
+            'engine': self.engine,
+            'converged': self.stats.get('converged'),
+            'iterations': self.stats.get('iterations'),
+            'cache': self.stats.get('cache'),
+            'error_bound': self.stats.get('error_bound'),
+            'seconds': self.seconds,
+            'upstream_seconds': round(sum(entry['upstream_seconds'] for entry in self.iterations), 6),
+            'downstream_seconds': round(sum(entry['downstream_seconds'] for entry in self.iterations), 6),
+            'passes': self.iterations
+        }
+
+    def write(self, f):
+        """
+        Writes the report as JSON.
+
+        Args:
+            f (file): Writable text file
+        """
+        json.dump(self.to_dict(), f, indent=2)
+        f.write('\n')
+
+def log_convergence(engine, stats):
+    """
+    Logs whether a run converged, with a warning if it did not, and the error bound of a pruned run.
+
+    Args:
+        engine (str): Name of the engine
+        stats (dict): Run statistics with iterations and convergence
+    """
+    if 'converged' not in stats:
+        return
+    if stats['converged']:
+        logger.info("Converged after %d iterations (%s engine).", stats['iterations'], engine)
+    else:
+        logger.warning("Did not converge within %d iterations (%s engine), results may be inaccurate.",
+                       stats['iterations'], engine)
+    if 'error_bound' in stats:
+        logger.info("Pruned results are at most %g percentage points below the exact ones.", stats['error_bound'])
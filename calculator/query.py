@@ -0,0 +1,183 @@
+from array import array
+from .graph import dependency_lists, edge_real_shares, to_percentages
+from .scc import strongly_connected_components, solve_in_order
+from .validation import normalize_network
+
+class NetworkHandle:
+    """
+    Network opened for queries of single entities and edges.
+
+    Nothing is solved up front. A query solves only the nodes the requested value depends
+    on, directly or indirectly, component by component like the scc engine. Solved node
+    values are final, so they are kept and reused by later queries, which then only solve
+    the nodes that are new to them.
+    """
+
+    def __init__(self, network, tolerance=1e-12, max_iterations=1000):
+        """
+        Args:
+            network (list): List of edges representing ownership relationships
+            tolerance (float): Maximum absolute change within a component at convergence
+            max_iterations (int): Maximum number of passes over a single component
+        """
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.edges = normalize_network(network)
+        self.graph = self.edges.graph
+        self.edge_index = {edge['id']: index for index, edge in enumerate(self.edges)}
+        self.depths = {}
+        for source, target, source_depth, target_depth in zip(self.graph.sources, self.graph.targets,
+                                                              self.graph.source_depths, self.graph.target_depths):
+            self.depths.setdefault(source, source_depth)
+            self.depths.setdefault(target, target_depth)
+        self.queries = 0
+        # Per direction (True for upstream): dependency lists, values and solved flags, built on first use
+        self.dependencies = {}
+        self.values = {}
+        self.solved = {}
+
+    def node(self, entity_id):
+        """
+        Args:
+            entity_id: Entity ID
+
+        Returns:
+            int: Node index of the entity
+        """
+        node = self.graph.node_index.get(entity_id)
+        if node is None:
+            raise KeyError(f"Unknown entity id {entity_id!r}")
+        return node
+
+    def node_values(self, node, upstream):
+        """
+        Returns the solved value of a node, solving what it depends on if needed.
+
+        Args:
+            node (int): Node index
+            upstream (bool): Whether to return the upstream or the downstream value
+
+        Returns:
+            tuple: (lower, upper) value of the node as fractions
+        """
+        self.queries += 1
+        if upstream not in self.solved:
+            self._prepare(upstream)
+        lower, upper = self.values[upstream]
+        if not self.solved[upstream][node]:
+            self._solve(node, upstream)
+        return lower[node], upper[node]
+
+    def real_shares(self, edge_id):
+        """
+        Args:
+            edge_id: Edge ID
+
+        Returns:
+            tuple: (lower, average, upper) percentages of the edge like the scc engine
+                   would calculate them, or None if it was left out of the calculation
+        """
+        index = self.edge_index.get(edge_id)
+        if index is None:
+            return None
+
+        graph = self.graph
+        if graph.source_depths[index] > 0 and graph.target_depths[index] >= 0:
+            node, upstream = graph.sources[index], True
+        elif graph.target_depths[index] < 0:
+            node, upstream = graph.targets[index], False
+        else:
+            return edge_real_shares(graph, index, None, None)
+        return to_percentages(*self.node_values(node, upstream))
+
+    def stats(self):
+        """
+        Returns:
+            dict: Number of queries, nodes and solved nodes per direction
+        """
+        return {
+            'queries': self.queries,
+            'nodes': len(self.graph),
+            'solved_upstream': sum(self.solved.get(True, ())),
+            'solved_downstream': sum(self.solved.get(False, ()))
+        }
+
+    def _prepare(self, upstream):
+        size = len(self.graph)
+        lower = array('d', [0.0]) * size
+        upper = array('d', [0.0]) * size
+        for node in self.graph.focus:
+            lower[node] = 1.0
+            upper[node] = 1.0
+        self.dependencies[upstream] = dependency_lists(self.graph, upstream)
+        self.values[upstream] = (lower, upper)
+        self.solved[upstream] = bytearray(size)
+
+    def _solve(self, node, upstream):
+        """
+        Solves a node and every unsolved node it depends on, using solved values as they are.
+        """
+        dependencies = self.dependencies[upstream]
+        solved = self.solved[upstream]
+        region = {node: 0}
+        stack = [node]
+        while stack:
+            for neighbour, _, _ in dependencies[stack.pop()]:
+                if not solved[neighbour] and neighbour not in region:
+                    region[neighbour] = len(region)
+                    stack.append(neighbour)
+
+        nodes = list(region)
+        local_dependencies = [
+            [(region[neighbour],) for neighbour, _, _ in dependencies[member] if neighbour in region]
+            for member in nodes
+        ]
+        components = [
+            [nodes[position] for position in component]
+            for component in strongly_connected_components(local_dependencies)
+        ]
+        lower, upper = self.values[upstream]
+        solve_in_order(components, dependencies, self.graph.focus, lower, upper, self.tolerance,
+                       self.max_iterations)
+        for member in nodes:
+            solved[member] = 1
+
+def open_network(network, max_iterations=None, tolerance=None):
+    """
+    Opens a network for queries without calculating it.
+
+    Args:
+        network (list): List of edges representing ownership relationships
+        max_iterations (int): Maximum number of passes over a single component, 1000 if None
+        tolerance (float): Maximum change in percentage points at convergence, 1e-10 if None
+
+    Returns:
+        NetworkHandle: Handle to pass to real_share
+    """
+    return NetworkHandle(network,
+                         tolerance / 100.0 if tolerance is not None else 1e-12,
+                         max_iterations if max_iterations is not None else 1000)
+
+def real_share(handle, entity_id, upstream=None):
+    """
+    Calculates the real ownership of a single entity, reusing what earlier queries solved.
+
+    Upstream, this is the share the entity holds in the focus company, the real share of
+    its edges towards the focus company. Downstream, it is the share the focus company holds
+    in the entity, the real share of the edges into it.
+
+    Args:
+        handle (NetworkHandle): Network opened with open_network
+        entity_id: Entity ID
+        upstream (bool): Direction, from the depth of the entity if None: upstream for
+                         owners at positive depths, downstream for subsidiaries
+
+    Returns:
+        tuple: (lower, average, upper) percentages, 100% for a focus company
+    """
+    node = handle.node(entity_id)
+    if node in handle.graph.focus:
+        return to_percentages(1.0, 1.0)
+    if upstream is None:
+        upstream = handle.depths[node] >= 0
+    return to_percentages(*handle.node_values(node, upstream))
@@ -0,0 +1,250 @@
+from array import array
+from .graph import to_percentages
+from .helpers import parse_share_string_cached, pruning_threshold, error_bound
+from .scc import strongly_connected_components
+from .streaming import iter_records
+
+class RegistryGraph:
+    """
+    Registry-wide ownership graph without depth fields, shared by many focus companies.
+
+    Edges only need id, source, target, share and active. Which edges lead up to a focus
+    company and which lead down from it follows from the edge directions. The strongly
+    connected components of the graph are computed once and reused by every focus, and
+    results are cached per focus company.
+    """
+
+    def __init__(self, edges):
+        """
+        Args:
+            edges (list): List of edges, depth fields are ignored
+        """
+        self.node_ids = []
+        self.node_index = {}
+        # holdings[n]: (owned node, lower, upper) for every company n holds shares in
+        self.holdings = []
+        # owners[n]: (owner node, lower, upper) for every company holding shares in n
+        self.owners = []
+        self._components = {}
+        self._results = {}
+
+        for edge in edges:
+            source = self.add_node(edge['source'])
+            target = self.add_node(edge['target'])
+            if not edge['active']:
+                continue
+
+            lower, _, upper = parse_share_string_cached(edge['share'])
+            self.holdings[source].append((target, lower, upper))
+            self.owners[target].append((source, lower, upper))
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    def add_node(self, node_id):
+        """
+        Returns the index of an entity, adding it if it is not known yet.
+
+        Args:
+            node_id: Entity ID
+
+        Returns:
+            int: Node index
+        """
+        index = self.node_index.get(node_id)
+        if index is None:
+            index = len(self.node_ids)
+            self.node_index[node_id] = index
+            self.node_ids.append(node_id)
+            self.holdings.append([])
+            self.owners.append([])
+        return index
+
+    def components(self, upstream):
+        """
+        Returns the strongly connected components in dependency order, computed once.
+
+        Args:
+            upstream (bool): Order for owners of a focus (owned companies first) or for
+                             holdings of a focus (owners first)
+
+        Returns:
+            list: Components as lists of node indices
+        """
+        if upstream not in self._components:
+            dependencies = self.holdings if upstream else self.owners
+            self._components[upstream] = strongly_connected_components(dependencies)
+        return self._components[upstream]
+
+    def real_ownership(self, focus_ids, tolerance=1e-12, max_iterations=1000, min_contribution=None):
+        """
+        Calculates real ownership for many focus companies.
+
+        Focus companies that were not computed before are solved together in one pass
+        over the components per direction. Every node carries the values of all focus
+        companies it is connected to, so shared owners and subsidiaries are visited once.
+
+        With min_contribution, values whose upper bound is below it are not carried
+        further. On large registries most values are tiny stakes passed on through many
+        layers, so this saves most of the work. Such entities are left out of the result,
+        and every focus gets an 'error_bound' per direction: no value, including the left
+        out ones, is more than that many percentage points below the value without pruning.
+
+        Args:
+            focus_ids (list): Entity IDs of the focus companies
+            tolerance (float): Maximum absolute change within a component at convergence
+            max_iterations (int): Maximum number of passes over a single component
+            min_contribution (float): Smallest upper bound in percentage points a value needs
+                                      to be passed on, nothing is pruned if None
+
+        Returns:
+            dict: For every focus ID a dict with 'owners', the real ownership every owner has of
+                  the focus company, and 'holdings', the real ownership the focus company has of
+                  every subsidiary. Both map entity IDs to (lower, average, upper) percentages.
+                  With min_contribution also 'error_bound', a dict with the bound in percentage
+                  points of 'owners' and 'holdings'.
+        """
+        for focus_id in focus_ids:
+            if focus_id not in self.node_index:
+                raise KeyError(f"Unknown focus company {focus_id!r}")
+        threshold = pruning_threshold(min_contribution)
+
+        # Pruned results are cached apart from exact ones
+        missing = [focus_id for focus_id in dict.fromkeys(focus_ids)
+                   if (focus_id, min_contribution) not in self._results]
+        if missing:
+            focus_nodes = {self.node_index[focus_id] for focus_id in missing}
+            owner_values, owner_errors = self._solve(focus_nodes, True, tolerance, max_iterations, threshold)
+            holding_values, holding_errors = self._solve(focus_nodes, False, tolerance, max_iterations, threshold)
+            owners = self._collect(owner_values)
+            holdings = self._collect(holding_values)
+            if threshold is not None:
+                # The bounds hold for every focus solved together, rounded up so they stay bounds
+                bounds = {
+                    'owners': error_bound(max(owner_errors, default=0.0)),
+                    'holdings': error_bound(max(holding_errors, default=0.0))
+                }
+            for focus_id in missing:
+                focus = self.node_index[focus_id]
+                result = {
+                    'owners': owners.get(focus, {}),
+                    'holdings': holdings.get(focus, {})
+                }
+                if threshold is not None:
+                    result['error_bound'] = dict(bounds)
+                self._results[(focus_id, min_contribution)] = result
+
+        return {focus_id: self._results[(focus_id, min_contribution)] for focus_id in focus_ids}
+
+    def _solve(self, focus_nodes, upstream, tolerance, max_iterations, threshold=None):
+        """
+        Solves one direction for a set of focus nodes in dependency order.
+
+        Returns:
+            tuple: (values, errors), for every node a dict of focus node to [lower, upper]
+                   fractions, and the error bound of its values if threshold is given
+        """
+        dependencies = self.holdings if upstream else self.owners
+        values = [None] * len(self)
+        errors = array('d', [0.0]) * len(self) if threshold is not None else None
+
+        for component in self.components(upstream):
+            if len(component) == 1:
+                node = component[0]
+                if all(neighbour != node for neighbour, _, _ in dependencies[node]):
+                    values[node] = self._evaluate(node, dependencies, values, focus_nodes, threshold, errors)[0]
+                    continue
+
+            for _ in range(max_iterations):
+                max_change = 0.0
+                for node in component:
+                    values[node], change = self._evaluate(node, dependencies, values, focus_nodes, threshold, errors)
+                    max_change = max(max_change, change)
+                if max_change <= tolerance:
+                    break
+
+        return values, errors
+
+    @staticmethod
+    def _evaluate(node, dependencies, values, focus_nodes, threshold=None, errors=None):
+        """
+        Recomputes the values of a node for every focus node it is connected to.
+
+        With a threshold, values whose upper bound is below it are dropped instead of being
+        propagated further, and errors[node] is set to a bound on how much any value of
+        the node, dropped or not, is below the value it would have without dropping.
+
+        Returns:
+            tuple: (new values or None, largest absolute change)
+        """
+        totals = {}
+        error = 0.0
+        for neighbour, lower_share, upper_share in dependencies[node]:
+            if errors is not None:
+                error += upper_share * errors[neighbour]
+            neighbour_values = values[neighbour]
+            if not neighbour_values:
+                continue
+            for focus, (lower, upper) in neighbour_values.items():
+                total = totals.get(focus)
+                if total is None:
+                    totals[focus] = [lower_share * lower, upper_share * upper]
+                else:
+                    total[0] += lower_share * lower
+                    total[1] += upper_share * upper
+
+        for total in totals.values():
+            total[0] = min(1.0, total[0])
+            total[1] = min(1.0, total[1])
+        change = 0.0
+        if threshold is not None:
+            # The exact value of a dropped focus is at most its upper bound plus the error so far
+            dropped = [focus for focus, (_, upper) in totals.items() if upper < threshold]
+            if dropped:
+                error += max(totals[focus][1] for focus in dropped)
+                for focus in dropped:
+                    del totals[focus]
+            error = min(1.0, error)
+            change = abs(error - errors[node])
+            errors[node] = error
+        if node in focus_nodes:
+            # A focus company fully owns itself
+            totals[node] = [1.0, 1.0]
+
+        previous = values[node] or {}
+        for focus in totals.keys() | previous.keys():
+            lower, upper = totals.get(focus, (0.0, 0.0))
+            previous_lower, previous_upper = previous.get(focus, (0.0, 0.0))
+            change = max(change, abs(lower - previous_lower), abs(upper - previous_upper))
+
+        return totals or None, change
+
+    def _collect(self, values):
+        """
+        Groups solved values by focus node as rounded percentages, excluding the focus itself.
+
+        Returns:
+            dict: For every focus node a dict of entity ID to (lower, average, upper) percentages
+        """
+        results = {}
+        for node, node_values in enumerate(values):
+            if not node_values:
+                continue
+            for focus, (lower, upper) in node_values.items():
+                if node == focus:
+                    continue
+                results.setdefault(focus, {})[self.node_ids[node]] = to_percentages(lower, upper)
+        return results
+
+def load_registry(input_file):
+    """
+    Loads a registry graph from a JSON or NDJSON file of edges, one edge at a time.
+
+    Args:
+        input_file (str): Path to input JSON or NDJSON file
+
+    Returns:
+        RegistryGraph: The registry graph
+    """
+    with open(input_file, 'r') as f:
+        return RegistryGraph(iter_records(f))
@@ -0,0 +1,293 @@
+from array import array
+from .graph import ownership_graph, ACCELERATIONS, aitken_extrapolate, assign_real_shares, dependency_lists
+from .helpers import record_run_stats, record_error_bound, pruning_threshold
+from .parallel import PARALLEL_MIN_NODES, ComponentSystem, solve_jacobi
+
+def strongly_connected_components(dependencies):
+    """
+    Finds the strongly connected components of a dependency graph with Tarjan's algorithm.
+
+    Components are returned in dependency order: every component comes after all the
+    components it depends on, which is a topological order of the condensation.
+
+    Args:
+        dependencies (list): For every node a list of tuples starting with a node it depends on
+
+    Returns:
+        list: Components as lists of node indices
+    """
+    size = len(dependencies)
+    unvisited = -1
+    order = array('l', [unvisited]) * size
+    lowlink = array('l', [0]) * size
+    on_stack = bytearray(size)
+    stack = []
+    components = []
+    counter = 0
+
+    for root in range(size):
+        if order[root] != unvisited:
+            continue
+
+        # Iterative depth-first search, every frame is (node, next dependency position)
+        order[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        frames = [(root, 0)]
+
+        while frames:
+            node, position = frames[-1]
+            node_dependencies = dependencies[node]
+
+            if position < len(node_dependencies):
+                frames[-1] = (node, position + 1)
+                neighbour = node_dependencies[position][0]
+                if order[neighbour] == unvisited:
+                    order[neighbour] = lowlink[neighbour] = counter
+                    counter += 1
+                    stack.append(neighbour)
+                    on_stack[neighbour] = 1
+                    frames.append((neighbour, 0))
+                elif on_stack[neighbour]:
+                    lowlink[node] = min(lowlink[node], order[neighbour])
+                continue
+
+            frames.pop()
+            if frames:
+                parent = frames[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+            if lowlink[node] == order[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = 0
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+
+    return components
+
+def evaluate_node(node, dependencies, lower, upper, threshold=None, errors=None):
+    """
+    Recomputes the ownership value of a node from the values it depends on.
+
+    With a threshold, a value whose upper bound is below it is dropped to zero instead of
+    being passed on, and errors[node] is set to a bound on how much the value of the node
+    is below the value it would have without dropping.
+
+    Args:
+        node (int): Node index
+        dependencies (list): Dependency lists from dependency_lists
+        lower (array): Lower bound values, updated in place
+        upper (array): Upper bound values, updated in place
+        threshold (float): Smallest upper bound as a fraction a value needs to be kept, nothing is dropped if None
+        errors (array): Error bounds as fractions, updated in place, needed with a threshold
+
+    Returns:
+        float: Largest absolute change of the lower and upper bound, and of the error bound
+    """
+    lower_total = 0.0
+    upper_total = 0.0
+    for neighbour, lower_share, upper_share in dependencies[node]:
+        lower_total += lower_share * lower[neighbour]
+        upper_total += upper_share * upper[neighbour]
+
+    lower_total = min(1.0, lower_total)
+    upper_total = min(1.0, upper_total)
+    change = 0.0
+    if threshold is not None:
+        error = 0.0
+        for neighbour, _, upper_share in dependencies[node]:
+            error += upper_share * errors[neighbour]
+        if upper_total < threshold:
+            # The exact value is at most the dropped upper bound plus the error so far
+            error += upper_total
+            lower_total = 0.0
+            upper_total = 0.0
+        error = min(1.0, error)
+        change = abs(error - errors[node])
+        errors[node] = error
+
+    change = max(change, abs(lower_total - lower[node]), abs(upper_total - upper[node]))
+    lower[node] = lower_total
+    upper[node] = upper_total
+    return change
+
+def solve_in_order(components, dependencies, focus, lower, upper, tolerance=1e-12, max_iterations=1000,
+                   acceleration=None, workers=None, threshold=None, errors=None):
+    """
+    Solves components in the given order, updating the node values in place.
+
+    Single nodes without a self-loop are evaluated exactly once. Non-trivial components
+    are iterated, each until its own values stop changing. Focus nodes are left as they are.
+
+    With workers, non-trivial components are iterated with Jacobi updates instead, see
+    parallel.solve_jacobi, and components of at least PARALLEL_MIN_NODES nodes are split
+    across that many worker processes. Results are the same for any number of workers.
+
+    Args:
+        components (list): Components in dependency order
+        dependencies (list): Dependency lists indexable by node
+        focus (set): Focus nodes
+        lower (array): Lower bound values, updated in place
+        upper (array): Upper bound values, updated in place
+        tolerance (float): Maximum absolute change within a component at convergence
+        max_iterations (int): Maximum number of passes over a single component
+        acceleration (str): 'aitken' to extrapolate the values of a component from its last three passes
+        workers (int): Number of worker processes for Jacobi updates, Gauss-Seidel updates in this process if None
+        threshold (float): Drop values with a smaller upper bound, see evaluate_node
+        errors (array): Error bounds of the node values, updated in place, needed with a threshold
+
+    Returns:
+        tuple: (most passes any component needed, whether every component converged)
+    """
+    if acceleration is not None and acceleration not in ACCELERATIONS:
+        raise ValueError(f"Unknown acceleration '{acceleration}', expected one of: {', '.join(ACCELERATIONS)}")
+    if acceleration is not None and workers is not None:
+        raise ValueError('Acceleration is not supported with parallel workers')
+    if threshold is not None and (acceleration is not None or workers is not None):
+        raise ValueError('Pruning is not supported with acceleration or parallel workers')
+
+    iterations = 1
+    converged = True
+
+    for component in components:
+        if len(component) == 1:
+            node = component[0]
+            if node in focus:
+                continue
+            if all(neighbour != node for neighbour, _, _ in dependencies[node]):
+                # A node depends on one or two others, fewer than a kernel call would pay off for
+                evaluate_node(node, dependencies, lower, upper, threshold, errors)
+                continue
+
+        if workers is not None:
+            system = ComponentSystem(component, dependencies, lower, upper)
+            component_lower, component_upper, component_iterations, component_converged = solve_jacobi(
+                system, tolerance, max_iterations, workers if len(component) >= PARALLEL_MIN_NODES else 1)
+            for position, node in enumerate(component):
+                lower[node] = component_lower[position]
+                upper[node] = component_upper[position]
+            iterations = max(iterations, component_iterations)
+            converged = converged and component_converged
+            continue
+
+        passes = 0
+        history = []
+        for _ in range(max_iterations):
+            passes += 1
+            max_change = 0.0
+            for node in component:
+                max_change = max(max_change, evaluate_node(node, dependencies, lower, upper, threshold, errors))
+            if max_change <= tolerance:
+                break
+
+            if acceleration is not None:
+                history.append(({node: lower[node] for node in component},
+                                {node: upper[node] for node in component}))
+                if len(history) == 3:
+                    extrapolated_lower = aitken_extrapolate(component, [values for values, _ in history], lower)
+                    extrapolated_upper = aitken_extrapolate(component, [values for _, values in history], upper)
+                    # Extrapolated values start a new history, otherwise the window slides
+                    history = [] if extrapolated_lower or extrapolated_upper else history[1:]
+        else:
+            converged = False
+        iterations = max(iterations, passes)
+
+    return iterations, converged
+
+def solve_components(graph, dependencies, tolerance=1e-12, max_iterations=1000, stats=None, acceleration=None,
+                     workers=None, threshold=None):
+    """
+    Solves one direction of the ownership graph component by component.
+
+    Components are visited in dependency order. Single nodes without a self-loop are
+    evaluated exactly once, so acyclic graphs are solved in a single O(E) pass. Only
+    non-trivial components are iterated, each until its own values stop changing.
+
+    Args:
+        graph (OwnershipGraph): Ownership graph
+        dependencies (list): Dependency lists from dependency_lists
+        tolerance (float): Maximum absolute change within a component at convergence
+        max_iterations (int): Maximum number of passes over a single component
+        stats (dict): Run statistics to update with the most passes any component needed
+        acceleration (str): Optional acceleration of cyclic components, one of ACCELERATIONS
+        workers (int): Number of worker processes for large cyclic components, see solve_in_order
+        threshold (float): Drop values with a smaller upper bound and record the error bound in stats,
+                           see evaluate_node
+
+    Returns:
+        tuple: (lower, upper) arrays of node values as fractions
+    """
+    size = len(dependencies)
+    lower = array('d', [0.0]) * size
+    upper = array('d', [0.0]) * size
+    for node in graph.focus:
+        lower[node] = 1.0
+        upper[node] = 1.0
+    errors = array('d', [0.0]) * size if threshold is not None else None
+
+    iterations, converged = solve_in_order(strongly_connected_components(dependencies), dependencies,
+                                           graph.focus, lower, upper, tolerance, max_iterations, acceleration,
+                                           workers, threshold, errors)
+
+    record_run_stats(stats, iterations, converged)
+    if errors is not None:
+        record_error_bound(stats, max(errors, default=0.0))
+    return lower, upper
+
+def solve_graph_scc(graph, stats=None, tolerance=1e-12, max_iterations=1000, acceleration=None, workers=None,
+                    threshold=None):
+    """
+    Solves the upstream and downstream node values of a graph component by component.
+
+    Args:
+        graph (OwnershipGraph): Ownership graph
+        stats (dict): If given, filled with the number of iterations and whether the run converged
+        tolerance (float): Maximum absolute change within a component at convergence
+        max_iterations (int): Maximum number of passes over a single component
+        acceleration (str): Optional acceleration of cyclic components, one of ACCELERATIONS
+        workers (int): Number of worker processes for large cyclic components, see solve_in_order
+        threshold (float): Drop values with a smaller upper bound as a fraction, see evaluate_node
+
+    Returns:
+        tuple: (upstream_values, downstream_values), each a (lower, upper) pair of arrays
+    """
+    upstream_values = solve_components(graph, dependency_lists(graph, upstream=True), tolerance,
+                                       max_iterations, stats, acceleration, workers, threshold)
+    downstream_values = solve_components(graph, dependency_lists(graph, upstream=False), tolerance,
+                                         max_iterations, stats, acceleration, workers, threshold)
+    return upstream_values, downstream_values
+
+def solve_scc(network, stats=None, max_iterations=None, tolerance=None, acceleration=None, workers=None,
+              min_contribution=None):
+    """
+    Calculates the real ownership shares with the strongly connected component engine.
+
+    Args:
+        network (list): List of edges representing ownership relationships
+        stats (dict): If given, filled with the number of iterations and whether the run converged
+        max_iterations (int): Maximum number of passes over a single component, 1000 if None
+        tolerance (float): Maximum change in percentage points at convergence, 1e-10 if None
+        acceleration (str): Optional acceleration of cyclic components, one of ACCELERATIONS
+        workers (int): Number of worker processes for large cyclic components, see solve_in_order
+        min_contribution (float): Smallest upper bound in percentage points a value needs to be passed on,
+                                  nothing is pruned if None. The error bound is recorded in stats.
+
+    Returns:
+        list: Updated network with real_lower_share, real_average_share, and real_upper_share values
+    """
+    threshold = pruning_threshold(min_contribution)
+    graph = ownership_graph(network)
+    upstream_values, downstream_values = solve_graph_scc(
+        graph, stats,
+        tolerance / 100.0 if tolerance is not None else 1e-12,
+        max_iterations if max_iterations is not None else 1000,
+        acceleration,
+        workers,
+        threshold
+    )
+    return assign_real_shares(graph, upstream_values, downstream_values)
@@ -0,0 +1,337 @@
+import json
+import logging
+import math
+import time
+try:
+    import numpy
+except ImportError:
+    # simulate raises without NumPy
+    numpy = None
+from .helpers import record_run_stats
+from .scc import strongly_connected_components
+from .validation import normalize_network
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PERCENTILES = (5, 50, 95)
+
+# Percentage points, a hundredth of the output precision. Sampling spreads results far
+# more than this, so iterating every scenario to 1e-10 like the engines only costs time.
+DEFAULT_TOLERANCE = 1e-4
+
+# Upper bound of scenarios x edges sampled and solved at once, 32 MB of float64 values
+BATCH_ELEMENTS = 1 << 22
+
+# Sampled values are kept as hundredths of a percent, the precision of the output
+SCALE = 10000
+
+class ScenarioSystem:
+    """
+    One direction of an ownership graph, solved for a batch of sampled scenarios at once.
+
+    Nodes are grouped into levels of the condensation: a node only depends on nodes of
+    lower levels or of its own strongly connected component. Every level is evaluated
+    for all scenarios together with gathers and segment sums over scenarios x entries
+    matrices. Nodes are numbered level by level, so every level writes one contiguous
+    slice of values. Acyclic levels are exact after one evaluation, levels with cycles
+    are iterated until their values stop changing.
+    """
+
+    def __init__(self, graph, edge_indices, upstream):
+        """
+        Args:
+            graph (OwnershipGraph): Ownership graph
+            edge_indices (list): Active edge indices of the direction
+            upstream (bool): Whether the edges are upstream edges
+        """
+        self.size = len(graph)
+        dependencies = [[] for _ in range(self.size)]
+        entries = [[] for _ in range(self.size)]
+        for index in edge_indices:
+            if upstream:
+                row, column = graph.sources[index], graph.targets[index]
+            else:
+                row, column = graph.targets[index], graph.sources[index]
+            if row in graph.focus:
+                continue
+            dependencies[row].append((column,))
+            entries[row].append((column, index))
+
+        levels = [0] * self.size
+        grouped = {}
+        for component in strongly_connected_components(dependencies):
+            members = set(component)
+            cyclic = len(component) > 1 or any(column == component[0] for column, in dependencies[component[0]])
+            level = 0
+            for node in component:
+                for column, in dependencies[node]:
+                    if column not in members:
+                        level = max(level, levels[column] + 1)
+            for node in component:
+                levels[node] = level
+            nodes, level_cyclic = grouped.get(level, ([], False))
+            nodes.extend(node for node in component if entries[node])
+            grouped[level] = (nodes, level_cyclic or cyclic)
+
+        # Nodes with entries in level order, then the focus nodes and nodes without entries
+        order = [node for level in sorted(grouped) for node in grouped[level][0]]
+        self.focus_start = len(order)
+        order.extend(sorted(graph.focus))
+        order.extend(node for node in range(self.size) if node not in graph.focus and not entries[node])
+        position = [0] * self.size
+        for index, node in enumerate(order):
+            position[node] = index
+        self.positions = numpy.array(position, dtype=numpy.intp)
+        self.focus_end = self.focus_start + len(graph.focus)
+
+        # (first position, end position, entry columns, entry edges, row starts, cyclic) per level
+        self.blocks = []
+        first = 0
+        for level in sorted(grouped):
+            nodes, cyclic = grouped[level]
+            if not nodes:
+                continue
+            columns, edges, starts = [], [], []
+            for node in nodes:
+                starts.append(len(columns))
+                for column, index in entries[node]:
+                    columns.append(position[column])
+                    edges.append(index)
+            self.blocks.append((
+                first,
+                first + len(nodes),
+                numpy.array(columns, dtype=numpy.intp),
+                numpy.array(edges, dtype=numpy.intp),
+                numpy.array(starts, dtype=numpy.intp),
+                cyclic
+            ))
+            first += len(nodes)
+
+    def solve(self, shares, tolerance=1e-12, max_iterations=1000):
+        """
+        Solves x = min(1, A x) for every scenario, with focus nodes pinned to 1.
+
+        Args:
+            shares (ndarray): Scenarios x edges matrix of exact shares as fractions
+            tolerance (float): Maximum absolute change within a level at convergence
+            max_iterations (int): Maximum number of evaluations of a level with cycles
+
+        Returns:
+            tuple: (scenarios x nodes matrix of values, most evaluations of a level, whether all converged)
+        """
+        values = numpy.zeros((len(shares), self.size))
+        values[:, self.focus_start:self.focus_end] = 1.0
+        iterations = 1
+        converged = True
+
+        for first, end, columns, edges, starts, cyclic in self.blocks:
+            weights = numpy.take(shares, edges, axis=1)
+            passes = 0
+            for _ in range(max_iterations if cyclic else 1):
+                passes += 1
+                totals = numpy.add.reduceat(weights * numpy.take(values, columns, axis=1), starts, axis=1)
+                numpy.minimum(totals, 1.0, out=totals)
+                max_change = float(numpy.max(numpy.abs(totals - values[:, first:end]))) if cyclic else 0.0
+                values[:, first:end] = totals
+                if max_change <= tolerance:
+                    break
+            else:
+                converged = False
+            iterations = max(iterations, passes)
+
+        return numpy.take(values, self.positions, axis=1), iterations, converged
+
+def share_groups(graph):
+    """
+    Groups the active edges by the entity whose shares they hold.
+
+    Returns:
+        tuple: (edge indices ordered by group, start of every group in that order, group of every edge)
+    """
+    targets = numpy.array(graph.targets, dtype=numpy.intp)
+    _, groups = numpy.unique(targets, return_inverse=True)
+    order = numpy.argsort(groups, kind='stable')
+    starts = numpy.flatnonzero(numpy.r_[True, groups[order][1:] != groups[order][:-1]]) if len(order) else order
+    return order, starts, groups
+
+def sample_shares(graph, count, generator, groups=None):
+    """
+    Draws exact shares of every edge for a number of consistent scenarios.
+
+    Every share is drawn uniformly from the range of its share string, "<5%" from 0-5%.
+    Where the shares drawn for the owners of an entity add up to more than 100%, the part
+    of every share above its lower bound is scaled down by the same factor so the shares
+    add up to 100%, so no scenario has an entity owned more than once over.
+
+    Args:
+        graph (OwnershipGraph): Ownership graph with active edges only
+        count (int): Number of scenarios
+        generator (numpy.random.Generator): Source of random numbers
+        groups (tuple): Result of share_groups, computed if None
+
+    Returns:
+        ndarray: Scenarios x edges matrix of exact shares as fractions
+    """
+    bounds = numpy.array([(lower, upper) for lower, _, upper in graph.shares], dtype=numpy.float64).reshape(-1, 2)
+    lower, upper = bounds[:, 0], bounds[:, 1]
+    shares = lower + (upper - lower) * generator.random((count, len(bounds)))
+    if not len(bounds):
+        return shares
+
+    order, starts, group = groups if groups is not None else share_groups(graph)
+    totals = numpy.add.reduceat(numpy.take(shares, order, axis=1), starts, axis=1)
+    lower_totals = numpy.add.reduceat(lower[order], starts)
+    excess = totals - lower_totals
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        factors = numpy.where(totals > 1.0, numpy.clip((1.0 - lower_totals) / excess, 0.0, 1.0), 1.0)
+    return lower + (shares - lower) * numpy.take(factors, group, axis=1)
+
+def output_columns(graph):
+    """
+    Maps every edge to the value that is its real share, like graph.edge_real_shares.
+
+    Edges of the same entity and direction show the same value, so it is kept once.
+
+    Returns:
+        tuple: (column of every edge, number of columns, and for 'upstream', 'downstream' and
+               'share' the columns and the nodes or edges whose values they show)
+    """
+    columns = {}
+    edge_columns = []
+    for index in range(graph.edge_count):
+        source_depth, target_depth = graph.source_depths[index], graph.target_depths[index]
+        if source_depth > 0 and target_depth >= 0:
+            key = ('upstream', graph.sources[index])
+        elif target_depth < 0:
+            key = ('downstream', graph.targets[index])
+        elif source_depth == 0 or target_depth == 0:
+            key = ('share', index)
+        else:
+            key = ('zero', None)
+        edge_columns.append(columns.setdefault(key, len(columns)))
+
+    sources = {kind: ([], []) for kind in ('upstream', 'downstream', 'share')}
+    for (kind, value), column in columns.items():
+        if kind in sources:
+            sources[kind][0].append(column)
+            sources[kind][1].append(value)
+    selections = {kind: (numpy.array(positions, dtype=numpy.intp), numpy.array(values, dtype=numpy.intp))
+                  for kind, (positions, values) in sources.items()}
+    return numpy.array(edge_columns, dtype=numpy.intp), len(columns), selections
+
+def simulate(network, scenarios=1000, percentiles=DEFAULT_PERCENTILES, seed=0, stats=None, max_iterations=None,
+             tolerance=None):
+    """
+    Calculates distributions of the real shares over scenarios sampled from the share ranges.
+
+    Every scenario replaces the share ranges with exact shares, see sample_shares, and
+    is solved like the scc engine solves a network whose ranges are exact. Scenarios are
+    sampled and solved in batches, all scenarios of a batch at once. Calculated edges get
+    real_share_percentiles, the given percentiles of their real share over all scenarios
+    in percent, and real_share_mean. Results are the same for the same seed.
+
+    Args:
+        network (list): List of edges representing ownership relationships
+        scenarios (int): Number of scenarios
+        percentiles (tuple): Percentiles to report, nearest-rank between 0 and 100
+        seed (int): Seed of the random numbers
+        stats (dict): If given, filled with the number of iterations, convergence and batches
+        max_iterations (int): Maximum number of passes over a level with cycles, 1000 if None
+        tolerance (float): Maximum change in percentage points at convergence, DEFAULT_TOLERANCE if None
+
+    Returns:
+        list: Network with real_share_percentiles and real_share_mean values
+    """
+    if numpy is None:
+        raise ValueError('Scenario sampling needs NumPy, which is not installed')
+    if scenarios < 1:
+        raise ValueError('At least one scenario is needed')
+    if any(not 0 <= percentile <= 100 for percentile in percentiles):
+        raise ValueError('Percentiles must be between 0 and 100')
+    if max_iterations is not None and max_iterations < 1:
+        raise ValueError('max_iterations must be at least 1')
+
+    tolerance = (tolerance if tolerance is not None else DEFAULT_TOLERANCE) / 100.0
+    max_iterations = max_iterations if max_iterations is not None else 1000
+    edges = normalize_network(network)
+    graph = edges.graph
+    systems = (ScenarioSystem(graph, graph.upstream, upstream=True),
+               ScenarioSystem(graph, graph.downstream, upstream=False))
+    groups = share_groups(graph)
+    edge_columns, column_count, selections = output_columns(graph)
+    generator = numpy.random.default_rng(seed)
+
+    samples = numpy.zeros((column_count, scenarios), dtype=numpy.uint16)
+    totals = numpy.zeros(column_count)
+    batch_size = max(1, min(scenarios, BATCH_ELEMENTS // max(1, len(edges), column_count)))
+    iterations = 1
+    converged = True
+    batches = 0
+
+    for start in range(0, scenarios, batch_size):
+        count = min(batch_size, scenarios - start)
+        shares = sample_shares(graph, count, generator, groups)
+        values = numpy.zeros((count, column_count))
+        for system, kind in zip(systems, ('upstream', 'downstream')):
+            node_values, system_iterations, system_converged = system.solve(shares, tolerance, max_iterations)
+            positions, nodes = selections[kind]
+            values[:, positions] = numpy.take(node_values, nodes, axis=1)
+            iterations = max(iterations, system_iterations)
+            converged = converged and system_converged
+        positions, indices = selections['share']
+        values[:, positions] = numpy.take(shares, indices, axis=1)
+
+        totals += values.sum(axis=0)
+        samples[:, start:start + count] = numpy.rint(values * SCALE).T
+        batches += 1
+
+    samples.sort(axis=1)
+    ranks = [max(0, math.ceil(percentile / 100.0 * scenarios) - 1) for percentile in percentiles]
+    quantiles = (samples[:, ranks].astype(numpy.float64) / (SCALE / 100.0)).tolist()
+    means = (totals * (100.0 / scenarios)).tolist()
+
+    labels = [f'p{percentile:g}' for percentile in percentiles]
+    for edge, column in zip(edges, edge_columns.tolist()):
+        edge['real_share_percentiles'] = dict(zip(labels, quantiles[column]))
+        edge['real_share_mean'] = round(means[column], 2)
+    for edge, first in edges.duplicates:
+        edge['real_share_percentiles'] = first['real_share_percentiles']
+        edge['real_share_mean'] = first['real_share_mean']
+
+    record_run_stats(stats, iterations, converged)
+    if stats is not None:
+        stats['scenarios'] = scenarios
+        stats['batches'] = batches
+    return network
+
+# For direct script execution
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Calculate percentiles of real ownership shares over sampled '
+                                                 'scenarios of the share ranges.')
+    parser.add_argument('input_file', help='Path to input JSON file')
+    parser.add_argument('output_file', help='Path to output JSON file')
+    parser.add_argument('--scenarios', type=int, default=1000, help='Number of scenarios')
+    parser.add_argument('--percentiles', type=float, nargs='+', default=list(DEFAULT_PERCENTILES),
+                        help='Percentiles to report for every edge')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the random numbers')
+    parser.add_argument('--max-iterations', type=int, help='Maximum number of passes over a level with cycles')
+    parser.add_argument('--tolerance', type=float, help='Largest change in percentage points at convergence')
+    args = parser.parse_args()
+    if args.max_iterations is not None and args.max_iterations < 1:
+        parser.error('--max-iterations must be at least 1')
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    with open(args.input_file, 'r') as f:
+        network = json.load(f)
+
+    stats = {}
+    start = time.perf_counter()
+    result = simulate(network, args.scenarios, args.percentiles, args.seed, stats, args.max_iterations,
+                      args.tolerance)
+    logger.info("Solved %d scenarios in %d batches in %.2fs.", stats['scenarios'], stats['batches'],
+                time.perf_counter() - start)
+
+    with open(args.output_file, 'w') as f:
+        json.dump(result, f, indent=2)
@@ -0,0 +1,455 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from urllib.parse import urlsplit, parse_qs
+from .calculator import calculate_real_shares, ENGINES, ACCELERATED_ENGINES
+from .pool import WorkerPool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8080
+DEFAULT_MAX_PENDING = 64
+DEFAULT_MAX_BODY_BYTES = 256 * 1024 * 1024
+
+REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    411: 'Length Required',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+
+# Errors of a calculation caused by the request rather than by the service
+CLIENT_ERRORS = (ValueError, KeyError, TypeError)
+
+class ServiceBusy(Exception):
+    """
+    Raised when a calculation is rejected because too many are pending.
+    """
+
+class RequestError(Exception):
+    """
+    HTTP error response for a request.
+    """
+
+    def __init__(self, status, message):
+        """
+        Args:
+            status (int): HTTP status code
+            message (str): Error message sent to the client
+        """
+        super().__init__(message)
+        self.status = status
+
+def solve(body, engine, options):
+    """
+    Calculates the real shares of a network in a worker process.
+
+    The network is decoded and the result encoded in the worker, so only bytes are
+    passed between the processes.
+
+    Args:
+        body (bytes): Network as a JSON array of edges
+        engine (str): Name of the engine to use
+        options (dict): Convergence settings max_iterations, tolerance and acceleration
+
+    Returns:
+        bytes: Enriched edges as compact JSON
+    """
+    network = json.loads(body)
+    if not isinstance(network, list):
+        raise ValueError('Request body must be a JSON array of edges')
+    result = calculate_real_shares(network, engine, **options)
+    return json.dumps(result, separators=(',', ':')).encode('utf-8')
+
+def request_key(body, engine, options):
+    """
+    Hashes the content of a calculation, so identical requests share one computation.
+
+    Args:
+        body (bytes): Network as sent by the client
+        engine (str): Name of the engine
+        options (dict): Convergence settings
+
+    Returns:
+        str: Hex digest identifying the calculation
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps({'engine': engine, 'options': options}, sort_keys=True).encode('utf-8'))
+    digest.update(b'\n')
+    digest.update(body)
+    return digest.hexdigest()
+
+class CalculationService:
+    """
+    Asyncio HTTP service calculating the real shares of networks sent to it.
+
+    POST /calculate takes a network as a JSON array of edges and returns the enriched
+    edges. The engine and convergence settings are given as query parameters engine,
+    max_iterations, tolerance and acceleration. GET /health returns the counters of the
+    service.
+
+    Networks are solved in a pool of worker processes, at most max_concurrency at a
+    time. Requests with the same body and settings that arrive while a calculation is
+    in flight wait for that calculation instead of starting their own. Once
+    max_pending distinct calculations are queued or running, new ones are rejected
+    with 503, so a burst of requests can't pile up unbounded work. A worker process that
+    dies fails only the calculation it was running, see pool.WorkerPool.
+    """
+
+    def __init__(self, engine='scc', workers=None, max_concurrency=None, max_pending=DEFAULT_MAX_PENDING,
+                 max_body_bytes=DEFAULT_MAX_BODY_BYTES, executor=None):
+        """
+        Args:
+            engine (str): Engine used when a request doesn't name one
+            workers (int): Number of worker processes, defaults to the number of CPUs
+            max_concurrency (int): Maximum number of calculations running at once, defaults to workers
+                                   or the number of CPUs
+            max_pending (int): Maximum number of distinct calculations queued or running
+            max_body_bytes (int): Largest accepted request body
+            executor (Executor): Pool to run calculations in instead of a new process pool
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of: {', '.join(ENGINES)}")
+        self.engine = engine
+        self.pool = WorkerPool(workers, executor=executor)
+        self.max_concurrency = max_concurrency or workers or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.max_body_bytes = max_body_bytes
+        self.server = None
+        self.connections = {}
+        self.in_flight = {}
+        self.counters = {'requests': 0, 'calculations': 0, 'coalesced': 0, 'rejected': 0, 'errors': 0}
+        self._slots = None
+
+    async def calculate(self, body, engine=None, options=None):
+        """
+        Calculates the real shares of a network, sharing the calculation with identical
+        concurrent requests.
+
+        Args:
+            body (bytes): Network as a JSON array of edges
+            engine (str): Name of the engine to use, the service's engine if None
+            options (dict): Convergence settings max_iterations, tolerance and acceleration
+
+        Returns:
+            bytes: Enriched edges as compact JSON
+
+        Raises:
+            ServiceBusy: If max_pending calculations are already queued or running
+        """
+        engine = engine or self.engine
+        options = options or {}
+        key = request_key(body, engine, options)
+
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.counters['coalesced'] += 1
+        else:
+            if len(self.in_flight) >= self.max_pending:
+                self.counters['rejected'] += 1
+                raise ServiceBusy(f'{len(self.in_flight)} calculations are pending, try again later')
+            self.counters['calculations'] += 1
+            task = asyncio.ensure_future(self._run(body, engine, options))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+
+        # A client going away must not cancel the calculation other clients wait for
+        return await asyncio.shield(task)
+
+    async def _run(self, body, engine, options):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        async with self._slots:
+            return await self.pool.run(solve, body, engine, options)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Request counters, the number of pending calculations and of worker pools
+                  replaced after a worker died
+        """
+        return dict(self.counters, pending=len(self.in_flight), max_pending=self.max_pending,
+                    max_concurrency=self.max_concurrency, pool_replacements=self.pool.replacements)
+
+    async def start(self, host='127.0.0.1', port=DEFAULT_PORT):
+        """
+        Starts listening for connections.
+
+        Args:
+            host (str): Address to bind to
+            port (int): Port to bind to, 0 for any free port
+
+        Returns:
+            tuple: (host, port) the service listens on
+        """
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        """
+        Stops listening, closes open connections and shuts the worker pool down.
+        """
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for writer in self.connections.values():
+            writer.close()
+        await asyncio.gather(*self.connections, return_exceptions=True)
+        self.pool.shutdown()
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serves the requests of one connection, which is kept alive between requests
+        unless the client asks to close it.
+        """
+        task = asyncio.current_task()
+        self.connections[task] = writer
+        try:
+            while True:
+                try:
+                    request = await read_request(reader, self.max_body_bytes)
+                    if request is None:
+                        break
+                    method, target, headers, body = request
+                    status, payload = await self.respond(method, target, body)
+                    keep_alive = headers.get('connection', '').lower() != 'close'
+                except RequestError as e:
+                    # The rest of the request wasn't read, so the connection can't be reused
+                    status, payload = e.status, error_body(str(e))
+                    keep_alive = False
+
+                write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            del self.connections[task]
+            writer.close()
+
+    async def respond(self, method, target, body):
+        """
+        Args:
+            method (str): HTTP method
+            target (str): Request target with path and query
+            body (bytes): Request body
+
+        Returns:
+            tuple: (status, body) of the response
+        """
+        url = urlsplit(target)
+        if url.path == '/health':
+            if method != 'GET':
+                return 405, error_body('Use GET for /health')
+            return 200, json.dumps(self.stats()).encode('utf-8')
+        if url.path != '/calculate':
+            return 404, error_body(f"Unknown path '{url.path}'")
+        if method != 'POST':
+            return 405, error_body('Use POST for /calculate')
+
+        self.counters['requests'] += 1
+        start = time.perf_counter()
+        try:
+            engine, options = parse_options(parse_qs(url.query), self.engine)
+            result = await self.calculate(body, engine, options)
+        except ServiceBusy as e:
+            return 503, error_body(str(e))
+        except CLIENT_ERRORS as e:
+            self.counters['errors'] += 1
+            return 400, error_body(f'{type(e).__name__}: {e}')
+        except Exception as e:
+            self.counters['errors'] += 1
+            logger.exception("Calculation failed.")
+            return 500, error_body(f'{type(e).__name__}: {e}')
+
+        logger.debug("Calculated %d bytes in %.4fs.", len(body), time.perf_counter() - start)
+        return 200, result
+
+def parse_options(query, default_engine):
+    """
+    Reads the engine and convergence settings of a request.
+
+    Args:
+        query (dict): Query parameters from parse_qs
+        default_engine (str): Engine used if the request doesn't name one
+
+    Returns:
+        tuple: (engine, options) for calculate_real_shares
+    """
+    def value(name):
+        return query[name][-1] if name in query else None
+
+    engine = value('engine') or default_engine
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of: {', '.join(ENGINES)}")
+
+    options = {}
+    if value('max_iterations') is not None:
+        options['max_iterations'] = int(value('max_iterations'))
+        if options['max_iterations'] < 1:
+            raise ValueError('max_iterations must be at least 1')
+    if value('tolerance') is not None:
+        options['tolerance'] = float(value('tolerance'))
+    if value('acceleration') is not None:
+        if engine not in ACCELERATED_ENGINES:
+            raise ValueError(f"Engine '{engine}' has no acceleration")
+        options['acceleration'] = value('acceleration')
+    return engine, options
+
+async def read_request(reader, max_body_bytes):
+    """
+    Reads one HTTP/1.1 request with a Content-Length body.
+
+    Args:
+        reader (StreamReader): Connection to read from
+        max_body_bytes (int): Largest accepted body
+
+    Returns:
+        tuple: (method, target, headers, body), or None if the connection was closed
+    """
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    try:
+        method, target, _ = request_line.decode('latin-1').split()
+    except ValueError:
+        raise RequestError(400, 'Malformed request line')
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if 'transfer-encoding' in headers:
+        raise RequestError(411, 'Chunked bodies are not supported, send a Content-Length')
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise RequestError(400, 'Invalid Content-Length')
+    if length < 0:
+        raise RequestError(400, 'Invalid Content-Length')
+    if length > max_body_bytes:
+        raise RequestError(413, f'Body is larger than {max_body_bytes} bytes')
+
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), target, headers, body
+
+def write_response(writer, status, body, keep_alive=True):
+    """
+    Writes an HTTP/1.1 response with a JSON body.
+
+    Args:
+        writer (StreamWriter): Connection to write to
+        status (int): HTTP status code
+        body (bytes): JSON body
+        keep_alive (bool): Whether the connection stays open
+    """
+    headers = [
+        f'HTTP/1.1 {status} {REASONS.get(status, "")}',
+        'Content-Type: application/json',
+        f'Content-Length: {len(body)}',
+        f'Connection: {"keep-alive" if keep_alive else "close"}',
+    ]
+    if status == 503:
+        headers.append('Retry-After: 1')
+    writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1'))
+    writer.write(body)
+
+def error_body(message):
+    """
+    Args:
+        message (str): Error message
+
+    Returns:
+        bytes: JSON error body
+    """
+    return json.dumps({'error': message}).encode('utf-8')
+
+async def post(reader, writer, target, body, host='localhost'):
+    """
+    Sends a POST request over an open connection and reads the response.
+
+    Args:
+        reader (StreamReader): Connection to read from
+        writer (StreamWriter): Connection to write to
+        target (str): Request target with path and query
+        body (bytes): Request body
+        host (str): Host header
+
+    Returns:
+        tuple: (status, body) of the response
+    """
+    writer.write((f'POST {target} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n'
+                  f'Content-Length: {len(body)}\r\n\r\n').encode('latin-1'))
+    writer.write(body)
+    await writer.drain()
+
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('Connection closed by the service')
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+async def serve(host, port, **settings):
+    """
+    Runs the service until it is interrupted.
+
+    Args:
+        host (str): Address to bind to
+        port (int): Port to bind to
+        settings: Arguments of CalculationService
+    """
+    service = CalculationService(**settings)
+    address = await service.start(host, port)
+    logger.info("Listening on http://%s:%d with %d concurrent calculations.", *address, service.max_concurrency)
+    try:
+        await service.server.serve_forever()
+    finally:
+        await service.close()
+
+# For direct script execution
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Serve real ownership share calculations over HTTP.')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to bind to')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port to bind to')
+    parser.add_argument('--engine', choices=list(ENGINES), default='scc',
+                        help='Engine used when a request has no engine parameter')
+    parser.add_argument('--workers', type=int, help='Number of worker processes, defaults to the number of CPUs')
+    parser.add_argument('--max-concurrency', type=int,
+                        help='Maximum number of calculations running at once, defaults to the number of workers')
+    parser.add_argument('--max-pending', type=int, default=DEFAULT_MAX_PENDING,
+                        help='Maximum number of distinct calculations queued or running before requests get 503')
+    parser.add_argument('--max-body-bytes', type=int, default=DEFAULT_MAX_BODY_BYTES,
+                        help='Largest accepted request body')
+    parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help='Logging level')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level, format='%(message)s')
+    try:
+        asyncio.run(serve(args.host, args.port, engine=args.engine, workers=args.workers,
+                          max_concurrency=args.max_concurrency, max_pending=args.max_pending,
+                          max_body_bytes=args.max_body_bytes))
+    except KeyboardInterrupt:
+        pass
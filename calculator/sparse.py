@@ -0,0 +1,297 @@
+from array import array
+from .graph import ownership_graph, assign_real_shares
+from .helpers import record_run_stats, record_error_bound, pruning_threshold
+from .intervals import get_kernel
+
+class CSRMatrix:
+    """
+    Square sparse matrix in compressed sparse row format backed by flat arrays.
+
+    Products are computed with an interval arithmetic kernel from calculator.intervals,
+    over all stored values at once when NumPy is available.
+    """
+
+    def __init__(self, size, indptr, indices, data, kernel=None):
+        """
+        Args:
+            size (int): Number of rows and columns
+            indptr (array): Row offsets into indices and data, of length size + 1
+            indices (array): Column index of every stored value
+            data (array): Stored values
+            kernel (PythonKernel): Kernel for products, the fastest available if None
+        """
+        self.size = size
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.kernel = kernel or get_kernel()
+
+        rows = array('l', [0]) * len(indices)
+        for row in range(size):
+            for position in range(indptr[row], indptr[row + 1]):
+                rows[position] = row
+        self.rows = self.kernel.index_vector(rows)
+        self.columns = self.kernel.index_vector(indices)
+        self.weights = self.kernel.vector(data)
+
+    @classmethod
+    def from_entries(cls, size, entries, kernel=None):
+        """
+        Builds a matrix from (row, column, value) entries. Duplicate entries are summed.
+
+        Args:
+            size (int): Number of rows and columns
+            entries (list): List of (row, column, value) tuples
+            kernel (PythonKernel): Kernel for products, the fastest available if None
+
+        Returns:
+            CSRMatrix: The matrix
+        """
+        counts = array('l', [0]) * (size + 1)
+        for row, _, _ in entries:
+            counts[row + 1] += 1
+        for row in range(size):
+            counts[row + 1] += counts[row]
+
+        indptr = array('l', counts)
+        indices = array('l', [0]) * len(entries)
+        data = array('d', [0.0]) * len(entries)
+        for row, column, value in entries:
+            position = counts[row]
+            indices[position] = column
+            data[position] = value
+            counts[row] += 1
+
+        return cls(size, indptr, indices, data, kernel)
+
+    def dot(self, vector):
+        """
+        Multiplies the matrix with a vector.
+
+        Args:
+            vector (array): Vector of length size
+
+        Returns:
+            array: Product vector of the matrix's kernel
+        """
+        return self.kernel.propagate(self.weights, vector, self.columns, self.rows, self.size)
+
+def build_ownership_matrices(graph, edge_indices, upstream):
+    """
+    Builds the lower and upper bound systems x = min(1, A x + b) for one direction.
+
+    Upstream, row n holds the shares node n has in other owners of the focus company.
+    Downstream, row n holds the shares other subsidiaries have in node n. Shares held
+    directly in or by a focus node go to b, and focus nodes are pinned to 1.
+
+    Args:
+        graph (OwnershipGraph): Ownership graph
+        edge_indices (list): Active edge indices of the direction
+        upstream (bool): Whether the edges are upstream edges
+
+    Returns:
+        tuple: (lower_matrix, upper_matrix, lower_b, upper_b)
+    """
+    size = len(graph)
+    lower_entries = []
+    upper_entries = []
+    lower_b = array('d', [0.0]) * size
+    upper_b = array('d', [0.0]) * size
+
+    for index in edge_indices:
+        if upstream:
+            row, column = graph.sources[index], graph.targets[index]
+        else:
+            row, column = graph.targets[index], graph.sources[index]
+        if row in graph.focus:
+            continue
+
+        lower, _, upper = graph.shares[index]
+        if column in graph.focus:
+            lower_b[row] += lower
+            upper_b[row] += upper
+        else:
+            lower_entries.append((row, column, lower))
+            upper_entries.append((row, column, upper))
+
+    for node in graph.focus:
+        lower_b[node] = 1.0
+        upper_b[node] = 1.0
+
+    return (
+        CSRMatrix.from_entries(size, lower_entries),
+        CSRMatrix.from_entries(size, upper_entries),
+        lower_b,
+        upper_b
+    )
+
+def power_iteration(matrix, b, tolerance=1e-12, max_iterations=1000):
+    """
+    Solves x = min(1, A x + b) by repeated matrix-vector products starting from x = b.
+
+    Without clamping this is the Neumann series of (I - A)x = b. The iteration is
+    monotone, so it converges to the smallest solution. On acyclic graphs it is exact
+    after a number of products equal to the longest ownership chain.
+
+    Args:
+        matrix (CSRMatrix): Share matrix A
+        b (array): Direct shares in the focus company
+        tolerance (float): Maximum absolute change between products at convergence
+        max_iterations (int): Maximum number of products
+
+    Returns:
+        tuple: (solution, number of products, whether the solution converged)
+    """
+    kernel = matrix.kernel
+    b = kernel.vector(b)
+    values = b
+    for iteration in range(max_iterations):
+        updated = kernel.clamp(kernel.add(matrix.dot(values), b))
+        max_change = kernel.max_difference(updated, values)
+        values = updated
+        if max_change <= tolerance:
+            return values, iteration + 1, True
+    return values, max_iterations, False
+
+def pruned_power_iteration(lower_matrix, upper_matrix, lower_b, upper_b, threshold, tolerance=1e-12,
+                           max_iterations=1000):
+    """
+    Solves the lower and upper bound systems together, dropping every value whose upper
+    bound is below threshold to zero instead of passing it on.
+
+    The error of the dropped values spreads like ownership does, so a bound on how much
+    any value is below the value without dropping is the solution of e = min(1, A e + d)
+    with the upper bound matrix, where d holds the dropped upper bounds.
+
+    Args:
+        lower_matrix (CSRMatrix): Lower bound share matrix
+        upper_matrix (CSRMatrix): Upper bound share matrix
+        lower_b (array): Lower bound direct shares in the focus company
+        upper_b (array): Upper bound direct shares in the focus company
+        threshold (float): Smallest upper bound a value needs to be kept, as a fraction
+        tolerance (float): Maximum absolute change between products at convergence
+        max_iterations (int): Maximum number of products
+
+    Returns:
+        tuple: (lower, upper, errors, number of products, whether the values and the errors converged)
+    """
+    kernel = upper_matrix.kernel
+    lower_b, upper_b = kernel.vector(lower_b), kernel.vector(upper_b)
+    lower, upper = kernel.prune(lower_b, upper_b, threshold), kernel.prune(upper_b, upper_b, threshold)
+    upper_totals = upper_b
+    iterations, converged = max_iterations, False
+    for iteration in range(max_iterations):
+        lower_totals = kernel.clamp(kernel.add(lower_matrix.dot(lower), lower_b))
+        upper_totals = kernel.clamp(kernel.add(upper_matrix.dot(upper), upper_b))
+        updated_lower = kernel.prune(lower_totals, upper_totals, threshold)
+        updated_upper = kernel.prune(upper_totals, upper_totals, threshold)
+        max_change = max(kernel.max_difference(updated_lower, lower), kernel.max_difference(updated_upper, upper))
+        lower, upper = updated_lower, updated_upper
+        if max_change <= tolerance:
+            iterations, converged = iteration + 1, True
+            break
+
+    dropped = kernel.subtract(upper_totals, upper)
+    errors, error_iterations, errors_converged = power_iteration(upper_matrix, dropped, tolerance, max_iterations)
+    return lower, upper, errors, max(iterations, error_iterations), converged and errors_converged
+
+def solve_system(matrix, b, stats=None, tolerance=1e-12, max_iterations=1000):
+    """
+    Solves one system with power_iteration and records its statistics.
+
+    Args:
+        matrix (CSRMatrix): Share matrix A
+        b (array): Direct shares in the focus company
+        stats (dict): Run statistics to update, ignored if None
+        tolerance (float): Maximum absolute change between products at convergence
+        max_iterations (int): Maximum number of products
+
+    Returns:
+        array: Solution
+    """
+    values, iterations, converged = power_iteration(matrix, b, tolerance, max_iterations)
+    record_run_stats(stats, iterations, converged)
+    return array('d', matrix.kernel.to_list(values))
+
+def solve_pruned_system(lower_matrix, upper_matrix, lower_b, upper_b, threshold, stats=None, tolerance=1e-12,
+                        max_iterations=1000):
+    """
+    Solves the lower and upper bound systems with pruned_power_iteration and records its
+    statistics and error bound.
+
+    Returns:
+        tuple: (lower, upper) arrays of the solution
+    """
+    lower, upper, errors, iterations, converged = pruned_power_iteration(
+        lower_matrix, upper_matrix, lower_b, upper_b, threshold, tolerance, max_iterations)
+    kernel = upper_matrix.kernel
+    record_run_stats(stats, iterations, converged)
+    record_error_bound(stats, max(kernel.to_list(errors), default=0.0))
+    return array('d', kernel.to_list(lower)), array('d', kernel.to_list(upper))
+
+def solve_graph_sparse(graph, stats=None, tolerance=1e-12, max_iterations=1000, threshold=None):
+    """
+    Solves the upstream and downstream node values of a graph with sparse matrices.
+
+    Args:
+        graph (OwnershipGraph): Ownership graph
+        stats (dict): If given, filled with the number of iterations and whether the run converged
+        tolerance (float): Maximum absolute change between products at convergence
+        max_iterations (int): Maximum number of products per system
+        threshold (float): Drop values with a smaller upper bound as a fraction and record the
+                           error bound in stats, see pruned_power_iteration
+
+    Returns:
+        tuple: (upstream_values, downstream_values), each a (lower, upper) pair of arrays
+    """
+    upstream_lower, upstream_upper, upstream_lower_b, upstream_upper_b = \
+        build_ownership_matrices(graph, graph.upstream, upstream=True)
+    downstream_lower, downstream_upper, downstream_lower_b, downstream_upper_b = \
+        build_ownership_matrices(graph, graph.downstream, upstream=False)
+
+    options = (tolerance, max_iterations)
+    if threshold is not None:
+        # The upper bound decides what is dropped from both systems, so they are solved together
+        upstream_values = solve_pruned_system(upstream_lower, upstream_upper, upstream_lower_b, upstream_upper_b,
+                                              threshold, stats, *options)
+        downstream_values = solve_pruned_system(downstream_lower, downstream_upper, downstream_lower_b,
+                                                downstream_upper_b, threshold, stats, *options)
+        return upstream_values, downstream_values
+
+    upstream_values = (
+        solve_system(upstream_lower, upstream_lower_b, stats, *options),
+        solve_system(upstream_upper, upstream_upper_b, stats, *options)
+    )
+    downstream_values = (
+        solve_system(downstream_lower, downstream_lower_b, stats, *options),
+        solve_system(downstream_upper, downstream_upper_b, stats, *options)
+    )
+    return upstream_values, downstream_values
+
+def solve_sparse(network, stats=None, max_iterations=None, tolerance=None, min_contribution=None):
+    """
+    Calculates the real ownership shares with the sparse matrix engine.
+
+    The upstream and downstream ownership graphs are built as CSR matrices, separately
+    for lower and upper bounds, and every system is solved by power iteration.
+
+    Args:
+        network (list): List of edges representing ownership relationships
+        stats (dict): If given, filled with the number of iterations and whether the run converged
+        max_iterations (int): Maximum number of products per system, 1000 if None
+        tolerance (float): Maximum change in percentage points at convergence, 1e-10 if None
+        min_contribution (float): Smallest upper bound in percentage points a value needs to be passed on,
+                                  nothing is pruned if None. The error bound is recorded in stats.
+
+    Returns:
+        list: Updated network with real_lower_share, real_average_share, and real_upper_share values
+    """
+    threshold = pruning_threshold(min_contribution)
+    graph = ownership_graph(network)
+    upstream_values, downstream_values = solve_graph_sparse(
+        graph, stats,
+        tolerance / 100.0 if tolerance is not None else 1e-12,
+        max_iterations if max_iterations is not None else 1000,
+        threshold
+    )
+    return assign_real_shares(graph, upstream_values, downstream_values)
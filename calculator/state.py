@@ -0,0 +1,131 @@
+from array import array
+
+class EdgeState:
+    """
+    Compact numeric store for the real shares of a network's edges.
+
+    Edges are addressed by their position in the network list. Values are kept in
+    flat array('d') buffers as rounded percentages, exactly as they would be stored
+    on the edge dicts, and are only written back to the dicts once at the end.
+
+    Values from before the current pass are kept in a second set of buffers. They are
+    captured lazily on the first write of an edge in each pass, so starting a new pass
+    is O(1) and never copies the whole network.
+    """
+
+    def __init__(self, edges):
+        """
+        Args:
+            edges (list): List of edges with initialized real share values
+        """
+        size = len(edges)
+        self.lower = array('d', [0.0]) * size
+        self.average = array('d', [0.0]) * size
+        self.upper = array('d', [0.0]) * size
+        self.previous_lower = array('d', [0.0]) * size
+        self.previous_average = array('d', [0.0]) * size
+        self.previous_upper = array('d', [0.0]) * size
+        self.has_value = bytearray(size)
+        self.had_value = bytearray(size)
+        self.stamp = array('l', [0]) * size
+        self.epoch = 0
+
+        for index, edge in enumerate(edges):
+            if edge.get('real_lower_share') is None:
+                continue
+            self.has_value[index] = 1
+            self.lower[index] = edge['real_lower_share']
+            self.average[index] = edge['real_average_share']
+            self.upper[index] = edge['real_upper_share']
+
+    def __len__(self):
+        return len(self.lower)
+
+    def begin_pass(self):
+        """
+        Starts a new pass. Current values become the previous snapshot without copying.
+        """
+        self.epoch += 1
+
+    def get(self, index):
+        """
+        Returns the latest share tuple of an edge as fractions.
+
+        Args:
+            index (int): Edge index
+
+        Returns:
+            tuple: (lower, average, upper) share values as fractions
+        """
+        return (
+            self.lower[index] / 100.0,
+            self.average[index] / 100.0,
+            self.upper[index] / 100.0
+        )
+
+    def set(self, index, share_tuple):
+        """
+        Updates an edge with new share values, rounded like update_edge_shares.
+
+        Args:
+            index (int): Edge index
+            share_tuple (tuple): (lower, average, upper) share values as fractions
+        """
+        if self.stamp[index] != self.epoch:
+            # First write in this pass, keep the value from before the pass
+            self.stamp[index] = self.epoch
+            self.previous_lower[index] = self.lower[index]
+            self.previous_average[index] = self.average[index]
+            self.previous_upper[index] = self.upper[index]
+            self.had_value[index] = self.has_value[index]
+
+        self.has_value[index] = 1
+        self.lower[index] = round(share_tuple[0] * 100.0, 2)
+        self.average[index] = round(share_tuple[1] * 100.0, 2)
+        self.upper[index] = round(share_tuple[2] * 100.0, 2)
+
+    def previous(self, index):
+        """
+        Returns the percentage share values of an edge from before the current pass.
+
+        Args:
+            index (int): Edge index
+
+        Returns:
+            tuple: (lower, average, upper) percentages, or None if the edge had no value
+        """
+        if self.stamp[index] != self.epoch:
+            return (self.lower[index], self.average[index], self.upper[index]) if self.has_value[index] else None
+        if not self.had_value[index]:
+            return None
+        return (self.previous_lower[index], self.previous_average[index], self.previous_upper[index])
+
+    def updated_count(self):
+        """
+        Returns:
+            int: Number of edges whose values changed in the current pass
+        """
+        count = 0
+        for index in range(len(self.lower)):
+            if self.stamp[index] != self.epoch:
+                continue
+            if (not self.had_value[index]
+                    or self.lower[index] != self.previous_lower[index]
+                    or self.average[index] != self.previous_average[index]
+                    or self.upper[index] != self.previous_upper[index]):
+                count += 1
+        return count
+
+    def write_back(self, edges):
+        """
+        Writes the stored values back to the edge dicts.
+
+        Args:
+            edges (list): List of edges the state was created from
+        """
+        for index, edge in enumerate(edges):
+            if not self.has_value[index]:
+                continue
+            edge['real_lower_share'] = self.lower[index]
+            edge['real_average_share'] = self.average[index]
+            edge['real_upper_share'] = self.upper[index]
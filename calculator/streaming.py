@@ -0,0 +1,293 @@
+import csv
+import importlib
+import io
+import json
+import sys
+from .binary import is_binary_file, load_binary
+from .graph import OwnershipGraph, edge_real_shares
+from .helpers import pruning_threshold
+from .validation import edge_error
+from .sparse import solve_graph_sparse
+from .scc import solve_graph_scc
+
+# Engines that solve on an OwnershipGraph and can therefore run without the edge dicts
+GRAPH_SOLVERS = {
+    'sparse': solve_graph_sparse,
+    'scc': solve_graph_scc,
+}
+
+# Fields written with results_only: the edge id and the values calculated for it
+RESULT_FIELDS = ('id', 'real_lower_share', 'real_average_share', 'real_upper_share')
+
+# Standard library modules with an open function, imported when a file is compressed
+COMPRESSIONS = {'gzip': 'gzip', 'bz2': 'bz2', 'xz': 'lzma'}
+if sys.version_info >= (3, 14):
+    COMPRESSIONS['zstd'] = 'compression.zstd'
+
+# gzip defaults to level 9, which takes twice as long as level 6 for 4% smaller output
+COMPRESSION_OPTIONS = {'gzip': {'compresslevel': 6}}
+
+CHUNK_SIZE = 1 << 16
+
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+def iter_records(f, chunk_size=CHUNK_SIZE):
+    """
+    Incrementally parses the edges of a JSON array or of newline delimited JSON.
+
+    Only one chunk of the input and the record being parsed are held in memory.
+
+    Args:
+        f (file): Text file positioned at the start of the input
+        chunk_size (int): Number of characters read at a time
+
+    Yields:
+        dict: One edge at a time
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, position, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        buffer = buffer[position:] + chunk
+        position = 0
+
+    def skip(characters):
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in characters:
+                position += 1
+            if position < len(buffer) or eof:
+                return
+            fill()
+
+    whitespace = ' \t\r\n'
+    skip(whitespace)
+    if eof:
+        return
+
+    # A top-level array is parsed element by element, anything else as NDJSON
+    in_array = buffer[position] == '['
+    if in_array:
+        position += 1
+        separators = whitespace + ','
+    else:
+        separators = whitespace
+
+    while True:
+        skip(separators)
+        if position >= len(buffer):
+            if in_array:
+                raise ValueError('Unexpected end of input, JSON array is not closed')
+            return
+        if in_array and buffer[position] == ']':
+            return
+
+        try:
+            record, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+
+        if end == len(buffer) and not eof:
+            # The value might continue in the next chunk
+            fill()
+            continue
+
+        position = end
+        yield record
+
+        if position > chunk_size:
+            buffer = buffer[position:]
+            position = 0
+
+def load_graph(input_file):
+    """
+    Builds an ownership graph from a network file without keeping the edge dicts.
+
+    Args:
+        input_file (str): Path to input JSON, NDJSON or binary file
+
+    Returns:
+        OwnershipGraph: Graph holding only the numeric fields of the edges
+    """
+    if is_binary_file(input_file):
+        with load_binary(input_file) as network:
+            graph = network.ownership_graph()
+        graph.edges = None
+        return graph
+
+    graph = OwnershipGraph()
+    with open(input_file, 'r') as f:
+        for edge in iter_records(f):
+            # Invalid edges are left out like in normalize_network, repeated edges are not detected
+            if edge_error(edge) is not None:
+                graph.add_skipped_edge()
+            else:
+                graph.add_edge(edge['source'], edge['target'], edge['source_depth'], edge['target_depth'],
+                               edge['share'], edge['active'])
+    return graph
+
+def write_json(f, records):
+    """
+    Writes records as a compact JSON array.
+    """
+    encode = json.JSONEncoder(separators=(',', ':')).encode
+    f.write('[')
+    for count, record in enumerate(records):
+        if count:
+            f.write(',')
+        f.write(encode(record))
+    f.write(']\n')
+
+def write_ndjson(f, records):
+    """
+    Writes records as newline delimited JSON, one compact record per line.
+    """
+    encode = json.JSONEncoder(separators=(',', ':')).encode
+    for record in records:
+        f.write(encode(record))
+        f.write('\n')
+
+def write_csv(f, records):
+    """
+    Writes records as CSV with a header row of the fields of the first record.
+
+    Later records must not have other fields, missing ones are left empty, as are None
+    values.
+    """
+    writer = None
+    for record in records:
+        if writer is None:
+            writer = csv.DictWriter(f, fieldnames=list(record), lineterminator='\n')
+            writer.writeheader()
+        writer.writerow(record)
+
+def write_pretty(f, records):
+    """
+    Writes records as a JSON array indented by two spaces, the whole array at once.
+    """
+    json.dump(list(records), f, indent=2)
+
+WRITERS = {
+    'json': write_json,
+    'ndjson': write_ndjson,
+    'csv': write_csv,
+    'pretty': write_pretty,
+}
+
+OUTPUT_FORMATS = tuple(WRITERS)
+
+def write_records(f, records, output_format='json', results_only=False):
+    """
+    Writes records in one of the OUTPUT_FORMATS.
+
+    All formats but 'pretty' write one record at a time, so records can be a generator
+    that is never held in memory as a whole.
+
+    Args:
+        f (file): Text file to write to, see open_output
+        records (iterable): Records to write
+        output_format (str): 'json', 'ndjson', 'csv' or 'pretty'
+        results_only (bool): Only write the RESULT_FIELDS of every record
+    """
+    if output_format not in WRITERS:
+        raise ValueError(f"Unknown output format '{output_format}', expected one of: {', '.join(OUTPUT_FORMATS)}")
+    if results_only:
+        records = ({field: record.get(field) for field in RESULT_FIELDS} for record in records)
+    WRITERS[output_format](f, records)
+
+def open_output(output_file, compression=None):
+    """
+    Opens a file for buffered text output, compressed with a standard library module.
+
+    Args:
+        output_file (str): Path to the output file
+        compression (str): One of COMPRESSIONS, uncompressed if None
+
+    Returns:
+        file: Text file to write to, which has to be closed to flush the output
+    """
+    if compression is None:
+        return open(output_file, 'w', buffering=OUTPUT_BUFFER_SIZE, encoding='utf-8', newline='')
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{compression}', expected one of: {', '.join(COMPRESSIONS)}")
+
+    # Compressors are slow per call, so they get large writes only
+    module = importlib.import_module(COMPRESSIONS[compression])
+    compressed = module.open(output_file, 'wb', **COMPRESSION_OPTIONS.get(compression, {}))
+    return io.TextIOWrapper(io.BufferedWriter(compressed, OUTPUT_BUFFER_SIZE), encoding='utf-8', newline='')
+
+def stream_network(input_file, output_file, engine='scc', output_format='json', max_iterations=None, tolerance=None,
+                   acceleration=None, workers=None, results_only=False, compression=None, stats=None,
+                   min_contribution=None):
+    """
+    Calculates real shares of a network file with memory bounded by the numeric state.
+
+    The input is read twice: once to build the graph and once to stream the enriched
+    edges to the output, so the full network is never held in memory. Binary input is
+    memory-mapped and its graph built from the columns.
+
+    Args:
+        input_file (str): Path to input JSON, NDJSON or binary file
+        output_file (str): Path to output file
+        engine (str): Name of the engine to use, one of GRAPH_SOLVERS
+        output_format (str): 'json', 'ndjson' or 'csv'
+        max_iterations (int): Maximum number of passes, the engine's default if None
+        tolerance (float): Maximum change in percentage points at convergence, the engine's default if None
+        acceleration (str): Acceleration of cyclic components, only for the scc engine
+        workers (int): Number of worker processes for large cyclic components, only for the scc engine
+        results_only (bool): Only write the id and real shares of every edge
+        compression (str): Compress the output with one of COMPRESSIONS
+        stats (dict): If given, filled with the number of iterations and whether the run converged
+        min_contribution (float): Smallest upper bound in percentage points a value needs to be passed on,
+                                  nothing is pruned if None. The error bound is recorded in stats.
+    """
+    if engine not in GRAPH_SOLVERS:
+        raise ValueError(f"Engine '{engine}' can't stream, expected one of: {', '.join(GRAPH_SOLVERS)}")
+    if output_format == 'pretty':
+        raise ValueError("The 'pretty' format needs the whole network and can not be streamed")
+
+    options = {}
+    if max_iterations is not None:
+        if max_iterations < 1:
+            raise ValueError('max_iterations must be at least 1')
+        options['max_iterations'] = max_iterations
+    if tolerance is not None:
+        options['tolerance'] = tolerance / 100.0
+    if acceleration is not None:
+        if engine != 'scc':
+            raise ValueError(f"Engine '{engine}' has no acceleration")
+        options['acceleration'] = acceleration
+    if workers is not None:
+        if engine != 'scc':
+            raise ValueError(f"Engine '{engine}' has no parallel mode")
+        options['workers'] = workers
+    if min_contribution is not None:
+        options['threshold'] = pruning_threshold(min_contribution)
+
+    def enriched_records(graph, edges):
+        upstream_values, downstream_values = GRAPH_SOLVERS[engine](graph, stats, **options)
+        for index, edge in enumerate(edges):
+            real_shares = edge_real_shares(graph, index, upstream_values, downstream_values)
+            if real_shares is not None:
+                edge['real_lower_share'], edge['real_average_share'], edge['real_upper_share'] = real_shares
+            yield edge
+
+    if is_binary_file(input_file):
+        with load_binary(input_file) as network, open_output(output_file, compression) as f:
+            # Fresh records, so the network doesn't keep every edge dict
+            edges = (network.record(index) for index in range(len(network)))
+            write_records(f, enriched_records(network.ownership_graph(), edges), output_format, results_only)
+        return
+
+    graph = load_graph(input_file)
+    with open(input_file, 'r') as source, open_output(output_file, compression) as f:
+        write_records(f, enriched_records(graph, iter_records(source)), output_format, results_only)
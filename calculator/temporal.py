@@ -0,0 +1,271 @@
+import json
+import logging
+import time
+from datetime import date, timedelta
+from .incremental import IncrementalNetwork
+
+logger = logging.getLogger(__name__)
+
+REAL_SHARE_FIELDS = ('real_lower_share', 'real_average_share', 'real_upper_share')
+
+def parse_date(value):
+    """
+    Args:
+        value (str): ISO date like "2024-01-31", or None for an open end
+
+    Returns:
+        date: The date, None if value is None
+    """
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid date {value!r}, expected YYYY-MM-DD") from None
+
+def month_ends(start, end):
+    """
+    Args:
+        start (date): First date of the range
+        end (date): Last date of the range
+
+    Returns:
+        list: Last day of every month from start to end, both included
+    """
+    dates = []
+    year, month = start.year, start.month
+    while True:
+        following = date(year + month // 12, month % 12 + 1, 1)
+        month_end = following - timedelta(days=1)
+        if month_end > end:
+            return dates
+        if month_end >= start:
+            dates.append(month_end)
+        year, month = following.year, following.month
+
+def validity_events(records):
+    """
+    Lists when every edge record starts and stops being valid.
+
+    A record is valid from its valid_from date, included, until its valid_to date,
+    excluded. A missing bound leaves the interval open.
+
+    Args:
+        records (list): Edge records with optional valid_from and valid_to dates
+
+    Returns:
+        list: Sorted (date, kind, record index) events with kind 0 for an end and 1 for
+              a start. Records without valid_from start on date.min.
+    """
+    events = []
+    for index, record in enumerate(records):
+        valid_from = parse_date(record.get('valid_from'))
+        valid_to = parse_date(record.get('valid_to'))
+        if valid_from is not None and valid_to is not None and valid_to <= valid_from:
+            raise ValueError(f"Edge {record.get('id')!r} is valid to {valid_to} before it is valid from {valid_from}")
+        events.append((valid_from or date.min, 1, index))
+        if valid_to is not None:
+            events.append((valid_to, 0, index))
+    # Ends come first on the same date, so an edge can be replaced on the day its new version starts
+    events.sort(key=lambda event: (event[0], event[1]))
+    return events
+
+class TimeSeries:
+    """
+    Real shares of every edge over a sequence of snapshot dates, stored as change points.
+
+    An edge only gets an entry on the dates its real shares change, with None values
+    from the date it is left out of the network or calculation on.
+    """
+
+    def __init__(self, dates):
+        """
+        Args:
+            dates (list): Snapshot dates in order
+        """
+        self.dates = list(dates)
+        self.series = {}
+        self.last = {}
+
+    def record(self, date_index, edge_id, values):
+        """
+        Adds the values of an edge on a snapshot date, if they changed.
+
+        Args:
+            date_index (int): Position of the date in dates
+            edge_id: Edge ID
+            values (tuple): (lower, average, upper) percentages, or None if the edge has none
+        """
+        if (self.last[edge_id] == values) if edge_id in self.last else values is None:
+            return
+        self.last[edge_id] = values
+        self.series.setdefault(edge_id, []).append([date_index, *(values or (None, None, None))])
+
+    def at(self, edge_id, date_index):
+        """
+        Args:
+            edge_id: Edge ID
+            date_index (int): Position of the date in dates
+
+        Returns:
+            tuple: (lower, average, upper) percentages of the edge on the date, None if it has none
+        """
+        values = None
+        for index, *point in self.series.get(edge_id, ()):
+            if index > date_index:
+                break
+            values = None if point[0] is None else tuple(point)
+        return values
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: JSON serializable series, with the dates once and [date index, lower,
+                  average, upper] change points per edge
+        """
+        return {
+            'dates': [value.isoformat() for value in self.dates],
+            'fields': ['date', *REAL_SHARE_FIELDS],
+            'edges': {str(edge_id): points for edge_id, points in self.series.items()}
+        }
+
+def solve_snapshots(records, dates, stats=None, max_iterations=None, tolerance=None):
+    """
+    Calculates the real shares of a network with validity intervals on every snapshot date.
+
+    The network is solved in full on the first date only. The dates are then walked in
+    order, and the edges that start or stop being valid in between are applied as a delta
+    to the solved network, see incremental.IncrementalNetwork, so only the entities
+    depending on a changed edge are solved again and all other values are kept.
+
+    Args:
+        records (list): Edges with optional valid_from and valid_to dates (YYYY-MM-DD). An
+                        edge id can have several records with intervals that don't overlap,
+                        e.g. one per share
+        dates (list): Snapshot dates
+        stats (dict): If given, filled with the number of snapshots, changed and
+                      recomputed edges, and the time spent
+        max_iterations (int): Maximum number of passes over a single component, 1000 if None
+        tolerance (float): Maximum change in percentage points at convergence, 1e-10 if None
+
+    Returns:
+        TimeSeries: Real shares of every edge over the dates
+    """
+    dates = sorted(set(dates))
+    series = TimeSeries(dates)
+    if not dates:
+        return series
+
+    # Records are copied, the solved network writes its results to them
+    records = [dict(record) for record in records]
+    events = validity_events(records)
+    current = {}
+    position = apply_events(records, events, 0, dates[0], current, {})
+
+    start = time.perf_counter()
+    network = IncrementalNetwork([records[index] for index in current.values()],
+                                 tolerance / 100.0 if tolerance is not None else 1e-12,
+                                 max_iterations if max_iterations is not None else 1000)
+    for edge_id in current:
+        series.record(0, edge_id, network.real_shares(edge_id))
+    changed = 0
+    recomputed = 0
+
+    for date_index in range(1, len(dates)):
+        previous = {}
+        position = apply_events(records, events, position, dates[date_index], current, previous)
+        added, removed, modified = [], [], []
+        for edge_id, index in previous.items():
+            new_index = current.get(edge_id)
+            if index is None and new_index is not None:
+                added.append(records[new_index])
+            elif new_index is None and index is not None:
+                removed.append(edge_id)
+            elif index != new_index:
+                modified.append(records[new_index])
+        if not (added or removed or modified):
+            continue
+
+        updated = network.apply(added, removed, modified)
+        changed += len(added) + len(removed) + len(modified)
+        recomputed += len(updated)
+        for edge_id in removed:
+            series.record(date_index, edge_id, None)
+        for edge_id in updated:
+            series.record(date_index, edge_id, network.real_shares(edge_id))
+
+    if stats is not None:
+        stats.update({
+            'snapshots': len(dates),
+            'edges_changed': changed,
+            'edges_recomputed': recomputed,
+            'seconds': round(time.perf_counter() - start, 6)
+        })
+    return series
+
+def apply_events(records, events, position, day, current, previous):
+    """
+    Applies the validity events up to a date to the records valid so far.
+
+    Args:
+        records (list): Edge records
+        events (list): Sorted events from validity_events
+        position (int): Index of the first event that is not applied yet
+        day (date): Snapshot date, events on this date are applied
+        current (dict): Edge id -> index of its valid record, updated in place
+        previous (dict): Filled with the record index, or None, every changed edge id
+                         had before the events
+
+    Returns:
+        int: Index of the first event after the date
+    """
+    while position < len(events) and events[position][0] <= day:
+        _, kind, index = events[position]
+        edge_id = records[index]['id']
+        valid = current.get(edge_id)
+        if kind and valid is not None:
+            raise ValueError(f"Edge {edge_id!r} has overlapping validity intervals on {day}")
+        if kind or valid == index:
+            previous.setdefault(edge_id, valid)
+            if kind:
+                current[edge_id] = index
+            else:
+                del current[edge_id]
+        position += 1
+    return position
+
+# For direct script execution
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Calculate real ownership shares of a network with validity '
+                                                 'intervals on a series of snapshot dates.')
+    parser.add_argument('input_file', help='Path to a JSON file of edges with optional valid_from and valid_to dates')
+    parser.add_argument('output_file', help='Path to the JSON time series of the real shares of every edge')
+    dates = parser.add_mutually_exclusive_group(required=True)
+    dates.add_argument('--dates', nargs='+', help='Snapshot dates (YYYY-MM-DD)')
+    dates.add_argument('--month-ends', nargs=2, metavar=('START', 'END'),
+                       help='Take a snapshot at the end of every month from START to END')
+    parser.add_argument('--max-iterations', type=int, help='Maximum number of passes over a single component')
+    parser.add_argument('--tolerance', type=float, help='Largest change in percentage points at convergence')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    try:
+        if args.dates:
+            snapshot_dates = [parse_date(value) for value in args.dates]
+        else:
+            snapshot_dates = month_ends(parse_date(args.month_ends[0]), parse_date(args.month_ends[1]))
+    except ValueError as e:
+        parser.error(str(e))
+
+    with open(args.input_file, 'r') as f:
+        network = json.load(f)
+
+    stats = {}
+    result = solve_snapshots(network, snapshot_dates, stats, args.max_iterations, args.tolerance)
+    logger.info("Solved %d snapshots in %.2fs, %d edge changes, %d real shares recomputed.", stats.get('snapshots', 0),
+                stats.get('seconds', 0.0), stats.get('edges_changed', 0), stats.get('edges_recomputed', 0))
+
+    with open(args.output_file, 'w') as f:
+        json.dump(result.to_dict(), f, separators=(',', ':'))
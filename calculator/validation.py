@@ -0,0 +1,385 @@
+import json
+import logging
+import math
+from collections.abc import Sequence
+from functools import lru_cache
+from operator import itemgetter
+from .binary import BinaryNetwork
+from .graph import OwnershipGraph
+from .helpers import parse_share_string_cached, SHARE_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ('id', 'source', 'target', 'source_depth', 'target_depth', 'share', 'active')
+required_values = itemgetter(*REQUIRED_FIELDS)
+
+# Fields compared to tell a repeated edge from a conflicting one with the same id
+IDENTITY_FIELDS = ('source', 'target', 'source_depth', 'target_depth', 'share', 'active')
+
+# Issues whose edge is left out of the working set. Other issues are only reported.
+ERRORS = ('missing_field', 'invalid_entity', 'invalid_depth', 'malformed_share', 'self_loop', 'conflicting_duplicate')
+
+class ValidationReport:
+    """
+    Issues found while normalizing a network, one entry per problem edge.
+
+    Edges with errors are left out of the calculation and keep empty real shares.
+    Repeated edges are calculated once and get the result of their first occurrence.
+    """
+
+    def __init__(self):
+        self.issues = []
+        self.edges = 0
+        self.inactive = 0
+        self.duplicates = 0
+        self.focus_found = True
+
+    def add(self, index, edge_id, code, message):
+        """
+        Records an issue.
+
+        Args:
+            index (int): Position of the edge in the network
+            edge_id: Edge ID, None if the edge has none
+            code (str): Kind of issue, an error if in ERRORS
+            message (str): Description of the issue
+        """
+        self.issues.append({'index': index, 'id': edge_id, 'code': code, 'message': message})
+
+    @property
+    def errors(self):
+        """
+        Returns:
+            list: Issues whose edge was left out of the calculation
+        """
+        return [issue for issue in self.issues if issue['code'] in ERRORS]
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: JSON serializable report with counts and every issue in edge order
+        """
+        counts = {}
+        for issue in self.issues:
+            counts[issue['code']] = counts.get(issue['code'], 0) + 1
+        return {
+            'edges': self.edges,
+            'inactive': self.inactive,
+            'duplicates': self.duplicates,
+            'invalid': len(self.errors),
+            'focus_found': self.focus_found,
+            'counts': counts,
+            'issues': self.issues
+        }
+
+    def write(self, f):
+        """
+        Writes the report as JSON.
+
+        Args:
+            f (file): Writable text file
+        """
+        json.dump(self.to_dict(), f, indent=2)
+        f.write('\n')
+
+class WorkingSet:
+    """
+    Graph and repeated edges shared by the working sets of list and binary networks.
+    """
+
+    @property
+    def shares(self):
+        """
+        Returns:
+            list: Parsed share tuple of every edge, in edge order
+        """
+        return self.graph.shares
+
+    def ownership_graph(self):
+        """
+        Returns:
+            OwnershipGraph: Graph of the working set, built once
+        """
+        return self.graph
+
+    def copy_duplicate_results(self):
+        """
+        Gives every repeated edge the real shares of the edge it repeats.
+        """
+        for edge, first in self.duplicates:
+            for field in ('real_lower_share', 'real_average_share', 'real_upper_share'):
+                edge[field] = first.get(field)
+
+class NormalizedNetwork(WorkingSet, list):
+    """
+    Working set of a network: the valid, active, unique edges, in network order.
+
+    The list holds the edge dicts of the network itself, so results written to it show
+    up in the network. The ownership graph of the edges, with parsed shares and node
+    indices, is built in the same pass and reused by every engine.
+    """
+
+    def __init__(self, edges, graph, duplicates):
+        """
+        Args:
+            edges (list): Edge dicts of the working set
+            graph (OwnershipGraph): Graph of the edges
+            duplicates (list): (edge, first) pairs of repeated edges and the edge they repeat
+        """
+        super().__init__(edges)
+        self.graph = graph
+        self.graph.edges = self
+        self.duplicates = duplicates
+
+class NormalizedBinaryNetwork(WorkingSet, Sequence):
+    """
+    Working set of a binary.BinaryNetwork, see NormalizedNetwork.
+
+    Only the positions of the working set edges are kept. Their edge dicts are built by
+    the network when an edge is first accessed, e.g. to write its results.
+    """
+
+    def __init__(self, network, positions, graph, duplicates):
+        """
+        Args:
+            network (BinaryNetwork): The network
+            positions (list): Positions of the working set edges in the network
+            graph (OwnershipGraph): Graph of the edges, built from the columns
+            duplicates (list): (edge, first) pairs of repeated edges and the edge they repeat
+        """
+        self.network = network
+        self.positions = positions
+        self.graph = graph
+        self.graph.edges = self
+        self.duplicates = duplicates
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.network[position] for position in self.positions[index]]
+        return self.network[self.positions[index]]
+
+def share_error(share):
+    """
+    Checks a share string strictly, where parse_share_string falls back to 0.
+
+    Args:
+        share (str): Share string in format like "50%", "10-15%", or "<10%"
+
+    Returns:
+        str: Why the share is malformed, None if it is valid
+    """
+    if not isinstance(share, str):
+        return f"share must be a string, got {type(share).__name__}"
+    return share_string_error(share)
+
+@lru_cache(maxsize=SHARE_CACHE_SIZE)
+def share_string_error(share):
+    """
+    Memoized share_error for share strings, which repeat a lot.
+    """
+    value = share.strip().rstrip('%')
+    if value.startswith('<'):
+        parts = [value[1:]]
+    else:
+        parts = value.split('-')
+        if len(parts) > 2:
+            return f"share '{share}' has more than two bounds"
+
+    for part in parts:
+        try:
+            number = float(part)
+        except ValueError:
+            return f"share '{share}' is not a percentage"
+        if not math.isfinite(number) or not 0.0 <= number <= 100.0:
+            return f"share '{share}' is outside 0-100%"
+    return None
+
+def edge_error(edge):
+    """
+    Args:
+        edge (dict): Edge
+
+    Returns:
+        tuple: (code, message) of the first problem of the edge, None if it is valid
+    """
+    try:
+        _, source, target, source_depth, target_depth, share, _ = values = required_values(edge)
+    except KeyError:
+        values = None
+    if values is None or None in values:
+        missing = [field for field in REQUIRED_FIELDS if edge.get(field) is None]
+        return 'missing_field', f"missing {', '.join(missing)}"
+
+    if isinstance(source, (list, dict, float)) or isinstance(target, (list, dict, float)):
+        field = 'source' if isinstance(source, (list, dict, float)) else 'target'
+        return 'invalid_entity', f"{field} must be an entity id, got {type(edge[field]).__name__}"
+    # Exact type checks, so bools are not taken for depths
+    if type(source_depth) is not int or type(target_depth) is not int:
+        field = 'source_depth' if type(source_depth) is not int else 'target_depth'
+        return 'invalid_depth', f"{field} must be an integer, got {edge[field]!r}"
+
+    if source == target:
+        return 'self_loop', f"entity {source!r} owns itself"
+
+    message = share_error(share)
+    if message is not None:
+        return 'malformed_share', message
+    return None
+
+def normalize_network(network, report=None):
+    """
+    Validates and normalizes a network in one pass before it is solved.
+
+    Inactive edges are dropped from the working set, repeated edges are kept once and
+    edges that can't be calculated are dropped and reported. Share strings are parsed
+    and entities numbered while building the ownership graph of the working set.
+
+    Args:
+        network (list): List of edges representing ownership relationships, or a
+                        binary.BinaryNetwork, which is validated from its columns
+        report (ValidationReport): If given, filled with the issues found
+
+    Returns:
+        NormalizedNetwork: Working set of the network, a NormalizedBinaryNetwork for binary networks
+    """
+    if report is None:
+        report = ValidationReport()
+    if isinstance(network, BinaryNetwork):
+        return normalize_binary_network(network, report)
+
+    graph = OwnershipGraph()
+    edges = []
+    duplicates = []
+    seen = {}
+
+    for index, edge in enumerate(network):
+        report.edges += 1
+        edge_id = edge.get('id')
+        if edge.get('active') is not None and not edge['active']:
+            report.inactive += 1
+            # Entities at depth 0 are focus nodes even if the edge is inactive, like in OwnershipGraph
+            for field in ('source', 'target'):
+                if edge.get(f'{field}_depth') == 0 and edge.get(field) is not None:
+                    graph.focus.add(graph.add_node(edge[field]))
+            continue
+
+        problem = edge_error(edge)
+        if problem is not None:
+            report.add(index, edge_id, *problem)
+            continue
+
+        first = seen.get(edge_id)
+        if first is not None:
+            if all(edge[field] == first[field] for field in IDENTITY_FIELDS):
+                report.duplicates += 1
+                report.add(index, edge_id, 'duplicate_edge', 'repeats an earlier edge and gets its result')
+                duplicates.append((edge, first))
+            else:
+                report.add(index, edge_id, 'conflicting_duplicate', 'reuses the id of a different earlier edge')
+            continue
+        seen[edge_id] = edge
+
+        graph.add_edge(edge['source'], edge['target'], edge['source_depth'], edge['target_depth'],
+                       parse_share_string_cached(edge['share']), True)
+        edges.append(edge)
+
+    finish_report(report, graph, edges)
+    return NormalizedNetwork(edges, graph, duplicates)
+
+def normalize_binary_network(network, report):
+    """
+    Validates and normalizes a binary network from its columns, see normalize_network.
+
+    The stored share bounds are used instead of parsing the share strings, and share
+    strings are only checked once each. No edge dicts are built, except for repeated
+    edges, which get the result of their first occurrence.
+
+    Args:
+        network (BinaryNetwork): The network
+        report (ValidationReport): Filled with the issues found
+
+    Returns:
+        NormalizedBinaryNetwork: Working set of the network
+    """
+    columns = network.columns
+    ids = columns['id'].tolist()
+    sources = columns['source'].tolist()
+    targets = columns['target'].tolist()
+    source_depths = columns['source_depth'].tolist()
+    target_depths = columns['target_depth'].tolist()
+    shares = columns['share'].tolist()
+    bounds = zip(columns['share_lower'].tolist(), columns['share_average'].tolist(), columns['share_upper'].tolist())
+    # String indices are interned, so equal ids and share strings have equal indices
+    share_errors = {}
+
+    graph = OwnershipGraph()
+    positions = []
+    duplicates = []
+    seen = {}
+
+    for index, (active, bound) in enumerate(zip(network.active_flags(), bounds)):
+        report.edges += 1
+        source, target = sources[index], targets[index]
+        source_depth, target_depth = source_depths[index], target_depths[index]
+        if not active:
+            report.inactive += 1
+            if source_depth == 0:
+                graph.focus.add(graph.add_node(source))
+            if target_depth == 0:
+                graph.focus.add(graph.add_node(target))
+            continue
+
+        edge_id, share = ids[index], shares[index]
+        if edge_id < 0 or share < 0:
+            missing = [field for field, value in (('id', edge_id), ('share', share)) if value < 0]
+            report.add(index, None if edge_id < 0 else network.string(edge_id), 'missing_field',
+                       f"missing {', '.join(missing)}")
+            continue
+        if source == target:
+            report.add(index, network.string(edge_id), 'self_loop', f"entity {source!r} owns itself")
+            continue
+        if share not in share_errors:
+            share_errors[share] = share_error(network.string(share))
+        if share_errors[share] is not None:
+            report.add(index, network.string(edge_id), 'malformed_share', share_errors[share])
+            continue
+
+        first = seen.get(edge_id)
+        if first is not None:
+            if (source, target, source_depth, target_depth, share) == (
+                    sources[first], targets[first], source_depths[first], target_depths[first], shares[first]):
+                report.duplicates += 1
+                report.add(index, network.string(edge_id), 'duplicate_edge',
+                           'repeats an earlier edge and gets its result')
+                duplicates.append((network[index], network[first]))
+            else:
+                report.add(index, network.string(edge_id), 'conflicting_duplicate',
+                           'reuses the id of a different earlier edge')
+            continue
+        seen[edge_id] = index
+
+        graph.add_edge(source, target, source_depth, target_depth, bound, True)
+        positions.append(index)
+
+    finish_report(report, graph, positions)
+    return NormalizedBinaryNetwork(network, positions, graph, duplicates)
+
+def finish_report(report, graph, edges):
+    """
+    Checks for a focus entity and logs the number of edges left out.
+
+    Args:
+        report (ValidationReport): Report of the network
+        graph (OwnershipGraph): Graph of the working set
+        edges (list): Working set
+    """
+    report.focus_found = bool(graph.focus) or not edges
+    if not report.focus_found:
+        report.add(None, None, 'no_focus', 'no entity at depth 0, no edge can be related to a focus company')
+
+    errors = len(report.errors)
+    if errors:
+        logger.warning("Left out %d invalid edges of %d.", errors, report.edges)
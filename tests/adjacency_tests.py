@@ -0,0 +1,54 @@
+import unittest
+from calculator.adjacency import AdjacencyIndex
+from calculator.validation import normalize_network
+from tests.support import edge
+
+class AdjacencyIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.network = [
+            edge("A", 1, "FC", 0),
+            edge("B", 2, "A", 1),
+            edge("A", 1, "C", 1),
+            edge("FC", 0, "S", -1),
+            edge("S", -1, "T", -2),
+            edge("B", 2, "FC", 0, active=False),
+            edge("C", 1, "T", -2)
+        ]
+
+    def test_rows_group_edges_by_entity_and_direction(self):
+        index = AdjacencyIndex(self.network)
+        self.assertEqual(list(index.row_edges(0)), [0, 2])
+        self.assertEqual(list(index.row_edges(2)), [0, 2])
+        self.assertEqual(list(index.row_edges(1)), [1])
+        self.assertEqual(list(index.row_edges(4)), [4, 6])
+        self.assertEqual(index.rows[5], -1)
+        self.assertEqual(len(index.adjacency), 6)
+
+    def test_parents_are_carriers(self):
+        index = AdjacencyIndex(self.network)
+        # B's ownership is derived from A, whose ownership A_C carries, the smaller id of A_FC and A_C
+        self.assertEqual(index.parents[1], 2)
+        self.assertEqual(index.parents[0], -1)
+        self.assertEqual(index.parents[2], -1)
+        self.assertEqual(index.parents[4], 3)
+        self.assertEqual(index.parents[6], -1)
+        self.assertEqual([index.pinned[position] for position in range(7)], [1, 0, 0, 1, 0, 0, 0])
+
+    def test_carriers_do_not_depend_on_input_order(self):
+        def carrier_ids(network):
+            index = AdjacencyIndex(network)
+            return sorted(network[carrier]['id'] for carrier in index.carriers if carrier >= 0)
+
+        expected = carrier_ids(self.network)
+        self.assertEqual(carrier_ids(self.network[::-1]), expected)
+        self.assertEqual(carrier_ids(self.network[3:] + self.network[:3]), expected)
+
+    def test_graph_nodes_are_reused(self):
+        edges = normalize_network(self.network)
+        index = AdjacencyIndex(edges, edges.graph)
+        expected = AdjacencyIndex(list(edges))
+        self.assertEqual(list(index.parents), list(expected.parents))
+        self.assertEqual(list(index.adjacency), list(expected.adjacency))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from calculator import batch
+from calculator.batch import collect_inputs, run_batch
+from tests.support import DATA_DIR
+
+def exit_on_crash_file(input_file, *args):
+    # Replaces process_file in the workers, a file named Crash*.json kills its worker
+    if os.path.basename(input_file).startswith('Crash'):
+        os._exit(3)
+    return process_file(input_file, *args)
+
+process_file = batch.process_file
+
+class BatchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.input_directory = os.path.join(self.directory, 'input')
+        os.makedirs(self.input_directory)
+        for name in ('ResightsApS.json', 'CasaAS.json'):
+            shutil.copy(os.path.join(DATA_DIR, name), self.input_directory)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_collect_inputs_from_directory(self):
+        open(os.path.join(self.input_directory, 'notes.txt'), 'w').close()
+        inputs = collect_inputs(self.input_directory)
+        self.assertEqual([os.path.basename(path) for path in inputs], ['CasaAS.json', 'ResightsApS.json'])
+
+    def test_collect_inputs_from_manifest(self):
+        manifest = os.path.join(self.directory, 'manifest.txt')
+        with open(manifest, 'w') as f:
+            f.write('# nightly\ninput/CasaAS.json\n\n')
+        self.assertEqual(collect_inputs(manifest), [os.path.join(self.directory, 'input/CasaAS.json')])
+
+    def test_results_of_files_with_the_same_name_are_kept_apart(self):
+        for name in ('a', 'b'):
+            os.makedirs(os.path.join(self.directory, name))
+        shutil.copy(os.path.join(DATA_DIR, 'CasaAS.json'), os.path.join(self.directory, 'a', 'net.json'))
+        shutil.copy(os.path.join(DATA_DIR, 'ResightsApS.json'), os.path.join(self.directory, 'b', 'net.json'))
+        manifest = os.path.join(self.directory, 'manifest.txt')
+        with open(manifest, 'w') as f:
+            f.write('a/net.json\nb/net.json\n')
+
+        output_directory = os.path.join(self.directory, 'output')
+        summary = run_batch(collect_inputs(manifest), output_directory, engine='scc', workers=1, top_k=2)
+        self.assertEqual(summary['failed'], 0)
+        for name, source in (('a', 'CasaAS.json'), ('b', 'ResightsApS.json')):
+            with open(os.path.join(output_directory, name, 'net.json'), 'r') as f, \
+                    open(os.path.join(DATA_DIR, source), 'r') as expected:
+                self.assertEqual(len(json.load(f)), len(json.load(expected)))
+            self.assertTrue(os.path.exists(os.path.join(output_directory, name, 'net.paths.json')))
+
+        with open(manifest, 'a') as f:
+            f.write('a/../a/net.json\n')
+        with self.assertRaises(ValueError):
+            run_batch(collect_inputs(manifest), output_directory)
+
+    def test_bad_file_does_not_abort_batch(self):
+        broken = os.path.join(self.input_directory, 'Broken.json')
+        with open(broken, 'w') as f:
+            f.write('[{"id": ')
+
+        output_directory = os.path.join(self.directory, 'output')
+        summary = run_batch(collect_inputs(self.input_directory), output_directory, engine='scc', workers=2)
+
+        self.assertEqual(summary['succeeded'], 2)
+        self.assertEqual(summary['failed'], 1)
+        statuses = {os.path.basename(entry['input']): entry['status'] for entry in summary['files']}
+        self.assertEqual(statuses, {'Broken.json': 'error', 'CasaAS.json': 'ok', 'ResightsApS.json': 'ok'})
+
+        casa = next(entry for entry in summary['files'] if entry['input'].endswith('CasaAS.json'))
+        self.assertEqual(casa['edges'], 70)
+        self.assertTrue(casa['converged'])
+        self.assertGreaterEqual(casa['iterations'], 1)
+
+        with open(os.path.join(output_directory, 'CasaAS.json'), 'r') as f:
+            self.assertEqual(len(json.load(f)), 70)
+        with open(os.path.join(output_directory, 'summary.json'), 'r') as f:
+            self.assertEqual(json.load(f)['failed'], 1)
+
+    def test_dead_worker_does_not_abort_batch(self):
+        for name in ('A.json', 'B.json', 'Crash.json', 'D.json'):
+            shutil.copy(os.path.join(DATA_DIR, 'ResightsApS.json'), os.path.join(self.input_directory, name))
+
+        output_directory = os.path.join(self.directory, 'output')
+        with mock.patch('calculator.batch.process_file', exit_on_crash_file):
+            summary = run_batch(collect_inputs(self.input_directory), output_directory, engine='scc', workers=2)
+
+        self.assertEqual((summary['succeeded'], summary['failed']), (5, 1))
+        crashed = next(entry for entry in summary['files'] if entry['status'] != 'ok')
+        self.assertTrue(crashed['input'].endswith('Crash.json'))
+        self.assertIn('BrokenProcessPool', crashed['error'])
+        self.assertTrue(os.path.exists(os.path.join(output_directory, 'D.json')))
+
+    def test_output_format_and_compression(self):
+        output_directory = os.path.join(self.directory, 'output')
+        summary = run_batch(collect_inputs(self.input_directory), output_directory, engine='scc', workers=1, top_k=1,
+                            output_format='csv', results_only=True, compression='gzip')
+        self.assertEqual(summary['failed'], 0)
+        with gzip.open(os.path.join(output_directory, 'CasaAS.csv.gz'), 'rt', newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(len(rows), 70)
+        self.assertEqual(list(rows[0]), ['id', 'real_lower_share', 'real_average_share', 'real_upper_share'])
+        self.assertTrue(os.path.exists(os.path.join(output_directory, 'CasaAS.paths.json')))
+
+    def test_explain_writes_paths_next_to_results(self):
+        output_directory = os.path.join(self.directory, 'output')
+        summary = run_batch(collect_inputs(self.input_directory), output_directory, engine='scc', workers=1, top_k=2)
+
+        self.assertEqual(summary['failed'], 0)
+        with open(os.path.join(output_directory, 'CasaAS.paths.json'), 'r') as f:
+            paths = json.load(f)
+        self.assertEqual(paths['top_k'], 2)
+        self.assertTrue(all(len(entry['paths']) <= 2 for entry in paths['edges']))
+
+if __name__ == '__main__':
+    unittest.main()
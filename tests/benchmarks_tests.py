@@ -0,0 +1,93 @@
+import asyncio
+import json
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.generators import GENERATORS, FOCUS_ID
+from benchmarks.loadtest import percentile, run_local
+from benchmarks.pruning import run_engine_pruning_benchmark, run_pruning_benchmark
+from benchmarks.runner import run_benchmarks
+from benchmarks.startup import run_startup_benchmark
+from benchmarks.writers import run_writer_benchmark
+from calculator.calculator import calculate_real_shares
+
+class BenchmarksTests(unittest.TestCase):
+    def test_generators_are_deterministic(self):
+        for name, generator in GENERATORS.items():
+            with self.subTest(generator=name):
+                self.assertEqual(generator(200, 3), generator(200, 3))
+                self.assertNotEqual(generator(200, 3), generator(200, 4))
+
+    def test_generators_produce_valid_networks(self):
+        for name, generator in GENERATORS.items():
+            with self.subTest(generator=name):
+                network = generator(300)
+                self.assertEqual(len(network), 300)
+                self.assertEqual(len({edge['id'] for edge in network}), len(network))
+                self.assertTrue(any(FOCUS_ID in (edge['source'], edge['target']) for edge in network))
+                for edge in network:
+                    self.assertTrue(edge['source_depth'] > edge['target_depth'] or edge['source_depth'] >= 0)
+
+    def test_engines_converge_on_generated_networks(self):
+        for name, generator in GENERATORS.items():
+            for engine in ('sparse', 'scc'):
+                with self.subTest(generator=name, engine=engine):
+                    stats = {}
+                    calculate_real_shares(generator(200), engine, stats)
+                    self.assertTrue(stats['converged'])
+
+    def test_run_benchmarks(self):
+        report = run_benchmarks(['deep_chain', 'mixed'], [20], ['iterative', 'scc'], repeat=1)
+        self.assertEqual(len(report['results']), 4)
+        for result in report['results']:
+            self.assertEqual(result['edges'], 20)
+            self.assertGreater(result['seconds'], 0)
+            self.assertGreater(result['peak_memory_bytes'], 0)
+            self.assertIn('iterations', result)
+            self.assertIn('converged', result)
+        self.assertIn('python', report)
+
+    def test_percentile(self):
+        self.assertEqual(percentile([4, 1, 3, 2], 0.5), 2)
+        self.assertEqual(percentile(list(range(1, 101)), 0.99), 99)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_load_test(self):
+        payloads = [json.dumps(GENERATORS['mixed'](50, seed)).encode('utf-8') for seed in range(2)]
+        with ThreadPoolExecutor(2) as executor:
+            report = asyncio.run(run_local(payloads, 12, 4, 'scc', executor=executor))
+        self.assertEqual(report['statuses'], {'200': 12})
+        self.assertLessEqual(report['p50_seconds'], report['p99_seconds'])
+        self.assertEqual(report['service']['requests'], 12)
+
+    def test_pruning_benchmark(self):
+        results = run_pruning_benchmark(['mixed'], size=500, focus_count=10, thresholds=(0.01, 1.0))
+        self.assertEqual([row['min_contribution'] for row in results], [None, 0.01, 1.0])
+        self.assertEqual((results[0]['error_bound'], results[0]['largest_error']), (0.0, 0.0))
+        for row in results[1:]:
+            self.assertLessEqual(row['largest_error'], row['error_bound'] + 0.01)
+            self.assertLessEqual(row['values'], results[0]['values'])
+
+    def test_engine_pruning_benchmark(self):
+        results = run_engine_pruning_benchmark(['mixed'], size=500, thresholds=(1.0,))
+        self.assertEqual([(row['engine'], row['min_contribution']) for row in results],
+                         [('sparse', None), ('sparse', 1.0), ('scc', None), ('scc', 1.0)])
+        for row in results:
+            self.assertLessEqual(row['largest_error'], row['error_bound'] + 0.01)
+
+    def test_startup_benchmark(self):
+        report = run_startup_benchmark('data/CasaAS.json', runs=2)
+        for kind in ('cold_process', 'client_process', 'client_call', 'python_startup'):
+            self.assertEqual(report[kind]['runs'], 2)
+            self.assertLessEqual(report[kind]['min_ms'], report[kind]['p90_ms'])
+
+    def test_writer_benchmark(self):
+        results = run_writer_benchmark(size=500, compressions=(None, 'gzip'), repeat=1)
+        self.assertEqual(len(results), 16)
+        sizes = {(row['format'], row['results_only'], row['compression']): row['bytes'] for row in results}
+        for output_format in ('json', 'ndjson', 'csv', 'pretty'):
+            self.assertLess(sizes[output_format, True, None], sizes[output_format, False, None])
+            self.assertLess(sizes[output_format, False, 'gzip'], sizes[output_format, False, None])
+        self.assertLess(sizes['json', False, None], sizes['pretty', False, None])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from calculator.binary import BinaryNetwork, write_binary, load_binary, is_binary_file, convert
+from calculator.calculator import calculate_real_shares, main
+from calculator.validation import ValidationReport, normalize_network
+from tests.support import edge, load
+
+DATA_FILES = ('data/ResightsApS.json', 'data/CasaAS.json')
+
+class BinaryNetworkTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.binary_file = os.path.join(self.directory.name, 'network.ownb')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        for data_file in DATA_FILES:
+            network = load(data_file)
+            write_binary(network, self.binary_file)
+            self.assertTrue(is_binary_file(self.binary_file))
+            with load_binary(self.binary_file) as binary:
+                self.assertEqual(len(binary), len(network))
+                self.assertEqual(binary[-1], network[-1])
+                self.assertEqual(binary.to_network(), network)
+
+    def test_none_values(self):
+        network = [{"id": "A_FC", "source": 1, "source_name": None, "source_depth": 1, "target": 2,
+                    "target_depth": 0, "share": "10-20%", "real_lower_share": None,
+                    "real_average_share": None, "real_upper_share": None, "active": False}]
+        write_binary(network, self.binary_file)
+        with load_binary(self.binary_file) as binary:
+            edge = binary[0]
+        self.assertIsNone(edge['source_name'])
+        self.assertIsNone(edge['target_name'])
+        self.assertIsNone(edge['real_upper_share'])
+        self.assertFalse(edge['active'])
+
+    def test_engines_run_on_binary_network(self):
+        network = load('data/CasaAS.json')
+        write_binary(network, self.binary_file)
+        for engine in ('iterative', 'sparse', 'scc'):
+            expected = calculate_real_shares(load('data/CasaAS.json'), engine)
+            with load_binary(self.binary_file) as binary:
+                self.assertEqual(list(calculate_real_shares(binary, engine)), expected, engine)
+
+    def test_normalize_binary_network_from_columns(self):
+        write_binary(load('data/CasaAS.json'), self.binary_file)
+        expected = normalize_network(load('data/CasaAS.json'))
+        with load_binary(self.binary_file) as binary, \
+                mock.patch.object(BinaryNetwork, 'record', side_effect=AssertionError('edge dict built')), \
+                mock.patch.object(BinaryNetwork, '_build_edges', side_effect=AssertionError('edge dicts built')):
+            edges = normalize_network(binary)
+            self.assertEqual(len(edges), len(expected))
+            self.assertEqual(edges.graph.node_ids, expected.graph.node_ids)
+            self.assertEqual(edges.graph.focus, expected.graph.focus)
+            self.assertEqual(edges.shares, expected.shares)
+
+    def test_binary_network_report_matches_json(self):
+        network = [
+            edge(1, 1, 0, 0, "50%"),
+            edge(2, 2, 1, 1, "40%"),
+            edge(2, 2, 1, 1, "40%"),
+            edge(2, 2, 1, 1, "60%", edge_id="2_1"),
+            edge(3, 1, 3, 1, "10%"),
+            edge(4, 1, 0, 0, "lots"),
+            edge(5, 1, 6, 0, "10%", active=False),
+            edge(0, 0, 7, -1, "80%")
+        ]
+        network = [dict(record, source_name=None, target_name=None) for record in network]
+        write_binary(network, self.binary_file)
+        for engine in ('iterative', 'sparse', 'scc'):
+            expected_report = ValidationReport()
+            expected = calculate_real_shares([dict(record) for record in network], engine, report=expected_report)
+            report = ValidationReport()
+            with load_binary(self.binary_file) as binary:
+                self.assertEqual(list(calculate_real_shares(binary, engine, report=report)), expected, engine)
+            self.assertEqual(report.to_dict(), expected_report.to_dict(), engine)
+
+    def test_main_and_stream_accept_binary_input(self):
+        write_binary(load('data/CasaAS.json'), self.binary_file)
+        for stream in (False, True):
+            binary_output = os.path.join(self.directory.name, 'binary.json')
+            json_output = os.path.join(self.directory.name, 'json.json')
+            main(self.binary_file, binary_output, 'scc', stream=stream)
+            main('data/CasaAS.json', json_output, 'scc', stream=stream)
+            self.assertEqual(load(binary_output), load(json_output))
+
+    def test_convert(self):
+        json_file = os.path.join(self.directory.name, 'network.json')
+        convert('data/ResightsApS.json', self.binary_file)
+        convert(self.binary_file, json_file)
+        self.assertFalse(is_binary_file(json_file))
+        self.assertEqual(load(json_file), load('data/ResightsApS.json'))
+
+    def test_invalid_input(self):
+        with self.assertRaises(ValueError):
+            load_binary('data/CasaAS.json')
+
+        edge = load('data/CasaAS.json')[0]
+        with self.assertRaises(ValueError):
+            write_binary([dict(edge, note="unknown field")], self.binary_file)
+        with self.assertRaises(ValueError):
+            write_binary([dict(edge, source="entity")], self.binary_file)
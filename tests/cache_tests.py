@@ -0,0 +1,88 @@
+import copy
+import os
+import shutil
+import tempfile
+import unittest
+from calculator.calculator import calculate_real_shares, main
+from calculator.cache import ResultCache, network_key
+from tests.support import DATA_DIR, load_network
+
+class ResultCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_network_key_ignores_names_and_inactive_edges(self):
+        network = load_network('CasaAS.json')
+        renamed = copy.deepcopy(network)
+        renamed[0]['source_name'] = 'Renamed'
+        inactive = next(edge for edge in renamed if not edge['active'])
+        inactive['share'] = '1%'
+        self.assertEqual(network_key(network, 'scc'), network_key(renamed, 'scc'))
+
+    def test_network_key_changes_with_share_and_engine(self):
+        network = load_network('CasaAS.json')
+        changed = copy.deepcopy(network)
+        next(edge for edge in changed if edge['active'])['share'] = '1%'
+        self.assertNotEqual(network_key(network, 'scc'), network_key(changed, 'scc'))
+        self.assertNotEqual(network_key(network, 'scc'), network_key(network, 'iterative'))
+
+    def test_settings_are_part_of_the_key(self):
+        cache = ResultCache(self.directory)
+        calculate_real_shares(load_network('CasaAS.json'), 'scc', cache=cache)
+        stats = {}
+        calculate_real_shares(load_network('CasaAS.json'), 'scc', stats, cache, max_iterations=2)
+        self.assertEqual(stats['cache'], 'miss')
+        stats = {}
+        calculate_real_shares(load_network('CasaAS.json'), 'scc', stats, cache, max_iterations=2)
+        self.assertEqual(stats['cache'], 'hit')
+
+    def test_hit_returns_same_result(self):
+        cache = ResultCache(self.directory)
+        first_stats = {}
+        expected = calculate_real_shares(load_network('CasaAS.json'), 'scc', first_stats, cache)
+        second_stats = {}
+        result = calculate_real_shares(load_network('CasaAS.json'), 'scc', second_stats, cache)
+
+        self.assertEqual(result, expected)
+        self.assertEqual(first_stats['cache'], 'miss')
+        self.assertEqual(second_stats['cache'], 'hit')
+        self.assertEqual(second_stats['iterations'], first_stats['iterations'])
+        self.assertEqual(cache.stats(), {'hits': 1, 'misses': 1})
+
+    def test_bypass_recomputes(self):
+        calculate_real_shares(load_network('CasaAS.json'), 'scc', cache=ResultCache(self.directory))
+        cache = ResultCache(self.directory, bypass=True)
+        calculate_real_shares(load_network('CasaAS.json'), 'scc', cache=cache)
+        self.assertEqual(cache.stats(), {'hits': 0, 'misses': 1})
+
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = ResultCache(self.directory, max_bytes=25)
+        cache.put('a', {'value': 1})
+        os.utime(cache.path('a'), (1, 1))
+        cache.put('b', {'value': 2})
+        os.utime(cache.path('b'), (2, 2))
+        self.assertIsNotNone(cache.get('a'))
+        cache.put('c', {'value': 3})
+
+        self.assertTrue(os.path.exists(cache.path('a')))
+        self.assertFalse(os.path.exists(cache.path('b')))
+        self.assertTrue(os.path.exists(cache.path('c')))
+
+    def test_clear(self):
+        cache = ResultCache(self.directory)
+        cache.put('a', {'value': 1})
+        cache.clear()
+        self.assertIsNone(cache.get('a'))
+
+    def test_streaming_rejects_cache(self):
+        cache = ResultCache(self.directory)
+        with self.assertRaises(ValueError):
+            main(os.path.join(DATA_DIR, 'CasaAS.json'), os.path.join(self.directory, 'output.json'), stream=True,
+                 cache=cache)
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,8 @@
+import copy
 import unittest
-from calculator.calculator import calculate_real_shares
+from benchmarks.generators import cross_holdings
+from calculator.calculator import ENGINES, calculate_real_shares
+from tests.support import load_network
 
 class CalculatorTestCase(unittest.TestCase):
     def test_simple_ownership_no_cycles(self):
@@ -311,5 +314,110 @@ class CalculatorTestCase(unittest.TestCase):
         self.assertAlmostEqual(c2_fc_edge["real_average_share"], 2.5, places=1)
         self.assertAlmostEqual(c2_fc_edge["real_upper_share"], 2.5, places=1)
 
+    def test_inactive_edges_are_ignored(self):
+        # FC owns 50% of S1 directly through an inactive edge and 50% through S0
+        network = [
+            {
+                "id": "0_S0",
+                "source": 0,
+                "source_name": "FC",
+                "source_depth": 0,
+                "target": 100,
+                "target_name": "S0",
+                "target_depth": -1,
+                "share": "100%",
+                "real_lower_share": None,
+                "real_average_share": None,
+                "real_upper_share": None,
+                "active": True
+            },
+            {
+                "id": "0_S1",
+                "source": 0,
+                "source_name": "FC",
+                "source_depth": 0,
+                "target": 101,
+                "target_name": "S1",
+                "target_depth": -2,
+                "share": "50%",
+                "real_lower_share": None,
+                "real_average_share": None,
+                "real_upper_share": None,
+                "active": False
+            },
+            {
+                "id": "S0_S1",
+                "source": 100,
+                "source_name": "S0",
+                "source_depth": -1,
+                "target": 101,
+                "target_name": "S1",
+                "target_depth": -2,
+                "share": "50%",
+                "real_lower_share": None,
+                "real_average_share": None,
+                "real_upper_share": None,
+                "active": True
+            }
+        ]
+
+        result = calculate_real_shares(network)
+
+        s0_s1_edge = next(edge for edge in result if edge["id"] == "S0_S1")
+        self.assertAlmostEqual(s0_s1_edge["real_lower_share"], 50.0)
+        self.assertAlmostEqual(s0_s1_edge["real_upper_share"], 50.0)
+
+        inactive_edge = next(edge for edge in result if edge["id"] == "0_S1")
+        self.assertIsNone(inactive_edge["real_lower_share"])
+
+    def test_inactive_sibling_edge_on_casa(self):
+        # Before inactive edges were ignored, the inactive 29205272_39641208 edge added another 50-67% here
+        network = load_network('CasaAS.json')
+
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                result = calculate_real_shares(copy.deepcopy(network), engine=engine)
+
+                edge = next(edge for edge in result if edge["id"] == "39173204_39641208")
+                self.assertEqual(
+                    (edge["real_lower_share"], edge["real_average_share"], edge["real_upper_share"]),
+                    (50.0, 58.5, 67.0)
+                )
+                for edge in result:
+                    if not edge["active"]:
+                        self.assertIsNone(edge["real_lower_share"])
+
+    def test_convergence_settings(self):
+        network = cross_holdings(20)
+        stats = {}
+        calculate_real_shares(copy.deepcopy(network), stats=stats)
+        self.assertFalse(stats['converged'])
+
+        stats = {}
+        calculate_real_shares(copy.deepcopy(network), stats=stats, max_iterations=100)
+        self.assertTrue(stats['converged'])
+        self.assertGreater(stats['iterations'], 10)
+
+        stats = {}
+        calculate_real_shares(copy.deepcopy(network), stats=stats, max_iterations=100, tolerance=50.0)
+        self.assertEqual(stats, {'iterations': 1, 'converged': True})
+
+        stats = {}
+        calculate_real_shares(network, engine='scc', stats=stats, max_iterations=2)
+        self.assertEqual(stats, {'iterations': 2, 'converged': False})
+
+    def test_max_iterations_at_least_one(self):
+        for engine in ENGINES:
+            with self.subTest(engine=engine), self.assertRaises(ValueError):
+                calculate_real_shares(cross_holdings(5), engine=engine, max_iterations=0)
+
+    def test_acceleration_only_for_scc(self):
+        with self.assertRaises(ValueError):
+            calculate_real_shares([], engine='iterative', acceleration='aitken')
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            calculate_real_shares([], engine='unknown')
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from calculator import daemon as daemon_module
+from calculator.calculator import main
+from calculator.client import (DaemonError, DaemonUnavailable, daemon_stats, decode, default_socket, encode,
+                               parse_arguments, run)
+from calculator.daemon import CalculationDaemon, prepare_socket_directory
+from tests.support import load
+
+def calculate_or_exit(input_file, *args):
+    # Replaces calculate in the workers, a missing input file kills the worker process
+    if not os.path.exists(input_file):
+        os._exit(3)
+    return calculate(input_file, *args)
+
+calculate = daemon_module.calculate
+
+class CalculationDaemonTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.directory.name, 'daemon.sock')
+        self.output_file = os.path.join(self.directory.name, 'output.json')
+        self.expected_file = os.path.join(self.directory.name, 'expected.json')
+        self.executor = ThreadPoolExecutor(2)
+
+    async def asyncTearDown(self):
+        self.executor.shutdown()
+        self.directory.cleanup()
+
+    async def test_calculates_like_main(self):
+        daemon = CalculationDaemon(self.socket_path, executor=self.executor)
+        await daemon.start()
+        try:
+            for engine, options in [(None, {}), ('scc', {'max_iterations': 5}), ('sparse', {'tolerance': 1e-6}),
+                                    ('scc', {'min_contribution': 0.01})]:
+                stats = await asyncio.to_thread(run, 'data/CasaAS.json', self.output_file, engine, options=options,
+                                                socket_path=self.socket_path)
+                expected_stats = main('data/CasaAS.json', self.expected_file, engine, options=options)
+                self.assertEqual(stats, expected_stats)
+                self.assertEqual(load(self.output_file), load(self.expected_file))
+
+            with self.assertRaises(DaemonError) as context:
+                await asyncio.to_thread(run, 'data/missing.json', self.output_file, socket_path=self.socket_path)
+            self.assertIn('FileNotFoundError', str(context.exception))
+            with self.assertRaises(DaemonError):
+                await asyncio.to_thread(run, 'data/CasaAS.json', self.output_file, 'unknown',
+                                        socket_path=self.socket_path)
+
+            stats = await asyncio.to_thread(daemon_stats, self.socket_path)
+            self.assertEqual((stats['calculations'], stats['errors']), (6, 2))
+        finally:
+            await daemon.close()
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    async def test_socket_is_private(self):
+        socket_path = os.path.join(self.directory.name, 'private', 'daemon.sock')
+        daemon = CalculationDaemon(socket_path, executor=self.executor)
+        await daemon.start()
+        try:
+            self.assertEqual(os.stat(os.path.dirname(socket_path)).st_mode & 0o777, 0o700)
+            self.assertEqual(os.stat(socket_path).st_mode & 0o777, 0o600)
+        finally:
+            await daemon.close()
+
+        shared = os.path.join(self.directory.name, 'shared')
+        os.mkdir(shared)
+        os.chmod(shared, 0o777)
+        with self.assertRaises(RuntimeError):
+            prepare_socket_directory(os.path.join(shared, 'daemon.sock'))
+        os.chmod(shared, 0o1777)
+        prepare_socket_directory(os.path.join(shared, 'daemon.sock'))
+
+    async def test_socket_of_a_running_daemon_is_not_taken(self):
+        daemon = CalculationDaemon(self.socket_path, executor=self.executor)
+        await daemon.start()
+        try:
+            with self.assertRaises(RuntimeError):
+                await CalculationDaemon(self.socket_path, executor=self.executor).start()
+        finally:
+            await daemon.close()
+
+        # A socket left behind by a daemon that is gone is replaced
+        open(self.socket_path, 'w').close()
+        with self.assertRaises(DaemonUnavailable):
+            await asyncio.to_thread(daemon_stats, self.socket_path)
+        daemon = CalculationDaemon(self.socket_path, executor=self.executor)
+        await daemon.start()
+        await daemon.close()
+
+    async def test_command_line_client_with_warm_workers(self):
+        daemon = CalculationDaemon(self.socket_path, workers=1)
+        await daemon.start()
+        try:
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, '-m', 'calculator.client', 'data/ResightsApS.json', self.output_file,
+                '--engine', 'scc', '--socket', self.socket_path)
+            self.assertEqual(await process.wait(), 0)
+        finally:
+            await daemon.close()
+        main('data/ResightsApS.json', self.expected_file, 'scc')
+        self.assertEqual(load(self.output_file), load(self.expected_file))
+
+    async def test_dead_worker_fails_only_its_request(self):
+        daemon = CalculationDaemon(self.socket_path, workers=1)
+        await daemon.start()
+        try:
+            with mock.patch('calculator.daemon.calculate', calculate_or_exit), \
+                    self.assertLogs('calculator.pool', 'WARNING'):
+                with self.assertRaises(DaemonError):
+                    await asyncio.to_thread(run, 'data/missing.json', self.output_file, socket_path=self.socket_path)
+                stats = await asyncio.to_thread(run, 'data/CasaAS.json', self.output_file, 'scc',
+                                                socket_path=self.socket_path)
+            self.assertTrue(stats['converged'])
+            self.assertEqual((await asyncio.to_thread(daemon_stats, self.socket_path))['pool_replacements'], 1)
+        finally:
+            await daemon.close()
+
+class ClientTestCase(unittest.TestCase):
+    def test_parse_arguments(self):
+        args = parse_arguments(['in.json', 'out.json', '--engine', 'scc', '--tolerance=1e-6', '--stream', '--workers', '2'])
+        self.assertEqual((args['input_file'], args['output_file'], args['engine']), ('in.json', 'out.json', 'scc'))
+        self.assertEqual((args['tolerance'], args['workers'], args['stream'], args['fallback']), (1e-6, 2, True, False))
+        self.assertEqual(parse_arguments(['--prune-below', '0.5'])['min_contribution'], 0.5)
+        self.assertEqual(parse_arguments([])['input_file'], 'data/ResightsApS.json')
+        for argv in (['--unknown'], ['--workers', 'two'], ['--engine'], ['a', 'b', 'c'], ['--cache'],
+                     ['--report', 'r.json']):
+            with self.assertRaises(ValueError):
+                parse_arguments(argv)
+
+    def test_encoding_matches_json(self):
+        message = {'path': '/tmp/æøå "quoted"\n', 'options': {'tolerance': 1e-6, 'workers': 2}, 'stream': False,
+                   'engine': None, 'list': [1, 2.5, True]}
+        self.assertEqual(json.loads(encode(message)), message)
+        self.assertEqual(decode(json.dumps(message).encode('utf-8') + b'\n'), message)
+        for value in (float('nan'), float('inf')):
+            with self.assertRaises(ValueError):
+                encode({'options': {'tolerance': value}})
+
+    def test_default_socket(self):
+        with mock.patch.dict(os.environ, {'XDG_RUNTIME_DIR': '/run/user/1000'}):
+            self.assertEqual(default_socket(), '/run/user/1000/ownership-calculator.sock')
+        with mock.patch.dict(os.environ, {'TMPDIR': '/var/tmp'}):
+            os.environ.pop('XDG_RUNTIME_DIR', None)
+            self.assertEqual(default_socket(), f'/var/tmp/ownership-calculator-{os.getuid()}/daemon.sock')
+
+    def test_fallback_without_daemon(self):
+        with tempfile.TemporaryDirectory() as directory:
+            socket_path = os.path.join(directory, 'missing.sock')
+            output_file = os.path.join(directory, 'output.json')
+            command = [sys.executable, '-m', 'calculator.client', 'data/CasaAS.json', output_file, '--socket', socket_path]
+            self.assertNotEqual(subprocess.run(command, capture_output=True).returncode, 0)
+            self.assertEqual(subprocess.run(command + ['--fallback'], capture_output=True).returncode, 0)
+            main('data/CasaAS.json', os.path.join(directory, 'expected.json'))
+            self.assertEqual(load(output_file), load(os.path.join(directory, 'expected.json')))
+            with self.assertRaises(DaemonUnavailable):
+                run('data/CasaAS.json', output_file, socket_path=socket_path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,5 @@
 import unittest
-from calculator.helpers import parse_share_string, multiply_shares, add_shares
+from calculator.helpers import parse_share_string, parse_share_string_cached, parse_edge_shares, multiply_shares, add_shares
 
 class HelpersTestCase(unittest.TestCase):
     def test_parse_share_string_empty(self):
@@ -27,6 +27,19 @@ class HelpersTestCase(unittest.TestCase):
         self.assertEqual(parse_share_string('<abc%'), (0.0, 0.0, 0.0))
         self.assertEqual(parse_share_string('10-abc%'), (0.0, 0.0, 0.0))
     
+    def test_parse_share_string_cached(self):
+        parse_share_string_cached.cache_clear()
+        first = parse_share_string_cached('10-15%')
+        second = parse_share_string_cached('10-15%')
+        self.assertEqual(first, parse_share_string('10-15%'))
+        self.assertIs(first, second)
+        info = parse_share_string_cached.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_parse_edge_shares(self):
+        edges = [{'share': '100%'}, {'share': '<5%'}, {'share': '100%'}]
+        self.assertEqual(parse_edge_shares(edges), [(1.0, 1.0, 1.0), (0.0, 0.025, 0.05), (1.0, 1.0, 1.0)])
+
     def test_multiply_shares(self):
         # Basic multiplication
         self.assertEqual(
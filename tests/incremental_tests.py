@@ -0,0 +1,121 @@
+import copy
+import random
+import unittest
+from calculator.calculator import calculate_real_shares
+from calculator.incremental import IncrementalNetwork
+from tests.support import random_network
+
+def chain_edge(source, target, share="50%", active=True):
+    return {
+        "id": f"{source}_{target}",
+        "source": source,
+        "source_depth": source,
+        "target": target,
+        "target_depth": target,
+        "share": share,
+        "real_lower_share": None,
+        "real_average_share": None,
+        "real_upper_share": None,
+        "active": active
+    }
+
+class IncrementalNetworkTestCase(unittest.TestCase):
+    def test_initial_solve_matches_full_recompute(self):
+        network = random_network(1)
+        incremental = IncrementalNetwork(copy.deepcopy(unique_ids(network)))
+        self.assertEqual(incremental.network(), calculate_real_shares(unique_ids(network), engine='scc'))
+
+    def test_only_affected_region_is_recomputed(self):
+        # 3 -> 2 -> 1 -> FC and a separate owner 5 -> 4 -> FC
+        incremental = IncrementalNetwork([
+            chain_edge(1, 0), chain_edge(2, 1), chain_edge(3, 2),
+            chain_edge(4, 0), {**chain_edge(5, 4), "source_depth": 2, "target_depth": 1}
+        ])
+        self.assertEqual(incremental.real_shares("3_2"), (12.5, 12.5, 12.5))
+
+        updated = incremental.apply(modified=[chain_edge(2, 1, share="100%")])
+
+        self.assertEqual(updated, {"2_1", "3_2"})
+        self.assertEqual([edge["id"] for edge in incremental.network()], ["1_0", "2_1", "3_2", "4_0", "5_4"])
+        self.assertEqual(incremental.real_shares("2_1"), (50.0, 50.0, 50.0))
+        self.assertEqual(incremental.real_shares("3_2"), (25.0, 25.0, 25.0))
+
+    def test_deactivate_and_remove(self):
+        incremental = IncrementalNetwork([chain_edge(1, 0), chain_edge(2, 1), chain_edge(3, 2)])
+
+        incremental.apply(modified=[chain_edge(2, 1, active=False)])
+        self.assertEqual(incremental.real_shares("3_2"), (0.0, 0.0, 0.0))
+        self.assertIsNone(incremental.real_shares("2_1"))
+
+        incremental.apply(removed=["3_2"])
+        with self.assertRaises(KeyError):
+            incremental.real_shares("3_2")
+
+    def test_duplicate_added_edge(self):
+        incremental = IncrementalNetwork([chain_edge(1, 0)])
+        with self.assertRaises(ValueError):
+            incremental.apply(added=[chain_edge(1, 0)])
+
+    def test_failed_delta_changes_nothing(self):
+        incremental = IncrementalNetwork([chain_edge(1, 0), chain_edge(2, 1), chain_edge(3, 2)])
+        expected = copy.deepcopy(incremental.network())
+        for delta in ({'removed': ["3_2", "9_8"]},
+                      {'modified': [chain_edge(2, 1, share="100%"), chain_edge(9, 8)]},
+                      {'removed': ["3_2"], 'modified': [chain_edge(3, 2)]},
+                      {'modified': [chain_edge(2, 1, share="100%")], 'added': [chain_edge(4, 3), chain_edge(1, 0)]},
+                      {'added': [chain_edge(4, 3), {**chain_edge(5, 4), "id": None}]}):
+            with self.subTest(delta=delta):
+                with self.assertRaises((KeyError, ValueError)):
+                    incremental.apply(**delta)
+                self.assertEqual(incremental.network(), expected)
+                self.assertEqual(incremental.real_shares("3_2"), (12.5, 12.5, 12.5))
+
+        # An edge removed and added again in one delta is fine
+        incremental.apply(removed=["3_2"], added=[chain_edge(3, 2, share="100%")])
+        self.assertEqual(incremental.real_shares("3_2"), (25.0, 25.0, 25.0))
+
+    def test_repeated_edges_like_validation(self):
+        network = [chain_edge(1, 0), chain_edge(2, 1), chain_edge(2, 1)]
+        incremental = IncrementalNetwork(copy.deepcopy(network))
+        self.assertEqual(len(incremental.network()), 2)
+        expected = calculate_real_shares(copy.deepcopy(network), engine='scc')
+        self.assertEqual(incremental.repeats["2_1"][0], expected[2])
+
+        incremental.apply(modified=[chain_edge(1, 0, share="100%")])
+        self.assertEqual(incremental.repeats["2_1"][0]['real_upper_share'], 50.0)
+
+        with self.assertRaises(ValueError):
+            IncrementalNetwork([chain_edge(1, 0), chain_edge(2, 1), chain_edge(2, 1, share="10%")])
+
+    def test_random_deltas_match_full_recompute(self):
+        generator = random.Random(7)
+        for seed in range(5):
+            incremental = IncrementalNetwork(unique_ids(random_network(seed)))
+            for _ in range(5):
+                edge_ids = list(incremental.edges)
+                removed = generator.sample(edge_ids, 2)
+                modified = []
+                for edge_id in generator.sample([e for e in edge_ids if e not in removed], 3):
+                    edge = dict(incremental.edges[edge_id])
+                    edge["active"] = generator.random() < 0.7
+                    edge["share"] = generator.choice(["5%", "60%", "<20%", "10-40%"])
+                    modified.append(edge)
+
+                incremental.apply(removed=removed, modified=modified)
+
+                expected = calculate_real_shares(copy.deepcopy(incremental.network()), engine='scc')
+                self.assertEqual(incremental.network(), expected)
+
+    def test_focus_change_recomputes_everything(self):
+        incremental = IncrementalNetwork([chain_edge(1, 0), chain_edge(2, 1)])
+        # Edge 2 -> 1 becomes a direct holding in a new focus company 1
+        updated = incremental.apply(modified=[{**chain_edge(2, 1), "source_depth": 1, "target_depth": 0}])
+        self.assertEqual(updated, {"1_0", "2_1"})
+        self.assertEqual(incremental.real_shares("2_1"), (50.0, 50.0, 50.0))
+
+def unique_ids(network):
+    seen = set()
+    return [edge for edge in network if not (edge["id"] in seen or seen.add(edge["id"]))]
+
+if __name__ == '__main__':
+    unittest.main()
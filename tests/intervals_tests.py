@@ -0,0 +1,67 @@
+import unittest
+from array import array
+from benchmarks.generators import cross_holdings
+from calculator.graph import OwnershipGraph
+from calculator.intervals import KERNELS, get_kernel
+from calculator.sparse import CSRMatrix, build_ownership_matrices, power_iteration
+
+class IntervalKernelTestCase(unittest.TestCase):
+    def test_interval_operations(self):
+        for name in KERNELS:
+            with self.subTest(kernel=name):
+                kernel = get_kernel(name)
+                first = (kernel.vector([0.1, 0.5]), kernel.vector([0.2, 0.9]))
+                second = (kernel.vector([0.5, 0.8]), kernel.vector([0.5, 0.9]))
+
+                lower, upper = kernel.interval_multiply(first, second)
+                self.assertEqual(kernel.to_list(lower), [0.1 * 0.5, 0.5 * 0.8])
+                self.assertEqual(kernel.to_list(upper), [0.2 * 0.5, 0.9 * 0.9])
+
+                lower, upper = kernel.interval_clamp(kernel.interval_add(first, second))
+                self.assertEqual(kernel.to_list(lower), [0.1 + 0.5, 1.0])
+                self.assertEqual(kernel.to_list(upper), [0.2 + 0.5, 1.0])
+
+                self.assertEqual(kernel.to_list(kernel.subtract(second[0], first[0])), [0.5 - 0.1, 0.8 - 0.5])
+                self.assertEqual(kernel.to_list(kernel.prune(first[0], first[1], 0.5)), [0.0, 0.5])
+
+                self.assertEqual(kernel.max_difference(first[0], second[0]), 0.4)
+                self.assertEqual(kernel.max_difference(kernel.zeros(0), kernel.zeros(0)), 0.0)
+
+    def test_propagate(self):
+        for name in KERNELS:
+            with self.subTest(kernel=name):
+                kernel = get_kernel(name)
+                result = kernel.propagate(kernel.vector([0.5, 0.25, 0.5]), kernel.vector([4.0, 2.0, 1.0]),
+                                          kernel.index_vector([1, 0, 1]), kernel.index_vector([0, 2, 0]), 3)
+                self.assertEqual(kernel.to_list(result), [2.0, 0.0, 1.0])
+
+                result = kernel.propagate(kernel.vector([0.5, 0.25, 0.5]), kernel.vector([4.0, 2.0, 1.0]),
+                                          kernel.index_vector([1, 0, 1]), kernel.index_vector([0, 2, 0]), 3,
+                                          kernel.vector([0.5, 0.5, 0.5]))
+                self.assertEqual(kernel.to_list(result), [2.5, 0.5, 1.5])
+
+    def test_percentages_round_only_at_output(self):
+        for name in KERNELS:
+            with self.subTest(kernel=name):
+                kernel = get_kernel(name)
+                self.assertEqual(kernel.percentages(kernel.vector([0.123456, 1.0]), kernel.vector([0.5, 1.0])),
+                                 [(12.35, 31.17, 50.0), (100.0, 100.0, 100.0)])
+
+    def test_unknown_kernel(self):
+        with self.assertRaises(ValueError):
+            get_kernel('unknown')
+
+    @unittest.skipUnless('numpy' in KERNELS, 'NumPy is not installed')
+    def test_kernels_give_identical_results(self):
+        graph = OwnershipGraph(cross_holdings(2000))
+        lower_matrix, _, lower_b, _ = build_ownership_matrices(graph, graph.upstream, upstream=True)
+        results = []
+        for name in ('python', 'numpy'):
+            kernel = get_kernel(name)
+            matrix = CSRMatrix(lower_matrix.size, lower_matrix.indptr, lower_matrix.indices, lower_matrix.data, kernel)
+            values, iterations, converged = power_iteration(matrix, array('d', lower_b))
+            results.append((kernel.to_list(values), iterations, converged))
+        self.assertEqual(results[0], results[1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import copy
+import multiprocessing
+import os
+import time
+import unittest
+from unittest import mock
+from benchmarks.generators import cross_holdings, dense_clique
+from calculator.calculator import calculate_real_shares
+from calculator.graph import OwnershipGraph, dependency_lists
+from calculator.intervals import KERNELS, get_kernel
+from calculator.parallel import ComponentSystem, jacobi_sweep, solve_jacobi
+from calculator.scc import strongly_connected_components
+
+def largest_system(network):
+    graph = OwnershipGraph(network)
+    dependencies = dependency_lists(graph, upstream=True)
+    lower = [1.0 if node in graph.focus else 0.0 for node in range(len(graph.node_ids))]
+    upper = list(lower)
+    component = max(strongly_connected_components(dependencies), key=len)
+    return ComponentSystem(component, dependencies, lower, upper)
+
+def exit_in_second_range(start, *args):
+    # Replaces jacobi_sweep in the workers, the worker of the second range dies
+    if start > 0:
+        os._exit(3)
+    return jacobi_sweep(start, *args)
+
+def stall_in_second_range(start, *args):
+    if start > 0:
+        time.sleep(3.0)
+    return jacobi_sweep(start, *args)
+
+class ParallelTestCase(unittest.TestCase):
+    def test_partitions_cover_all_nodes(self):
+        system = largest_system(dense_clique(300))
+        for workers in (1, 2, 3, 7):
+            partitions = system.partitions(workers)
+            self.assertEqual(len(partitions), workers)
+            self.assertEqual(partitions[0][0], 0)
+            self.assertEqual(partitions[-1][1], system.size)
+            for (_, end), (start, _) in zip(partitions, partitions[1:]):
+                self.assertEqual(end, start)
+
+    def test_same_result_for_any_number_of_workers(self):
+        system = largest_system(dense_clique(300))
+        expected = solve_jacobi(system, workers=1)
+        self.assertTrue(expected[3])
+        for workers in (2, 3):
+            with self.subTest(workers=workers):
+                lower, upper, iterations, converged = solve_jacobi(system, workers=workers)
+                self.assertEqual((list(lower), list(upper), iterations, converged),
+                                 (list(expected[0]), list(expected[1]), expected[2], expected[3]))
+        # The calling process sums with the kernel, the workers with jacobi_sweep
+        for name in KERNELS:
+            with self.subTest(kernel=name):
+                lower, upper, iterations, converged = solve_jacobi(system, kernel=get_kernel(name))
+                self.assertEqual((list(lower), list(upper), iterations, converged),
+                                 (list(expected[0]), list(expected[1]), expected[2], expected[3]))
+
+    def test_matches_serial_engine(self):
+        for network in (dense_clique(1000), cross_holdings(2000)):
+            expected = calculate_real_shares(copy.deepcopy(network), engine='scc')
+            stats = {}
+            with mock.patch('calculator.scc.PARALLEL_MIN_NODES', 2):
+                result = calculate_real_shares(network, engine='scc', stats=stats, workers=2)
+            self.assertTrue(stats['converged'])
+            for expected_edge, edge in zip(expected, result):
+                for field in ('real_lower_share', 'real_average_share', 'real_upper_share'):
+                    if expected_edge[field] is None:
+                        self.assertIsNone(edge[field])
+                    else:
+                        self.assertAlmostEqual(edge[field], expected_edge[field], places=8)
+
+    @unittest.skipUnless(multiprocessing.get_start_method() == 'fork', 'workers must inherit the patched sweep')
+    def test_failed_worker_does_not_hang_the_others(self):
+        system = largest_system(dense_clique(300))
+        for sweep, timeout in ((exit_in_second_range, 300.0), (stall_in_second_range, 0.5)):
+            with self.subTest(sweep=sweep.__name__):
+                start = time.perf_counter()
+                with mock.patch('calculator.parallel.jacobi_sweep', sweep), \
+                        mock.patch('calculator.parallel.BARRIER_TIMEOUT', timeout):
+                    with self.assertRaises(RuntimeError):
+                        solve_jacobi(system, workers=2)
+                self.assertLess(time.perf_counter() - start, 10.0)
+
+    def test_invalid_options(self):
+        with self.assertRaises(ValueError):
+            calculate_real_shares(dense_clique(100), engine='scc', acceleration='aitken', workers=2)
+        with self.assertRaises(ValueError):
+            calculate_real_shares(dense_clique(100), engine='sparse', workers=2)
+
+if __name__ == '__main__':
+    unittest.main()
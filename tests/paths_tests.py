@@ -0,0 +1,71 @@
+import copy
+import json
+import unittest
+from calculator.calculator import calculate_real_shares
+from calculator.paths import PathIndex
+from tests.support import edge
+
+class PathIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        # X holds FC through A and B, and FC holds S through T
+        self.network = [
+            edge("A", 1, "FC", 0, "50%"),
+            edge("B", 1, "FC", 0, "10-20%"),
+            edge("X", 2, "A", 1, "40%"),
+            edge("X", 2, "B", 1, "60%"),
+            edge("FC", 0, "T", -1, "80%"),
+            edge("T", -1, "S", -2, "50%"),
+            edge("Y", 2, "A", 1, "1%", active=False)
+        ]
+
+    def test_paths_are_ranked_by_contribution(self):
+        index = PathIndex().build(self.network)
+        paths = index.paths("X_A")
+
+        self.assertEqual([path['path'] for path in paths], [["X", "A", "FC"], ["X", "B", "FC"]])
+        self.assertEqual((paths[0]['lower'], paths[0]['upper']), (20.0, 20.0))
+        self.assertEqual((paths[1]['lower'], paths[1]['average'], paths[1]['upper']), (6.0, 9.0, 12.0))
+
+        # The paths of an edge add up to its real share on acyclic networks
+        result = calculate_real_shares(copy.deepcopy(self.network), engine='scc')
+        x_a = next(item for item in result if item['id'] == 'X_A')
+        self.assertAlmostEqual(sum(path['lower'] for path in paths), x_a['real_lower_share'])
+        self.assertAlmostEqual(sum(path['upper'] for path in paths), x_a['real_upper_share'])
+
+    def test_downstream_paths_start_at_focus(self):
+        index = PathIndex().build(self.network)
+        self.assertEqual(index.paths("T_S"), [{'path': ["FC", "T", "S"], 'lower': 40.0, 'average': 40.0, 'upper': 40.0}])
+        self.assertEqual(index.paths("FC_T")[0]['path'], ["FC", "T"])
+
+    def test_top_k_and_min_contribution(self):
+        self.assertEqual(len(PathIndex(top_k=1).build(self.network).paths("X_A")), 1)
+        paths = PathIndex(min_contribution=15.0).build(self.network).paths("X_A")
+        self.assertEqual([path['path'] for path in paths], [["X", "A", "FC"]])
+
+    def test_inactive_edges_have_no_paths(self):
+        with self.assertRaises(KeyError):
+            PathIndex().build(self.network).paths("Y_A")
+
+    def test_cycles_only_give_simple_paths(self):
+        network = [
+            edge("C1", 1, "FC", 0, "50%"),
+            edge("C2", 2, "C1", 1, "60%"),
+            edge("C1", 3, "C2", 2, "70%")
+        ]
+        paths = PathIndex(top_k=10).build(network).paths("C2_C1")
+        self.assertEqual([path['path'] for path in paths], [["C2", "C1", "FC"]])
+        for entry in PathIndex(top_k=10).build(network).to_dict()['edges']:
+            for path in entry['paths']:
+                self.assertEqual(len(path['path']), len(set(path['path'])))
+
+    def test_calculate_real_shares_fills_index(self):
+        index = PathIndex(top_k=2)
+        calculate_real_shares(copy.deepcopy(self.network), explain=index)
+        serialized = json.loads(json.dumps(index.to_dict()))
+
+        self.assertEqual(serialized['top_k'], 2)
+        self.assertEqual([entry['id'] for entry in serialized['edges']],
+                         [item['id'] for item in self.network if item['active']])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import asyncio
+import os
+import unittest
+from concurrent.futures.process import BrokenProcessPool
+from calculator.pool import WorkerPool
+
+def square_or_exit(value):
+    # A negative value kills the worker process
+    if value < 0:
+        os._exit(3)
+    return value * value
+
+class WorkerPoolTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_dead_worker_fails_only_its_calculation(self):
+        pool = WorkerPool(2)
+        try:
+            with self.assertLogs('calculator.pool', 'WARNING'):
+                results = await asyncio.gather(*(pool.run(square_or_exit, value) for value in (1, 2, -1, 3, 4)),
+                                               return_exceptions=True)
+            self.assertEqual([results[0], results[1], results[3], results[4]], [1, 4, 9, 16])
+            self.assertIsInstance(results[2], BrokenProcessPool)
+            self.assertEqual(pool.replacements, 1)
+
+            # Later calculations run in the new pool
+            self.assertEqual(await pool.run(square_or_exit, 5), 25)
+            with self.assertRaises(BrokenProcessPool), self.assertLogs('calculator.pool', 'WARNING'):
+                await pool.run(square_or_exit, -2)
+            self.assertEqual(await pool.run(square_or_exit, 6), 36)
+            self.assertEqual(pool.replacements, 2)
+        finally:
+            pool.shutdown()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import json
+import io
+import unittest
+from benchmarks.generators import deep_chain, dense_clique
+from calculator.calculator import calculate_real_shares
+from calculator.profiling import RunObserver, RunProfile
+
+class RecordingObserver(RunObserver):
+    def __init__(self):
+        self.events = []
+
+    def on_iteration(self, iteration, max_change, edges_updated, upstream_seconds, downstream_seconds):
+        self.events.append(('iteration', iteration, edges_updated))
+
+    def on_finish(self, engine, stats, seconds):
+        self.events.append(('finish', engine, stats['converged']))
+
+class ProfilingTestCase(unittest.TestCase):
+    def test_observer_receives_iterations(self):
+        observer = RecordingObserver()
+        stats = {}
+        calculate_real_shares(deep_chain(20), stats=stats, observer=observer)
+
+        self.assertEqual([event[1] for event in observer.events[:-1]], list(range(1, stats['iterations'] + 1)))
+        self.assertGreater(observer.events[0][2], 0)
+        self.assertEqual(observer.events[-1], ('finish', 'iterative', True))
+
+    def test_other_engines_report_finish(self):
+        observer = RecordingObserver()
+        calculate_real_shares(deep_chain(20), 'scc', observer=observer)
+        self.assertEqual(observer.events, [('finish', 'scc', True)])
+
+    def test_profile_report(self):
+        profile = RunProfile()
+        calculate_real_shares(deep_chain(20), observer=profile)
+        report = profile.to_dict()
+
+        self.assertEqual(report['engine'], 'iterative')
+        self.assertTrue(report['converged'])
+        self.assertEqual(len(report['passes']), report['iterations'])
+        self.assertEqual(report['passes'][-1]['max_change'], 0.0)
+        self.assertGreaterEqual(report['seconds'], report['upstream_seconds'])
+
+        output = io.StringIO()
+        profile.write(output)
+        self.assertEqual(json.loads(output.getvalue()), report)
+
+    def test_non_convergence_is_logged(self):
+        stats = {}
+        with self.assertLogs('calculator.profiling', level='WARNING') as logs:
+            calculate_real_shares(dense_clique(100), stats=stats)
+        self.assertFalse(stats['converged'])
+        self.assertIn('Did not converge within 10 iterations', logs.output[0])
+
+if __name__ == "__main__":
+    unittest.main()
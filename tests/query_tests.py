@@ -0,0 +1,59 @@
+import copy
+import unittest
+from benchmarks.generators import cross_holdings, deep_chain, mixed
+from calculator.calculator import calculate_real_shares
+from calculator.query import open_network, real_share
+from tests.support import edge
+
+class QueryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.network = [
+            edge("A", 1, "FC", 0, "50%"),
+            edge("B", 2, "A", 1, "40%"),
+            edge("C", 1, "FC", 0, "10%"),
+            edge("FC", 0, "S", -1, "80%"),
+            edge("S", -1, "T", -2, "50%"),
+            edge("D", 3, "B", 2, "100%", active=False)
+        ]
+
+    def test_real_share_of_entities(self):
+        handle = open_network(self.network)
+        self.assertEqual(real_share(handle, "B"), (20.0, 20.0, 20.0))
+        self.assertEqual(real_share(handle, "T"), (40.0, 40.0, 40.0))
+        self.assertEqual(real_share(handle, "FC"), (100.0, 100.0, 100.0))
+        self.assertEqual(real_share(handle, "S", upstream=True), (0.0, 0.0, 0.0))
+        with self.assertRaises(KeyError):
+            real_share(handle, "D")
+
+    def test_solves_only_what_is_needed(self):
+        handle = open_network(self.network)
+        real_share(handle, "A")
+        stats = handle.stats()
+        self.assertEqual((stats['solved_upstream'], stats['solved_downstream']), (2, 0))
+
+        real_share(handle, "B")
+        self.assertEqual(handle.stats()['solved_upstream'], 3)
+        real_share(handle, "B")
+        self.assertEqual(handle.stats()['solved_upstream'], 3)
+        self.assertEqual(handle.stats()['queries'], 3)
+
+    def test_deep_chain_solves_a_prefix(self):
+        network = deep_chain(1000)
+        handle = open_network(network)
+        nearest = next(item for item in network if item['target_depth'] == 0)['source']
+        real_share(handle, nearest)
+        self.assertLess(handle.stats()['solved_upstream'], 10)
+
+    def test_matches_scc_engine(self):
+        networks = [mixed(500, seed) for seed in range(5)] + [cross_holdings(2000)]
+        for network in networks:
+            handle = open_network(copy.deepcopy(network))
+            expected = calculate_real_shares(network, engine='scc')
+            for item in reversed(expected):
+                if item['real_upper_share'] is not None:
+                    real_shares = handle.real_shares(item['id'])
+                    self.assertEqual(real_shares, (item['real_lower_share'], item['real_average_share'],
+                                                   item['real_upper_share']))
+
+if __name__ == '__main__':
+    unittest.main()
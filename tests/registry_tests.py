@@ -0,0 +1,104 @@
+import json
+import os
+import random
+import unittest
+from benchmarks.generators import cross_holdings, mixed
+from calculator.calculator import calculate_real_shares
+from calculator.registry import RegistryGraph, load_registry
+from tests.support import DATA_DIR
+
+def registry_edge(source, target, share, active=True):
+    return {"id": f"{source}_{target}", "source": source, "target": target, "share": share, "active": active}
+
+class RegistryGraphTestCase(unittest.TestCase):
+    def setUp(self):
+        # A owns 50% of B, B owns 50% of C, C owns 20% of B, D owns 10% of C
+        self.registry = RegistryGraph([
+            registry_edge("A", "B", "50%"),
+            registry_edge("B", "C", "50%"),
+            registry_edge("C", "B", "20%"),
+            registry_edge("D", "C", "10%"),
+            registry_edge("E", "C", "90%", active=False)
+        ])
+
+    def test_owners_and_holdings(self):
+        result = self.registry.real_ownership(["C"])["C"]
+
+        # Paths end at the focus company, so the cross-holding between B and C adds nothing to B
+        self.assertEqual(result["owners"]["B"], (50.0, 50.0, 50.0))
+        self.assertEqual(result["owners"]["A"], (25.0, 25.0, 25.0))
+        self.assertEqual(result["owners"]["D"], (10.0, 10.0, 10.0))
+        self.assertNotIn("E", result["owners"])
+        self.assertEqual(result["holdings"], {"B": (20.0, 20.0, 20.0)})
+
+    def test_many_focuses_match_single_focus(self):
+        together = self.registry.real_ownership(["A", "B", "C", "D"])
+        for focus_id in ("A", "B", "C", "D"):
+            single = RegistryGraph([
+                registry_edge("A", "B", "50%"),
+                registry_edge("B", "C", "50%"),
+                registry_edge("C", "B", "20%"),
+                registry_edge("D", "C", "10%")
+            ]).real_ownership([focus_id])
+            self.assertEqual(together[focus_id], single[focus_id])
+
+    def test_results_are_cached(self):
+        first = self.registry.real_ownership(["B"])["B"]
+        self.assertIs(self.registry.real_ownership(["B", "C"])["B"], first)
+
+    def test_unknown_focus(self):
+        with self.assertRaises(KeyError):
+            self.registry.real_ownership(["X"])
+        with self.assertRaises(ValueError):
+            self.registry.real_ownership(["C"], min_contribution=-1)
+
+    def test_pruned_values_are_within_the_error_bound(self):
+        for network in (mixed(3000, seed=2), cross_holdings(3000, seed=2)):
+            registry = RegistryGraph(network)
+            focus_ids = random.Random(0).sample(registry.node_ids, 30)
+            exact = registry.real_ownership(focus_ids)
+            for min_contribution in (0.01, 0.5):
+                pruned = registry.real_ownership(focus_ids, min_contribution=min_contribution)
+                for focus_id in focus_ids:
+                    self.assertIsNot(pruned[focus_id], exact[focus_id])
+                    for direction in ('owners', 'holdings'):
+                        bound = pruned[focus_id]['error_bound'][direction]
+                        values = pruned[focus_id][direction]
+                        for entity_id, expected in exact[focus_id][direction].items():
+                            value = values.get(entity_id, (0.0, 0.0, 0.0))
+                            for bound_value, expected_value in zip(value, expected):
+                                # Values are rounded to two decimals
+                                self.assertLessEqual(bound_value, expected_value + 0.01)
+                                self.assertGreaterEqual(bound_value, expected_value - bound - 0.01)
+                            if entity_id not in values:
+                                self.assertLessEqual(expected[2], min_contribution + bound + 0.01)
+
+    def test_zero_min_contribution_prunes_nothing(self):
+        registry = RegistryGraph(mixed(1000, seed=3))
+        focus_ids = registry.node_ids[:20]
+        exact = registry.real_ownership(focus_ids)
+        pruned = registry.real_ownership(focus_ids, min_contribution=0.0)
+        for focus_id in focus_ids:
+            self.assertEqual(pruned[focus_id]['error_bound'], {'owners': 0.0, 'holdings': 0.0})
+            self.assertEqual(pruned[focus_id]['owners'], exact[focus_id]['owners'])
+            self.assertEqual(pruned[focus_id]['holdings'], exact[focus_id]['holdings'])
+
+    def test_matches_depth_annotated_network(self):
+        input_file = os.path.join(DATA_DIR, 'CasaAS.json')
+        with open(input_file, 'r') as f:
+            network = calculate_real_shares(json.load(f), engine='scc')
+        focus_id = next(edge["target"] for edge in network if edge["target_depth"] == 0)
+
+        result = load_registry(input_file).real_ownership([focus_id])[focus_id]
+
+        for edge in network:
+            if not edge["active"]:
+                continue
+            expected = (edge["real_lower_share"], edge["real_average_share"], edge["real_upper_share"])
+            if edge["source_depth"] > 0 and edge["target_depth"] >= 0:
+                self.assertEqual(result["owners"][edge["source"]], expected)
+            elif edge["target_depth"] < 0:
+                self.assertEqual(result["holdings"][edge["target"]], expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import copy
+import unittest
+from benchmarks.generators import cross_holdings, dense_clique, mixed
+from calculator.calculator import calculate_real_shares
+from calculator.graph import OwnershipGraph
+from calculator.scc import strongly_connected_components, solve_graph_scc
+from tests.support import random_network
+
+class SccEngineTestCase(unittest.TestCase):
+    def test_components_in_dependency_order(self):
+        # 0 -> 1 <-> 2 -> 3
+        dependencies = [[(1,)], [(2,)], [(1,), (3,)], []]
+        components = strongly_connected_components(dependencies)
+        self.assertEqual([sorted(component) for component in components], [[3], [1, 2], [0]])
+
+    def test_deep_chain_does_not_recurse(self):
+        dependencies = [[(node + 1,)] for node in range(5000)] + [[]]
+        components = strongly_connected_components(dependencies)
+        self.assertEqual(components[0], [5000])
+        self.assertEqual(len(components), 5001)
+
+    def test_cycle_network(self):
+        network = [
+            {"id": "C1_FC", "source": 111, "source_depth": 1, "target": 0, "target_depth": 0,
+             "share": "50%", "active": True},
+            {"id": "C2_C1", "source": 222, "source_depth": 2, "target": 111, "target_depth": 1,
+             "share": "5%", "active": True},
+            {"id": "C1_C2", "source": 111, "source_depth": 3, "target": 222, "target_depth": 2,
+             "share": "10%", "active": True}
+        ]
+
+        result = calculate_real_shares(network, engine='scc')
+
+        c1_fc_edge = next(edge for edge in result if edge["id"] == "C1_FC")
+        self.assertAlmostEqual(c1_fc_edge["real_lower_share"], 50.25)
+        c1_c2_edge = next(edge for edge in result if edge["id"] == "C1_C2")
+        self.assertAlmostEqual(c1_c2_edge["real_lower_share"], 50.25)
+        c2_c1_edge = next(edge for edge in result if edge["id"] == "C2_C1")
+        self.assertAlmostEqual(c2_c1_edge["real_upper_share"], 2.51)
+
+    def test_matches_sparse_engine(self):
+        for seed in range(10):
+            expected = calculate_real_shares(random_network(seed), engine='sparse')
+            result = calculate_real_shares(random_network(seed), engine='scc')
+            self.assertEqual(result, expected)
+
+    def test_acceleration_needs_fewer_passes(self):
+        network = dense_clique(1000)
+        stats = {}
+        expected = calculate_real_shares(copy.deepcopy(network), engine='scc', stats=stats)
+        accelerated_stats = {}
+        result = calculate_real_shares(network, engine='scc', stats=accelerated_stats, acceleration='aitken')
+
+        self.assertEqual(result, expected)
+        self.assertTrue(accelerated_stats['converged'])
+        self.assertLess(accelerated_stats['iterations'], stats['iterations'])
+
+    def test_accelerated_random_networks_match(self):
+        for seed in range(10):
+            graph = OwnershipGraph(random_network(seed))
+            expected = solve_graph_scc(graph)
+            result = solve_graph_scc(graph, acceleration='aitken')
+            for expected_values, values in zip(expected, result):
+                for expected_bound, bound in zip(expected_values, values):
+                    for expected_value, value in zip(expected_bound, bound):
+                        self.assertAlmostEqual(value, expected_value, places=10)
+
+    def test_pruning_stays_within_error_bound(self):
+        fields = ('real_lower_share', 'real_average_share', 'real_upper_share')
+        for network in (mixed(2000), cross_holdings(2000), random_network(0)):
+            for engine in ('scc', 'sparse'):
+                expected = calculate_real_shares(copy.deepcopy(network), engine=engine)
+                unpruned = calculate_real_shares(copy.deepcopy(network), engine=engine, min_contribution=0.0)
+                self.assertEqual(unpruned, expected)
+
+                for min_contribution in (0.01, 1.0):
+                    with self.subTest(engine=engine, min_contribution=min_contribution):
+                        stats = {}
+                        result = calculate_real_shares(copy.deepcopy(network), engine=engine, stats=stats,
+                                                       min_contribution=min_contribution)
+                        self.assertIn('error_bound', stats)
+                        for expected_edge, edge in zip(expected, result):
+                            for field in fields:
+                                if expected_edge[field] is None:
+                                    continue
+                                # The bound holds before rounding to two decimals
+                                self.assertLessEqual(expected_edge[field] - edge[field], stats['error_bound'] + 0.01)
+                                self.assertLessEqual(edge[field], expected_edge[field] + 0.01)
+
+    def test_pruning_drops_small_values(self):
+        network = [
+            {"id": "A_FC", "source": 1, "source_depth": 1, "target": 0, "target_depth": 0,
+             "share": "50%", "active": True},
+            {"id": "B_A", "source": 2, "source_depth": 2, "target": 1, "target_depth": 1,
+             "share": "1%", "active": True},
+            {"id": "C_B", "source": 3, "source_depth": 3, "target": 2, "target_depth": 2,
+             "share": "100%", "active": True}
+        ]
+        for engine in ('scc', 'sparse'):
+            with self.subTest(engine=engine):
+                stats = {}
+                result = calculate_real_shares(copy.deepcopy(network), engine=engine, stats=stats,
+                                               min_contribution=1.0)
+                # B owns 0.5% of FC, which is dropped and not passed on to C
+                self.assertEqual([edge["real_upper_share"] for edge in result], [50.0, 0.0, 0.0])
+                self.assertEqual(stats['error_bound'], 0.5)
+
+    def test_pruning_options(self):
+        with self.assertRaises(ValueError):
+            calculate_real_shares(random_network(0), engine='iterative', min_contribution=0.01)
+        with self.assertRaises(ValueError):
+            calculate_real_shares(random_network(0), engine='scc', min_contribution=-1.0)
+        with self.assertRaises(ValueError):
+            calculate_real_shares(random_network(0), engine='scc', min_contribution=0.01, workers=2)
+
+    def test_cycles_without_passes_do_not_converge(self):
+        graph = OwnershipGraph(cross_holdings(20))
+        stats = {}
+        solve_graph_scc(graph, stats, max_iterations=0)
+        self.assertFalse(stats['converged'])
+
+    def test_unknown_acceleration(self):
+        with self.assertRaises(ValueError):
+            calculate_real_shares(random_network(0), engine='scc', acceleration='unknown')
+
+if __name__ == '__main__':
+    unittest.main()
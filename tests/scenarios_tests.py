@@ -0,0 +1,83 @@
+import copy
+import unittest
+from unittest import mock
+from benchmarks.generators import cross_holdings, mixed, wide_fan_in
+from calculator.calculator import calculate_real_shares
+from calculator.intervals import KERNELS
+from calculator.scenarios import ScenarioSystem, simulate, sample_shares, share_groups
+from calculator.validation import normalize_network
+from tests.support import edge
+
+@unittest.skipUnless('numpy' in KERNELS, 'NumPy is not installed')
+class ScenariosTestCase(unittest.TestCase):
+    def test_exact_shares_give_the_engine_result(self):
+        network = [
+            edge("A", 1, "FC", 0, "50%"),
+            edge("B", 2, "A", 1, "40%"),
+            edge("A", 1, "B", 2, "10%"),
+            edge("FC", 0, "S", -1, "80%"),
+            edge("S", -1, "T", -2, "50%"),
+            edge("C", 1, "FC", 0, "10%", active=False)
+        ]
+        expected = calculate_real_shares(copy.deepcopy(network), engine='scc')
+        result = simulate(network, scenarios=20)
+        for expected_edge, result_edge in zip(expected[:5], result[:5]):
+            share = expected_edge['real_average_share']
+            self.assertEqual(result_edge['real_share_percentiles'], {'p5': share, 'p50': share, 'p95': share})
+            self.assertEqual(result_edge['real_share_mean'], share)
+        self.assertNotIn('real_share_percentiles', result[5])
+
+    def test_percentiles_lie_within_the_share_ranges(self):
+        network = cross_holdings(2000, seed=3)
+        expected = calculate_real_shares(copy.deepcopy(network), engine='scc')
+        stats = {}
+        result = simulate(network, scenarios=200, percentiles=(0, 50, 100), stats=stats)
+        self.assertTrue(stats['converged'])
+        for expected_edge, result_edge in zip(expected, result):
+            if expected_edge['real_lower_share'] is None:
+                continue
+            percentiles = result_edge['real_share_percentiles']
+            self.assertLessEqual(percentiles['p0'], percentiles['p50'])
+            self.assertLessEqual(percentiles['p50'], percentiles['p100'])
+            self.assertGreaterEqual(percentiles['p0'], expected_edge['real_lower_share'] - 0.01)
+            self.assertLessEqual(percentiles['p100'], expected_edge['real_upper_share'] + 0.01)
+
+    def test_results_do_not_depend_on_batches(self):
+        network = mixed(1000, seed=1)
+        expected = simulate(copy.deepcopy(network), scenarios=50, seed=7)
+        stats = {}
+        with mock.patch('calculator.scenarios.BATCH_ELEMENTS', 5000):
+            result = simulate(network, scenarios=50, seed=7, stats=stats)
+        self.assertGreater(stats['batches'], 1)
+        self.assertEqual(result, expected)
+
+    def test_owners_hold_at_most_everything(self):
+        import numpy
+        graph = normalize_network(wide_fan_in(500)).graph
+        order, starts, _ = share_groups(graph)
+        shares = sample_shares(graph, 100, numpy.random.default_rng(0))
+        totals = numpy.add.reduceat(shares[:, order], starts, axis=1)
+        lower = numpy.array([share[0] for share in graph.shares])
+        upper = numpy.array([share[2] for share in graph.shares])
+        self.assertTrue(numpy.all((totals <= 1.0 + 1e-9) | (totals <= numpy.add.reduceat(lower[order], starts))))
+        self.assertTrue(numpy.all((shares >= lower - 1e-12) & (shares <= upper + 1e-12)))
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            simulate([edge("A", 1, "FC", 0, "50%")], scenarios=0)
+        with self.assertRaises(ValueError):
+            simulate([edge("A", 1, "FC", 0, "50%")], percentiles=(50, 101))
+        with self.assertRaises(ValueError):
+            simulate([edge("A", 1, "FC", 0, "50%")], max_iterations=0)
+
+    def test_cycles_without_passes_do_not_converge(self):
+        import numpy
+        graph = normalize_network(cross_holdings(50)).graph
+        system = ScenarioSystem(graph, graph.upstream, upstream=True)
+        shares = sample_shares(graph, 3, numpy.random.default_rng(0))
+        _, iterations, converged = system.solve(shares, max_iterations=0)
+        self.assertFalse(converged)
+        self.assertEqual(iterations, 1)
+
+if __name__ == '__main__':
+    unittest.main()
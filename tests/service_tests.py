@@ -0,0 +1,116 @@
+import asyncio
+import json
+import os
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from calculator import service as service_module
+from calculator.calculator import calculate_real_shares
+from calculator.service import CalculationService, RequestError, ServiceBusy, post, read_request
+from tests.support import read
+
+def solve_or_exit(body, engine, options):
+    # Replaces solve in the workers, an empty array kills the worker process
+    if body == b'[]':
+        os._exit(3)
+    return solve(body, engine, options)
+
+solve = service_module.solve
+
+class CalculationServiceTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.executor = ThreadPoolExecutor(2)
+        self.body = read('data/CasaAS.json')
+        self.expected = calculate_real_shares(json.loads(self.body), 'scc')
+
+    async def asyncTearDown(self):
+        self.executor.shutdown()
+
+    async def test_identical_requests_share_one_calculation(self):
+        service = CalculationService(executor=self.executor)
+        results = await asyncio.gather(*(service.calculate(self.body) for _ in range(5)))
+
+        self.assertEqual([json.loads(result) for result in results], [self.expected] * 5)
+        self.assertEqual(service.stats()['calculations'], 1)
+        self.assertEqual(service.stats()['coalesced'], 4)
+        self.assertEqual(service.stats()['pending'], 0)
+
+        # Settings are part of the key
+        await asyncio.gather(service.calculate(self.body), service.calculate(self.body, 'sparse'))
+        self.assertEqual(service.stats()['calculations'], 3)
+
+    async def test_rejects_calculations_beyond_max_pending(self):
+        service = CalculationService(executor=self.executor, max_concurrency=1, max_pending=2)
+        bodies = [self.body, read('data/ResightsApS.json'), self.body + b' ']
+        results = await asyncio.gather(*(service.calculate(body) for body in bodies), return_exceptions=True)
+
+        self.assertIsInstance(results[2], ServiceBusy)
+        self.assertEqual(json.loads(results[0]), self.expected)
+        self.assertEqual(service.stats()['rejected'], 1)
+
+        # Once the pending calculations are done, new ones are accepted again
+        self.assertEqual(json.loads(await service.calculate(bodies[2])), self.expected)
+
+    async def test_dead_worker_fails_only_its_request(self):
+        service = CalculationService(workers=2)
+        try:
+            with mock.patch('calculator.service.solve', solve_or_exit), self.assertLogs('calculator.pool', 'WARNING'):
+                results = await asyncio.gather(service.calculate(self.body), service.calculate(b'[]'),
+                                               service.calculate(self.body, 'sparse'), return_exceptions=True)
+                self.assertEqual(json.loads(results[0]), self.expected)
+                self.assertNotIsInstance(results[2], Exception)
+                with self.assertLogs('calculator.service', 'ERROR'):
+                    status, _ = await service.respond('POST', '/calculate', b'[]')
+                self.assertEqual(status, 500)
+                self.assertEqual(json.loads(await service.calculate(self.body, 'iterative')),
+                                 calculate_real_shares(json.loads(self.body)))
+            self.assertIsInstance(results[1], Exception)
+            self.assertEqual(service.stats()['pool_replacements'], 2)
+        finally:
+            await service.close()
+
+    async def test_http(self):
+        # Runs in worker processes like the real service
+        service = CalculationService(workers=1)
+        host, port = await service.start('127.0.0.1', 0)
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            status, body = await post(reader, writer, '/calculate', self.body)
+            self.assertEqual(status, 200)
+            self.assertEqual(json.loads(body), self.expected)
+
+            status, body = await post(reader, writer, '/calculate?engine=iterative&max_iterations=20', self.body)
+            self.assertEqual(status, 200)
+            self.assertEqual(json.loads(body), calculate_real_shares(json.loads(self.body), max_iterations=20))
+
+            for target, payload, expected_status in [
+                ('/calculate', b'[{"id": ', 400),
+                ('/calculate', b'{}', 400),
+                ('/calculate?engine=unknown', self.body, 400),
+                ('/calculate?engine=sparse&acceleration=aitken', self.body, 400),
+                ('/calculate?max_iterations=0', self.body, 400),
+                ('/calculate?max_iterations=many', self.body, 400),
+                ('/unknown', self.body, 404),
+                ('/health', b'', 405),
+            ]:
+                status, body = await post(reader, writer, target, payload)
+                self.assertEqual(status, expected_status, target)
+                self.assertIn('error', json.loads(body))
+        finally:
+            writer.close()
+            await writer.wait_closed()
+            await service.close()
+
+        self.assertEqual(service.stats()['calculations'], 4)
+        self.assertEqual(service.stats()['errors'], 6)
+
+    async def test_negative_content_length(self):
+        reader = asyncio.StreamReader()
+        reader.feed_data(b'POST /calculate HTTP/1.1\r\nContent-Length: -5\r\n\r\n[]')
+        reader.feed_eof()
+        with self.assertRaises(RequestError) as context:
+            await read_request(reader, 1024)
+        self.assertEqual(context.exception.status, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+from array import array
+from calculator.calculator import calculate_real_shares
+from calculator.sparse import CSRMatrix, power_iteration
+from tests.support import load_network
+
+# The iterative engine rounds intermediate values to two decimals
+ROUNDING_DELTA = 0.011
+
+class SparseEngineTestCase(unittest.TestCase):
+    def test_csr_dot(self):
+        matrix = CSRMatrix.from_entries(3, [(0, 1, 0.5), (2, 0, 0.25), (0, 1, 0.5)])
+        self.assertEqual(list(matrix.dot(array('d', [4.0, 2.0, 1.0]))), [2.0, 0.0, 1.0])
+
+    def test_power_iteration_cycle(self):
+        # x0 = 0.5 + 0.1 * x1, x1 = 0.05 * x0
+        matrix = CSRMatrix.from_entries(2, [(0, 1, 0.1), (1, 0, 0.05)])
+        values, iterations, converged = power_iteration(matrix, array('d', [0.5, 0.0]))
+        self.assertAlmostEqual(values[0], 0.5 / 0.995)
+        self.assertAlmostEqual(values[1], 0.05 * 0.5 / 0.995)
+        self.assertLess(iterations, 20)
+        self.assertTrue(converged)
+
+    def test_power_iteration_clamps_at_one(self):
+        matrix = CSRMatrix.from_entries(1, [])
+        values, _, _ = power_iteration(matrix, array('d', [1.5]))
+        self.assertEqual(values[0], 1.0)
+
+    def test_cycle_network(self):
+        network = [
+            {"id": "C1_FC", "source": 111, "source_depth": 1, "target": 0, "target_depth": 0,
+             "share": "50%", "active": True},
+            {"id": "C2_C1", "source": 222, "source_depth": 2, "target": 111, "target_depth": 1,
+             "share": "5%", "active": True},
+            {"id": "C1_C2", "source": 111, "source_depth": 3, "target": 222, "target_depth": 2,
+             "share": "10%", "active": True}
+        ]
+
+        result = calculate_real_shares(network, engine='sparse')
+
+        c1_fc_edge = next(edge for edge in result if edge["id"] == "C1_FC")
+        self.assertAlmostEqual(c1_fc_edge["real_lower_share"], 50.25)
+        c2_c1_edge = next(edge for edge in result if edge["id"] == "C2_C1")
+        self.assertAlmostEqual(c2_c1_edge["real_upper_share"], 2.51)
+
+    def test_matches_iterative_engine_on_data(self):
+        for name in ('ResightsApS.json', 'CasaAS.json'):
+            expected = calculate_real_shares(load_network(name), engine='iterative')
+            result = calculate_real_shares(load_network(name), engine='sparse')
+            for expected_edge, edge in zip(expected, result):
+                for field in ('real_lower_share', 'real_average_share', 'real_upper_share'):
+                    if expected_edge[field] is None:
+                        self.assertIsNone(edge[field])
+                    else:
+                        self.assertAlmostEqual(edge[field], expected_edge[field], delta=ROUNDING_DELTA,
+                                               msg=f"{name} {edge['id']} {field}")
+
+if __name__ == '__main__':
+    unittest.main()
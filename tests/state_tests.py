@@ -0,0 +1,62 @@
+import unittest
+from calculator.state import EdgeState
+
+class EdgeStateTestCase(unittest.TestCase):
+    def setUp(self):
+        self.edges = [
+            {"id": "A", "real_lower_share": 50.0, "real_average_share": 50.0, "real_upper_share": 50.0},
+            {"id": "B", "real_lower_share": None, "real_average_share": None, "real_upper_share": None}
+        ]
+
+    def test_get_returns_fractions(self):
+        state = EdgeState(self.edges)
+        self.assertEqual(state.get(0), (0.5, 0.5, 0.5))
+        self.assertFalse(state.has_value[1])
+
+    def test_set_rounds_percentages(self):
+        state = EdgeState(self.edges)
+        state.begin_pass()
+        state.set(0, (0.123456, 0.2, 0.3))
+        self.assertEqual(state.lower[0], 12.35)
+
+    def test_previous_values_kept_per_pass(self):
+        state = EdgeState(self.edges)
+        state.begin_pass()
+        state.set(0, (0.1, 0.1, 0.1))
+        state.set(0, (0.2, 0.2, 0.2))
+        self.assertEqual(state.previous(0), (50.0, 50.0, 50.0))
+
+        state.begin_pass()
+        self.assertEqual(state.previous(0), (20.0, 20.0, 20.0))
+        state.set(0, (0.3, 0.3, 0.3))
+        self.assertEqual(state.previous(0), (20.0, 20.0, 20.0))
+
+    def test_previous_of_edge_without_value(self):
+        state = EdgeState(self.edges)
+        state.begin_pass()
+        self.assertIsNone(state.previous(1))
+        state.set(1, (0.1, 0.1, 0.1))
+        self.assertIsNone(state.previous(1))
+
+    def test_updated_count(self):
+        state = EdgeState(self.edges)
+        state.begin_pass()
+        state.set(0, (0.5, 0.5, 0.5))
+        state.set(1, (0.1, 0.1, 0.1))
+        self.assertEqual(state.updated_count(), 1)
+
+        state.begin_pass()
+        self.assertEqual(state.updated_count(), 0)
+        state.set(0, (0.4, 0.5, 0.5))
+        self.assertEqual(state.updated_count(), 1)
+
+    def test_write_back(self):
+        state = EdgeState(self.edges)
+        state.begin_pass()
+        state.set(0, (0.25, 0.25, 0.25))
+        state.write_back(self.edges)
+        self.assertEqual(self.edges[0]["real_lower_share"], 25.0)
+        self.assertIsNone(self.edges[1]["real_lower_share"])
+
+if __name__ == '__main__':
+    unittest.main()
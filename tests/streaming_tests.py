@@ -0,0 +1,158 @@
+import csv
+import gzip
+import io
+import json
+import lzma
+import os
+import shutil
+import tempfile
+import unittest
+from calculator.calculator import calculate_real_shares, main
+from calculator.profiling import RunProfile
+from calculator.streaming import RESULT_FIELDS, iter_records, open_output, stream_network, write_records
+from tests.support import DATA_DIR
+
+class StreamingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_iter_records_json_array_small_chunks(self):
+        records = [{"id": "a", "share": "10-15%"}, {"id": "b", "nested": {"x": [1, 2]}}]
+        text = json.dumps(records, indent=2)
+        self.assertEqual(list(iter_records(io.StringIO(text), chunk_size=3)), records)
+
+    def test_iter_records_ndjson(self):
+        text = '{"id": "a"}\n\n{"id": "b"}\n'
+        self.assertEqual(list(iter_records(io.StringIO(text), chunk_size=4)), [{"id": "a"}, {"id": "b"}])
+
+    def test_iter_records_empty(self):
+        self.assertEqual(list(iter_records(io.StringIO(' [ ] '))), [])
+        self.assertEqual(list(iter_records(io.StringIO(''))), [])
+
+    def test_iter_records_unclosed_array(self):
+        with self.assertRaises(ValueError):
+            list(iter_records(io.StringIO('[{"id": "a"},')))
+
+    def test_write_records(self):
+        f = io.StringIO()
+        write_records(f, [{"id": "a"}, {"id": "b"}])
+        self.assertEqual(f.getvalue(), '[{"id":"a"},{"id":"b"}]\n')
+
+        f = io.StringIO()
+        write_records(f, [{"id": "a"}, {"id": "b"}], 'ndjson')
+        self.assertEqual(f.getvalue(), '{"id":"a"}\n{"id":"b"}\n')
+
+        f = io.StringIO()
+        write_records(f, [{"id": "a", "share": "5%", "real_lower_share": None}, {"id": "b", "share": "1,5%"}], 'csv')
+        self.assertEqual(f.getvalue(), 'id,share,real_lower_share\na,5%,\nb,"1,5%",\n')
+
+        records = [{"id": "a", "share": "5%", "real_lower_share": 1.0, "real_average_share": 2.0,
+                    "real_upper_share": 3.0}]
+        f = io.StringIO()
+        write_records(f, records, 'pretty', results_only=True)
+        self.assertEqual(f.getvalue(), json.dumps([{field: records[0][field] for field in RESULT_FIELDS}], indent=2))
+
+        with self.assertRaises(ValueError):
+            write_records(io.StringIO(), records, 'xml')
+
+    def test_compressed_output(self):
+        records = [{"id": str(index), "share": "10%"} for index in range(1000)]
+        for compression, module in (('gzip', gzip), ('xz', lzma)):
+            output_file = os.path.join(self.directory, 'output.ndjson.' + compression)
+            with open_output(output_file, compression) as f:
+                write_records(f, records, 'ndjson')
+            with module.open(output_file, 'rt') as f:
+                self.assertEqual(list(iter_records(f)), records)
+        with self.assertRaises(ValueError):
+            open_output(os.path.join(self.directory, 'output'), 'zip')
+
+    def test_output_formats_of_main(self):
+        input_file = os.path.join(DATA_DIR, 'CasaAS.json')
+        with open(input_file, 'r') as f:
+            expected = calculate_real_shares(json.load(f), engine='scc')
+        results = [{field: edge[field] for field in RESULT_FIELDS} for edge in expected]
+
+        output_file = os.path.join(self.directory, 'output.csv.gz')
+        for stream in (False, True):
+            main(input_file, output_file, 'scc', stream, 'csv', results_only=True, compression='gzip')
+            with gzip.open(output_file, 'rt', newline='') as f:
+                rows = list(csv.DictReader(f))
+            self.assertEqual([row['id'] for row in rows], [edge['id'] for edge in results])
+            self.assertEqual([float(row['real_upper_share']) for row in rows if row['real_upper_share']],
+                             [edge['real_upper_share'] for edge in results if edge['real_upper_share'] is not None])
+
+        output_file = os.path.join(self.directory, 'output.json')
+        main(input_file, output_file, 'scc')
+        with open(output_file, 'r') as f:
+            self.assertEqual(f.read(), json.dumps(expected, indent=2))
+        with self.assertRaises(ValueError):
+            main(input_file, output_file, 'scc', stream=True, output_format='pretty')
+        with self.assertRaises(ValueError):
+            main(input_file, output_file, 'scc', stream=True, options={'max_iterations': 0})
+
+    def test_stream_network_matches_in_memory(self):
+        input_file = os.path.join(DATA_DIR, 'CasaAS.json')
+        with open(input_file, 'r') as f:
+            expected = calculate_real_shares(json.load(f), engine='scc')
+
+        for output_format in ('json', 'ndjson'):
+            output_file = os.path.join(self.directory, 'output.' + output_format)
+            stream_network(input_file, output_file, output_format=output_format)
+            with open(output_file, 'r') as f:
+                self.assertEqual(list(iter_records(f)), expected)
+
+    def test_stream_network_skips_invalid_edges(self):
+        with open(os.path.join(DATA_DIR, 'CasaAS.json'), 'r') as f:
+            network = json.load(f)
+        del network[3]['source']
+        del network[10]['active']
+        network[20]['share'] = 'a lot'
+        input_file = os.path.join(self.directory, 'input.json')
+        with open(input_file, 'w') as f:
+            json.dump(network, f)
+
+        output_file = os.path.join(self.directory, 'output.json')
+        stream_network(input_file, output_file)
+        with open(output_file, 'r') as f:
+            self.assertEqual(list(iter_records(f)), calculate_real_shares(network, engine='scc'))
+
+    def test_streaming_reports_convergence(self):
+        input_file = os.path.join(DATA_DIR, 'CasaAS.json')
+        output_file = os.path.join(self.directory, 'output.json')
+        for engine in ('scc', 'sparse'):
+            self.assertEqual(main(input_file, output_file, engine, stream=True), main(input_file, output_file, engine))
+
+        profile = RunProfile()
+        with self.assertLogs('calculator.profiling', 'WARNING') as logs:
+            stats = main(input_file, output_file, stream=True, observer=profile, options={'max_iterations': 1})
+        self.assertEqual(stats, {'iterations': 1, 'converged': False})
+        self.assertIn('Did not converge within 1 iterations (scc engine)', logs.output[0])
+        self.assertEqual((profile.to_dict()['converged'], profile.to_dict()['iterations']), (False, 1))
+
+    def test_streaming_with_pruning(self):
+        input_file = os.path.join(DATA_DIR, 'CasaAS.json')
+        output_file = os.path.join(self.directory, 'output.json')
+        for engine in ('scc', 'sparse'):
+            with self.subTest(engine=engine):
+                options = {'min_contribution': 5.0}
+                with self.assertLogs('calculator.profiling', 'INFO') as logs:
+                    stats = main(input_file, output_file, engine, stream=True, options=options)
+                with open(output_file, 'r') as f:
+                    streamed = list(iter_records(f))
+                with open(input_file, 'r') as f:
+                    expected = calculate_real_shares(json.load(f), engine, min_contribution=5.0)
+
+                self.assertEqual(streamed, expected)
+                self.assertGreater(stats['error_bound'], 0.0)
+                self.assertIn('Pruned results are at most', logs.output[-1])
+
+    def test_stream_network_requires_graph_engine(self):
+        with self.assertRaises(ValueError):
+            stream_network(os.path.join(DATA_DIR, 'CasaAS.json'), os.path.join(self.directory, 'output.json'),
+                           engine='iterative')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import json
+import os
+import random
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+def edge(source, source_depth, target, target_depth, share="50%", active=True, edge_id=None, valid_from=None,
+         valid_to=None):
+    """
+    Builds an edge in the format of the networks in data/, with unsolved real shares.
+    The id defaults to "<source>_<target>", valid_from and valid_to are only set if given.
+    """
+    record = {"id": edge_id or f"{source}_{target}", "source": source, "source_depth": source_depth,
+              "target": target, "target_depth": target_depth, "share": share, "real_lower_share": None,
+              "real_average_share": None, "real_upper_share": None, "active": active}
+    if valid_from:
+        record["valid_from"] = valid_from
+    if valid_to:
+        record["valid_to"] = valid_to
+    return record
+
+def random_network(seed, nodes=40, edges=120):
+    """
+    Builds a reproducible network of random edges between nodes at random depths,
+    with cycles, self loops, parallel edges and about one in ten edges inactive.
+    """
+    generator = random.Random(seed)
+    depths = {0: 0}
+    for node in range(1, nodes):
+        depths[node] = generator.choice([1, 2, 3, -1, -2, -3])
+
+    network = []
+    for _ in range(edges):
+        source, target = generator.randrange(nodes), generator.randrange(nodes)
+        network.append({
+            "id": f"{source}_{target}",
+            "source": source,
+            "source_depth": depths[source],
+            "target": target,
+            "target_depth": depths[target],
+            "share": generator.choice(["100%", "50%", "10-15%", "<5%", "20-30%", "<50%"]),
+            "real_lower_share": None,
+            "real_average_share": None,
+            "real_upper_share": None,
+            "active": generator.random() > 0.1
+        })
+    return network
+
+def load(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def load_network(name):
+    return load(os.path.join(DATA_DIR, name))
+
+def read(path):
+    with open(path, 'rb') as f:
+        return f.read()
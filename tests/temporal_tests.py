@@ -0,0 +1,84 @@
+import copy
+import random
+import unittest
+from datetime import date
+from calculator.calculator import calculate_real_shares
+from calculator.temporal import month_ends, parse_date, solve_snapshots
+from tests.support import edge, random_network
+
+def snapshot(records, day):
+    return [
+        copy.deepcopy(record) for record in records
+        if parse_date(record.get("valid_from") or "0001-01-01") <= day
+        and (record.get("valid_to") is None or day < parse_date(record["valid_to"]))
+    ]
+
+class TemporalTestCase(unittest.TestCase):
+    def assertMatchesSnapshots(self, records, dates):
+        series = solve_snapshots(records, dates)
+        for date_index, day in enumerate(series.dates):
+            expected = calculate_real_shares(snapshot(records, day), engine='scc')
+            expected_ids = set()
+            for item in expected:
+                expected_ids.add(item["id"])
+                values = (item["real_lower_share"], item["real_average_share"], item["real_upper_share"])
+                self.assertEqual(series.at(item["id"], date_index), None if values[0] is None else values)
+            for edge_id in series.series:
+                if edge_id not in expected_ids:
+                    self.assertIsNone(series.at(edge_id, date_index))
+        return series
+
+    def test_month_ends(self):
+        self.assertEqual(month_ends(date(2023, 11, 15), date(2024, 2, 29)),
+                         [date(2023, 11, 30), date(2023, 12, 31), date(2024, 1, 31), date(2024, 2, 29)])
+        self.assertEqual(len(month_ends(date(2005, 1, 1), date(2024, 12, 31))), 240)
+
+    def test_share_change_and_new_owner(self):
+        records = [
+            edge("A", 1, "FC", 0, "50%", valid_to="2024-03-01"),
+            edge("A", 1, "FC", 0, "100%", valid_from="2024-03-01"),
+            edge("B", 2, "A", 1, "40%"),
+            edge("C", 2, "A", 1, "10%", valid_from="2024-02-15", valid_to="2024-04-15"),
+            edge("FC", 0, "S", -1, "80%")
+        ]
+        series = self.assertMatchesSnapshots(records, month_ends(date(2024, 1, 1), date(2024, 5, 31)))
+
+        self.assertEqual(series.series["B_A"], [[0, 20.0, 20.0, 20.0], [2, 40.0, 40.0, 40.0]])
+        self.assertEqual(series.series["C_A"], [[1, 5.0, 5.0, 5.0], [2, 10.0, 10.0, 10.0], [3, None, None, None]])
+        self.assertEqual(series.series["FC_S"], [[0, 80.0, 80.0, 80.0]])
+        self.assertEqual(series.to_dict()["dates"][0], "2024-01-31")
+
+    def test_random_intervals_match_snapshots(self):
+        dates = month_ends(date(2020, 1, 1), date(2021, 12, 31))
+        for seed in range(5):
+            generator = random.Random(seed)
+            records = []
+            seen = set()
+            for record in random_network(seed):
+                if record["id"] in seen:
+                    continue
+                seen.add(record["id"])
+                start, end = sorted(generator.sample(range(len(dates) + 1), 2))
+                if start:
+                    record["valid_from"] = dates[start - 1].isoformat()
+                if end < len(dates):
+                    record["valid_to"] = dates[end].isoformat()
+                records.append(record)
+            self.assertMatchesSnapshots(records, dates)
+
+    def test_only_changes_are_recomputed(self):
+        records = [edge(index, 1, "FC", 0, "1%") for index in range(100)]
+        records.append(edge("X", 2, 0, 1, "50%", valid_from="2024-02-10"))
+        stats = {}
+        solve_snapshots(records, month_ends(date(2024, 1, 1), date(2024, 12, 31)), stats)
+        self.assertEqual((stats["snapshots"], stats["edges_changed"], stats["edges_recomputed"]), (12, 1, 1))
+
+    def test_overlapping_intervals(self):
+        records = [edge("A", 1, "FC", 0, "50%"), edge("A", 1, "FC", 0, "60%", valid_from="2024-02-01")]
+        with self.assertRaises(ValueError):
+            solve_snapshots(records, [date(2024, 1, 31), date(2024, 2, 29)])
+        with self.assertRaises(ValueError):
+            solve_snapshots([edge("A", 1, "FC", 0, "50%", valid_from="2024-02-01", valid_to="2024-01-01")], [date(2024, 1, 31)])
+
+if __name__ == '__main__':
+    unittest.main()
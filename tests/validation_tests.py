@@ -0,0 +1,80 @@
+import copy
+import json
+import shutil
+import tempfile
+import unittest
+from calculator.calculator import calculate_real_shares
+from calculator.cache import ResultCache
+from calculator.validation import ValidationReport, normalize_network, share_error
+from tests.support import edge
+
+class ValidationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.network = [
+            edge("A", 1, "FC", 0, "50%"),
+            edge("X", 2, "A", 1, "40%"),
+            edge("X", 2, "A", 1, "40%"),
+            edge("Y", 2, "A", 1, "1%", active=False),
+            edge("Z", 2, "A", 1, "abc%"),
+            edge("A", 1, "A", 1, "10%"),
+            edge("W", 2, "A", 1, "60%", edge_id="X_A"),
+            {**edge("V", "2", "A", 1, "10%")},
+            {key: value for key, value in edge("U", 2, "A", 1, "10%").items() if key != 'share'}
+        ]
+
+    def test_share_error(self):
+        for share in ("50%", "10-15%", "<5%", "0%", "100%", "20-10%"):
+            self.assertIsNone(share_error(share), share)
+        for share in ("abc%", "10-20-30%", "<abc%", "150%", "-5%", "", "nan%", 50):
+            self.assertIsNotNone(share_error(share), share)
+
+    def test_normalize_network(self):
+        report = ValidationReport()
+        edges = normalize_network(self.network, report)
+
+        self.assertEqual([item['id'] for item in edges], ["A_FC", "X_A"])
+        self.assertIs(edges[1], self.network[1])
+        self.assertEqual(edges.shares, [(0.5, 0.5, 0.5), (0.4, 0.4, 0.4)])
+        graph = edges.ownership_graph()
+        self.assertEqual(graph.node_ids, ["A", "FC", "X"])
+        self.assertEqual(graph.focus, {1})
+
+        self.assertEqual([(issue['index'], issue['code']) for issue in report.issues], [
+            (2, 'duplicate_edge'), (4, 'malformed_share'), (5, 'self_loop'), (6, 'conflicting_duplicate'),
+            (7, 'invalid_depth'), (8, 'missing_field')
+        ])
+        summary = report.to_dict()
+        self.assertEqual((summary['edges'], summary['inactive'], summary['duplicates'], summary['invalid']),
+                         (9, 1, 1, 5))
+        self.assertTrue(summary['focus_found'])
+        json.dumps(summary)
+
+    def test_missing_focus_is_reported(self):
+        report = ValidationReport()
+        normalize_network([edge("X", 2, "A", 1, "40%")], report)
+        self.assertFalse(report.focus_found)
+        self.assertEqual(report.issues[0]['code'], 'no_focus')
+
+    def test_repeated_edges_are_counted_once(self):
+        for engine in ('iterative', 'sparse', 'scc'):
+            with self.subTest(engine=engine):
+                result = calculate_real_shares(copy.deepcopy(self.network), engine)
+                self.assertEqual(result[1]['real_upper_share'], 20.0)
+                self.assertEqual(result[2]['real_upper_share'], 20.0)
+                for index in (3, 4, 5, 6, 7, 8):
+                    self.assertIsNone(result[index]['real_upper_share'])
+
+    def test_invalid_edges_do_not_change_the_cache_key(self):
+        directory = tempfile.mkdtemp()
+        try:
+            cache = ResultCache(directory)
+            calculate_real_shares(self.network[:2], 'scc', cache=cache)
+            stats = {}
+            result = calculate_real_shares(copy.deepcopy(self.network), 'scc', stats, cache=cache)
+            self.assertEqual(stats['cache'], 'hit')
+            self.assertEqual(result[2]['real_upper_share'], 20.0)
+        finally:
+            shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    unittest.main()